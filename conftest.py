@@ -1,6 +1,61 @@
+from collections.abc import Iterator
+from importlib import import_module
+
 import pytest
+from django.core.cache import cache
+from django.db import connection
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from pytest_django import DjangoDbBlocker
 from rest_framework.test import APIClient
 
+from payouts.breaker import get_circuit_breaker
+from payouts.limiter import get_gateway_limiter
+from payouts.models import ArchivedPayout, PayoutHistory
+
+archive_migration = import_module("payouts.migrations.0013_archivedpayout")
+history_migration = import_module("payouts.migrations.0016_payouthistory")
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup: None, django_db_blocker: DjangoDbBlocker) -> None:
+    """Without migrations the archive is a plain table and the unmanaged PayoutHistory view is
+    missing: recreate them as migrations 0013 and 0016 do."""
+    with django_db_blocker.unblock(), connection.cursor() as cursor:
+        cursor.execute(f"DROP VIEW IF EXISTS {connection.ops.quote_name(PayoutHistory._meta.db_table)}")
+        cursor.execute(f"DROP TABLE {connection.ops.quote_name(ArchivedPayout._meta.db_table)}")
+        cursor.execute(archive_migration.CREATE_ARCHIVE_TABLE)
+        cursor.execute(history_migration.CREATE_ARCHIVE_INDEXES)
+        cursor.execute(history_migration.CREATE_HISTORY_VIEW)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_gateway_state() -> None:
+    get_gateway_limiter.cache_clear()
+    get_circuit_breaker.cache_clear()
+
+
+span_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture
+def spans() -> Iterator[InMemorySpanExporter]:
+    """Record all spans in memory; the tracer provider can only be set once per process."""
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+        trace.set_tracer_provider(provider)
+    span_exporter.clear()
+    yield span_exporter
+    span_exporter.clear()
+
 
 @pytest.fixture
 def api_client() -> APIClient:
@@ -26,23 +26,32 @@ def format_drf_errors(
     response: Response,
     _context: dict[str, Any],
     exc: Exception,
+) -> list[dict[str, Any]]:
+    return format_error_detail(response.data, response.status_code, exc)
+
+
+def format_error_detail(
+    detail: Any,
+    status_code: int,
+    exc: Exception,
+    pointer_prefix: str = "/data",
 ) -> list[dict[str, Any]]:
     errors_list: list[dict[str, Any]] = []
-    error_msg_gen = error_generator(response.status_code)
+    error_msg_gen = error_generator(status_code)
 
-    if isinstance(response.data, list):
-        errors_list.extend(error_msg_gen(message) for message in response.data)
+    if isinstance(detail, list):
+        errors_list.extend(error_msg_gen(message, pointer=pointer_prefix) for message in detail)
 
-    elif isinstance(response.data, dict):
-        for field, error in response.data.items():
-            pointer = f"/data/{field}"
+    elif isinstance(detail, dict):
+        for field, error in detail.items():
+            pointer = f"{pointer_prefix}/{field}"
 
             if isinstance(error, dict):
                 errors_list.append(error)
             elif isinstance(error, str | bytes):
                 classes = inspect.getmembers(exceptions, inspect.isclass)
                 if isinstance(exc, tuple(x[1] for x in classes)):
-                    pointer = "/data"
+                    pointer = pointer_prefix
                 errors_list.append(error_msg_gen(error, pointer=pointer, label=field))
             elif isinstance(error, list):
                 for message in error:
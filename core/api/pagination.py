@@ -0,0 +1,104 @@
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Func, Model, QuerySet, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+POSITION_SEPARATOR = "|"
+
+
+class Row(Func):
+    """SQL row constructor ``(a, b)``, compared column by column."""
+
+    template = "(%(expressions)s)"
+
+
+class CreatedAtCursorPagination(pagination.CursorPagination):
+    """Keyset pagination over ``(created_at, id)``.
+
+    The cursor stores both values of the last row of a page, and the next page starts
+    with ``WHERE (created_at, id) < (%s, %s)`` under the same ORDER BY: an index range
+    scan however deep the client paginates, also inside runs of rows sharing one
+    ``created_at`` (e.g. an imported batch). Unlike the stock CursorPagination, which
+    keeps only the first ordering field and pages through equal values by OFFSET,
+    no offset is ever used.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: APIView | None = None) -> list | None:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        ordering = pagination._reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(queryset.model, position, reverse))
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.current_position = position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_position_filter(self, model: type[Model], position: str, reverse: bool) -> LessThan | GreaterThan:
+        names = [name.lstrip("-") for name in self.ordering]
+        values = position.split(POSITION_SEPARATOR)
+        if len(values) != len(names):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            fields = [model._meta.get_field(name) for name in names]
+            row = Row(
+                *(
+                    Value(field.to_python(value), output_field=field)
+                    for field, value in zip(fields, values, strict=True)
+                )
+            )
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+        # Rows after the position in the requested direction: (descending) XOR (backwards).
+        lookup = LessThan if self.ordering[0].startswith("-") != reverse else GreaterThan
+        return lookup(Row(*(F(name) for name in names), output_field=fields[0]), row)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering) if self.page else None
+        cursor = pagination.Cursor(offset=0, reverse=False, position=position or self.current_position)
+        return self.encode_cursor(cursor)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering) if self.page else None
+        cursor = pagination.Cursor(offset=0, reverse=True, position=position or self.current_position)
+        return self.encode_cursor(cursor)
+
+    def _get_position_from_instance(self, instance: Any, ordering: tuple[str, ...]) -> str:
+        names = [name.lstrip("-") for name in ordering]
+        values = [instance[name] if isinstance(instance, dict) else getattr(instance, name) for name in names]
+        return POSITION_SEPARATOR.join(
+            value.isoformat() if hasattr(value, "isoformat") else str(value) for value in values
+        )
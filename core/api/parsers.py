@@ -0,0 +1,26 @@
+from typing import IO, Any
+
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class ORJSONParser(BaseParser):
+    """Drop-in replacement for ``JSONParser`` built on orjson.
+
+    Like the stock parser in strict mode, ``NaN`` and ``Infinity`` are rejected.
+    """
+
+    media_type = "application/json"
+
+    def parse(
+        self,
+        stream: IO[bytes],
+        media_type: str | None = None,
+        parser_context: dict[str, Any] | None = None,
+    ) -> Any:
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            msg = f"JSON parse error - {exc}"
+            raise ParseError(msg)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+from core.tracing import setup_tracing
+
+
+class CoreConfig(AppConfig):
+    name = "core"
+
+    def ready(self) -> None:
+        setup_tracing()
@@ -0,0 +1,35 @@
+import logging
+import time
+from typing import Any
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+
+from core.db.signals import connection_opened
+from core.tracing import trace_query
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend that measures how long opening a connection takes.
+
+    With persistent connections (``CONN_MAX_AGE``) this only happens when a process
+    starts or a connection expires, so the reported time shows whether reuse works.
+
+    Queries run in a recorded trace get a span each (core.tracing).
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.execute_wrappers.append(trace_query)
+
+    def get_new_connection(self, conn_params: dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        duration = time.perf_counter() - started
+
+        level = logging.WARNING if duration > settings.DB_CONNECT_SLOW_THRESHOLD else logging.DEBUG
+        logger.log(level, "Database connection %r opened in %.1f ms", self.alias, duration * 1000)
+        connection_opened.send(sender=self.__class__, alias=self.alias, duration=duration)
+        return connection
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after a new database connection is opened.
+# Arguments: ``alias`` (connection alias) and ``duration`` (seconds spent connecting).
+connection_opened = Signal()
@@ -0,0 +1,140 @@
+"""Prometheus metrics shared by the web app and the workers.
+
+Metrics are module-level objects recorded in the process that runs the code. Under
+Gunicorn, Uvicorn with several workers or a prefork Celery worker, every process keeps
+its own values: set ``PROMETHEUS_MULTIPROC_DIR`` to a directory empty at startup and
+the processes write them to files there, which ``get_registry`` then adds up. The start
+scripts prepare the directory (scripts/utils/prepare_metrics_dir.sh).
+
+Children of the label sets used on hot paths are created once, at import, so recording
+a value is a dict lookup instead of a ``labels()`` call (label validation, a lock and a
+new tuple) per request.
+"""
+
+import os
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from django.conf import settings
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponse
+from django.utils.module_loading import import_string
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.registry import Collector
+
+from core.db.signals import connection_opened
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+STATUS_CLASSES = ("2xx", "3xx", "4xx", "5xx")
+UNKNOWN_ACTION = "other"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_DURATION = Histogram(
+    "api_request_duration_seconds",
+    "Time to produce an API response, by view and action.",
+    ["view", "action", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+DB_CONNECT_DURATION = Histogram(
+    "db_connect_duration_seconds",
+    "Time to open a database connection.",
+    ["alias"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+
+class RequestMetrics:
+    """Records response times of the actions of one view."""
+
+    def __init__(self, view: str, actions: Iterable[str]) -> None:
+        self.view = view
+        self.histograms = {
+            (action, status): REQUEST_DURATION.labels(view, action, status)
+            for action in (*actions, UNKNOWN_ACTION)
+            for status in STATUS_CLASSES
+        }
+
+    def observe(self, action: str | None, status_code: int, duration: float) -> None:
+        status = STATUS_CLASSES[min(max(status_code // 100, 2), 5) - 2]
+        histogram = self.histograms.get((action, status)) or self.histograms[UNKNOWN_ACTION, status]
+        histogram.observe(duration)
+
+
+class RequestMetricsMixin:
+    """Times every request of a DRF viewset with its ``request_metrics``.
+
+    Errors rendered by the exception handler are recorded with their status, an error
+    that escapes the view as a 5xx.
+    """
+
+    request_metrics: RequestMetrics
+
+    def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            self.request_metrics.observe(getattr(self, "action", None), status_code, time.perf_counter() - started)
+
+
+@receiver(connection_opened)
+def observe_connection_opened(alias: str, duration: float, **kwargs: Any) -> None:
+    DB_CONNECT_DURATION.labels(alias).observe(duration)
+
+
+def is_multiprocess() -> bool:
+    return bool(os.environ.get(MULTIPROC_DIR_ENV))
+
+
+def get_registry() -> CollectorRegistry:
+    """The registry to expose: the values of all processes in multiprocess mode."""
+    if not is_multiprocess():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop the live gauges of a finished worker process."""
+    if is_multiprocess():
+        multiprocess.mark_process_dead(pid)
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve the metrics of this process and its children over HTTP, in a daemon thread."""
+    start_http_server(port, registry=get_registry())
+
+
+def get_scrape_collectors() -> list[Collector]:
+    return [import_string(path)() for path in settings.METRICS_SCRAPE_COLLECTORS]
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Metrics in the Prometheus text format.
+
+    Besides the metrics recorded by processes, includes METRICS_SCRAPE_COLLECTORS,
+    which read the current state (queues, tables) when scraped.
+    """
+    registry = get_registry()
+    if registry is REGISTRY:
+        registry = CollectorRegistry()
+        registry.register(REGISTRY)
+    for collector in get_scrape_collectors():
+        registry.register(collector)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
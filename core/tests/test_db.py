@@ -0,0 +1,26 @@
+import pytest
+from django.db import connection
+
+from core.db.signals import connection_opened
+
+pytestmark = pytest.mark.django_db
+
+
+def test_new_connection_reports_duration(caplog: pytest.LogCaptureFixture, settings) -> None:
+    settings.DB_CONNECT_SLOW_THRESHOLD = 0
+    received: list[dict] = []
+
+    def receiver(**kwargs) -> None:
+        received.append(kwargs)
+
+    connection_opened.connect(receiver)
+    try:
+        new_connection = connection.get_new_connection(connection.get_connection_params())
+        new_connection.close()
+    finally:
+        connection_opened.disconnect(receiver)
+
+    assert len(received) == 1
+    assert received[0]["alias"] == connection.alias
+    assert received[0]["duration"] > 0
+    assert f"Database connection '{connection.alias}' opened in" in caplog.text
@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from pytest_mock import MockerFixture
+
+from core.metrics import RequestMetrics
+
+pytestmark = pytest.mark.django_db
+
+
+def get_request_count(view: str, action: str, status: str) -> float:
+    labels = {"view": view, "action": action, "status": status}
+    return REGISTRY.get_sample_value("api_request_duration_seconds_count", labels) or 0
+
+
+@pytest.mark.parametrize(
+    ("action", "status_code", "labels"),
+    [
+        ("retrieve", 200, ("retrieve", "2xx")),
+        ("retrieve", 404, ("retrieve", "4xx")),
+        ("metadata", 200, ("other", "2xx")),
+        (None, 405, ("other", "4xx")),
+        ("retrieve", 503, ("retrieve", "5xx")),
+    ],
+)
+def test_request_metrics_observe(action: str | None, status_code: int, labels: tuple[str, str]) -> None:
+    metrics = RequestMetrics("test", ("retrieve",))
+    before = get_request_count("test", *labels)
+
+    metrics.observe(action, status_code, 0.01)
+
+    assert get_request_count("test", *labels) == before + 1
+
+
+def test_metrics_view(mocker: MockerFixture) -> None:
+    mocker.patch("payouts.metrics.get_queue_depths", return_value={"celery": 3})
+    client = Client()
+    client.get(reverse("payout-list"))
+
+    response = client.get(reverse("metrics"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    content = response.content.decode()
+    assert 'api_request_duration_seconds_count{action="list",status="2xx",view="payouts"}' in content
+    assert 'payouts_queue_depth{queue="celery"} 3.0' in content
+
+
+def test_new_connection_observed() -> None:
+    before = REGISTRY.get_sample_value("db_connect_duration_seconds_count", {"alias": connection.alias}) or 0
+
+    connection.get_new_connection(connection.get_connection_params()).close()
+
+    assert REGISTRY.get_sample_value("db_connect_duration_seconds_count", {"alias": connection.alias}) == before + 1
@@ -0,0 +1,75 @@
+import io
+import uuid
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import orjson
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.api.parsers import ORJSONParser
+from core.api.renderers import ORJSONRenderer
+
+DATA = {
+    "results": [
+        {"id": "6f1c4d1e-8f6b-4a49-9d1a-0d0c2b8d7f10", "amount": "1000.50", "comment": "Выплата"},
+        {"id": "0b4bb1e0-8b6a-4b8c-8e07-7c7c2b33d7a1", "amount": "0.01", "comment": None},
+    ],
+    "next": None,
+}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        DATA,
+        {"counts": {1: 10, 2: 20}, "flags": {True: "да", None: "нет"}},
+        {"comment": "строка\u2028вторая\u2029третья"},
+    ],
+    ids=["serializer", "non-str-keys", "line-separators"],
+)
+def test_renderer_matches_json_renderer(data: dict) -> None:
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_renderer_indent() -> None:
+    assert ORJSONRenderer().render(DATA, "application/json; indent=4") == orjson.dumps(DATA, option=orjson.OPT_INDENT_2)
+
+
+def test_renderer_converts_values(settings) -> None:
+    payout_id = uuid.uuid4()
+    data = {
+        "id": payout_id,
+        "amount": Decimal("1000.50"),
+        "created_at": datetime(2025, 1, 2, 3, 4, 5, 678_000, tzinfo=UTC),
+        "label": gettext_lazy("Ожидает обработки"),
+    }
+
+    assert orjson.loads(ORJSONRenderer().render(data)) == {
+        "id": str(payout_id),
+        "amount": "1000.50",
+        "created_at": "2025-01-02T03:04:05Z",
+        "label": "Ожидает обработки",
+    }
+
+
+def test_parser_rejects_invalid_json() -> None:
+    parser = ORJSONParser()
+
+    assert parser.parse(io.BytesIO(b'{"amount": "1.00"}')) == {"amount": "1.00"}
+    with pytest.raises(ParseError):
+        parser.parse(io.BytesIO(b'{"amount": NaN}'))
+
+
+@pytest.mark.django_db
+def test_parse_error_is_rendered_as_errors(api_client: APIClient) -> None:
+    response = api_client.post(reverse("payout-list"), data=b"{", content_type="application/json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response["Content-Type"] == "application/json"
+    assert orjson.loads(response.content)["errors"][0]["detail"].startswith("JSON parse error")
@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import Decision
+
+from core.tracing import (
+    FileSpanExporter,
+    continue_trace,
+    get_sampler,
+    get_span_exporter,
+    inject_context,
+    tracer,
+)
+
+
+def test_continue_trace(spans: InMemorySpanExporter) -> None:
+    with tracer.start_as_current_span("request"):
+        headers = inject_context()
+
+    with continue_trace(headers, "task"):
+        pass
+
+    request, task = spans.get_finished_spans()
+    assert "traceparent" in headers
+    assert task.context.trace_id == request.context.trace_id
+    assert task.parent.span_id == request.context.span_id
+
+
+def test_continue_trace_without_context_starts_trace(spans: InMemorySpanExporter) -> None:
+    assert inject_context() == {}
+
+    with continue_trace({}, "task"):
+        pass
+
+    (task,) = spans.get_finished_spans()
+    assert task.parent is None
+
+
+@pytest.mark.django_db
+def test_queries_traced(spans: InMemorySpanExporter) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    assert spans.get_finished_spans() == ()
+
+    with tracer.start_as_current_span("request"), connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+    query, request = spans.get_finished_spans()
+    assert query.name == "db SELECT"
+    assert query.kind == trace.SpanKind.CLIENT
+    assert query.attributes["db.statement"] == "SELECT 1"
+    assert query.parent.span_id == request.context.span_id
+
+
+def test_sampler_keeps_decision_of_trace_start() -> None:
+    sampler = get_sampler(0)
+    trace_id = 0x0AF7651916CD43DD8448EB211C80319C
+    parent = trace.set_span_in_context(
+        trace.NonRecordingSpan(
+            trace.SpanContext(
+                trace_id, 0x00F067AA0BA902B7, is_remote=True, trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED)
+            ),
+        ),
+    )
+
+    assert sampler.should_sample(None, trace_id, "request").decision == Decision.DROP
+    assert sampler.should_sample(parent, trace_id, "task").decision == Decision.RECORD_AND_SAMPLE
+
+
+def test_file_span_exporter(spans: InMemorySpanExporter, tmp_path: Path) -> None:
+    with tracer.start_as_current_span("request"), tracer.start_as_current_span("query"):
+        pass
+    path = tmp_path / "traces.jsonl"
+
+    FileSpanExporter(str(path)).export(spans.get_finished_spans())
+
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["query", "request"]
+
+
+def test_unknown_exporter() -> None:
+    with pytest.raises(ImproperlyConfigured):
+        get_span_exporter("jaeger")
@@ -0,0 +1,114 @@
+"""OpenTelemetry tracing.
+
+Spans are created through ``tracer`` everywhere. Until ``setup_tracing`` installs a
+tracer provider (TRACING_EXPORTER is set), it is the no-op tracer of the API.
+
+A trace is carried between processes as W3C trace context: ``inject_context`` gives
+the headers to put on a message, ``continue_trace`` starts a span in the trace they
+belong to. Whether a trace is recorded is decided once, where it starts, with
+probability TRACING_SAMPLE_RATE; spans of a trace that is not recorded cost a context
+lookup, so tracing at a low rate stays cheap on the hot path.
+"""
+
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, Sampler, TraceIdRatioBased
+
+tracer = trace.get_tracer("payout_service")
+
+EXPORTER_CONSOLE = "console"
+EXPORTER_FILE = "file"
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line.
+
+    The file is opened for every exported batch, so processes of a server can share it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        with self.path.open("a", encoding="utf-8") as file:
+            file.writelines(f"{span.to_json(indent=None)}\n" for span in spans)
+        return SpanExportResult.SUCCESS
+
+
+def get_span_exporter(name: str) -> SpanExporter:
+    if name == EXPORTER_CONSOLE:
+        return ConsoleSpanExporter()
+    if name == EXPORTER_FILE:
+        return FileSpanExporter(settings.TRACING_FILE)
+    msg = f"Unknown TRACING_EXPORTER {name!r}: expected {EXPORTER_CONSOLE!r} or {EXPORTER_FILE!r}"
+    raise ImproperlyConfigured(msg)
+
+
+def get_sampler(rate: float) -> Sampler:
+    """Traces started here are sampled at ``rate``; continued traces keep the decision of their start."""
+    return ParentBased(TraceIdRatioBased(rate))
+
+
+def setup_tracing() -> None:
+    """Record spans if TRACING_EXPORTER is set; they are exported in a background thread."""
+    if not settings.TRACING_EXPORTER:
+        return
+
+    provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: settings.APPLICATION_NAME}),
+        sampler=get_sampler(settings.TRACING_SAMPLE_RATE),
+    )
+    provider.add_span_processor(BatchSpanProcessor(get_span_exporter(settings.TRACING_EXPORTER)))
+    trace.set_tracer_provider(provider)
+
+
+def inject_context() -> dict[str, str]:
+    """Headers carrying the current trace context, empty outside of a span."""
+    headers: dict[str, str] = {}
+    propagate.inject(headers)
+    return headers
+
+
+@contextmanager
+def continue_trace(headers: dict[str, str] | None, name: str, **kwargs: Any) -> Iterator[trace.Span]:
+    """A span in the trace whose context ``inject_context`` put into ``headers``.
+
+    Without trace context in ``headers`` the span starts a new trace.
+    """
+    with tracer.start_as_current_span(name, context=propagate.extract(headers or {}), **kwargs) as span:
+        yield span
+
+
+def trace_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    """Database execute wrapper: a span per query of a recorded trace."""
+    if not trace.get_current_span().is_recording():
+        return execute(sql, params, many, context)
+
+    operation = sql.split(None, 1)[0].upper() if sql else ""
+    attributes = {
+        "db.system": context["connection"].vendor,
+        "db.operation": operation,
+        "db.statement": sql,
+    }
+    with tracer.start_as_current_span(f"db {operation}", kind=trace.SpanKind.CLIENT, attributes=attributes):
+        return execute(sql, params, many, context)
@@ -11,5 +11,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "payout_service.settings")
+# Hot payout endpoints are served by async views under ASGI.
+os.environ.setdefault("DJANGO_ROOT_URLCONF", "payout_service.urls_asgi")
 
 application = get_asgi_application()
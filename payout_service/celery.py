@@ -1,5 +1,14 @@
+import os
+from typing import Any
+
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
 from django.conf import settings
+from kombu import Queue
+
+from core.metrics import mark_process_dead, start_metrics_server
+from payouts.choices import CurrencyChoices
+from payouts.constants import DEFAULT_QUEUE, DISPATCH_MODE_CLAIM, PAYOUT_LANES, get_payout_queue_name
 
 app = Celery(settings.APPLICATION_NAME)
 
@@ -7,3 +16,61 @@ app = Celery(settings.APPLICATION_NAME)
 # pickle the object when using Windows.
 app.config_from_object("django.conf:settings")
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
+
+# Payouts are routed to per lane and currency queues when dispatched (see payouts.dispatch).
+# The queues are listed from the most urgent lane, and the Redis transport consumes them
+# in that order, so a worker subscribed to several lanes drains urgent payouts first.
+app.conf.task_queues = [
+    Queue(DEFAULT_QUEUE),
+    *(
+        Queue(get_payout_queue_name(lane, currency))
+        for lane in PAYOUT_LANES
+        if not settings.PAYOUT_WORKER_LANES or lane in settings.PAYOUT_WORKER_LANES
+        for currency in CurrencyChoices
+        if not settings.PAYOUT_WORKER_CURRENCIES or currency in settings.PAYOUT_WORKER_CURRENCIES
+    ),
+]
+app.conf.task_default_queue = DEFAULT_QUEUE
+app.conf.broker_transport_options = {"queue_order_strategy": "priority"}
+# A payout task can wait on the gateway for seconds: reserve as few messages as possible,
+# so they are not stuck behind it while other processes idle. Tasks are acknowledged on
+# start (no acks_late: a redelivered payout would be left PROCESSING), so a busy process
+# still holds one more message besides the running one; the multiplier caps it at that.
+app.conf.worker_prefetch_multiplier = 1
+
+app.conf.beat_schedule = {
+    "purge-idempotency-keys": {
+        "task": "payouts.tasks.purge_idempotency_keys_task",
+        "schedule": 60 * 60,
+    },
+    "archive-payouts": {
+        "task": "payouts.tasks.archive_payouts_task",
+        "schedule": settings.PAYOUT_ARCHIVE_INTERVAL,
+    },
+    "refresh-payout-stats": {
+        "task": "payouts.tasks.refresh_payout_stats_task",
+        "schedule": settings.PAYOUT_STATS_REFRESH_INTERVAL,
+    },
+}
+
+if settings.PAYOUT_DISPATCH_MODE == DISPATCH_MODE_CLAIM:
+    app.conf.beat_schedule["claim-payouts"] = {
+        "task": "payouts.tasks.claim_payouts_task",
+        "schedule": settings.PAYOUT_CLAIM_INTERVAL,
+    }
+
+
+@worker_init.connect
+def start_worker_metrics(**kwargs: Any) -> None:
+    """Export the metrics of the worker's processes from the main process.
+
+    With PROMETHEUS_MULTIPROC_DIR (set by scripts/start_worker.sh) pool processes write
+    their values to files there and the exporter adds them up.
+    """
+    if settings.WORKER_METRICS_PORT:
+        start_metrics_server(settings.WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def forget_worker_process_metrics(**kwargs: Any) -> None:
+    mark_process_dead(os.getpid())
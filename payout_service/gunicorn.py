@@ -0,0 +1,9 @@
+"""Gunicorn configuration: ``gunicorn -c python:payout_service.gunicorn``."""
+
+from typing import Any
+
+from core.metrics import mark_process_dead
+
+
+def child_exit(server: Any, worker: Any) -> None:
+    mark_process_dead(worker.pid)
@@ -10,6 +10,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+from decimal import Decimal
 from pathlib import Path
 
 APPLICATION_NAME = "payout_service"
@@ -53,7 +54,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "payout_service.urls"
+ROOT_URLCONF = os.getenv("DJANGO_ROOT_URLCONF", "payout_service.urls")
 
 TEMPLATES = [
     {
@@ -75,18 +76,17 @@ WSGI_APPLICATION = "payout_service.wsgi.application"
 
 REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "core.api.exception_handler.custom_exception_handler",
-    "DEFAULT_RENDERER_CLASSES": (
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
-    ),
+    "DEFAULT_RENDERER_CLASSES": ("core.api.renderers.ORJSONRenderer",),
     "DEFAULT_PARSER_CLASSES": (
-        "rest_framework.parsers.JSONParser",
+        "core.api.parsers.ORJSONParser",
         "rest_framework.parsers.FormParser",
         "rest_framework.parsers.MultiPartParser",
     ),
     "DATETIME_FORMAT": "%Y-%m-%dT%H:%M:%SZ",
     "DATE_FORMAT": "%Y-%m-%d",
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
+    "DEFAULT_PAGINATION_CLASS": "core.api.pagination.CreatedAtCursorPagination",
+    "PAGE_SIZE": 50,
     "NON_FIELD_ERRORS_KEY": "non_field_errors",
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
@@ -107,15 +107,24 @@ DB_USER = os.getenv("POSTGRES_USER", "payout_user")
 DB_PASSWORD = os.getenv("POSTGRES_PASSWORD", "payout_password")
 DB_HOST = os.getenv("DB_HOST", "db")
 DB_PORT = os.getenv("DB_PORT", "5432")
+# Seconds to keep a connection open between requests/tasks: 0 closes it after each one,
+# "none" keeps it for the life of the process. Set per process type (web, worker, relay);
+# the ASGI server always uses 0 (see scripts/utils/start_uvicorn.sh).
+DB_CONN_MAX_AGE = os.getenv("DB_CONN_MAX_AGE", "0")
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+DB_CONNECT_SLOW_THRESHOLD = 0.1
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.db.backends.postgresql",
         "NAME": DB_NAME,
         "USER": DB_USER,
         "PASSWORD": DB_PASSWORD,
         "HOST": DB_HOST,
         "PORT": DB_PORT,
+        "CONN_MAX_AGE": None if DB_CONN_MAX_AGE.lower() == "none" else int(DB_CONN_MAX_AGE),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"connect_timeout": DB_CONNECT_TIMEOUT},
     },
 }
 
@@ -152,6 +161,38 @@ USE_TZ = True
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
 
+# Metrics (core.metrics). Collectors of the current state, read when /metrics is scraped.
+METRICS_SCRAPE_COLLECTORS = ["payouts.metrics.PayoutStateCollector"]
+# Port of the metrics exporter started by Celery workers; 0 starts none.
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+# Tracing (core.tracing). "console" prints finished spans to stdout, "file" appends them
+# to TRACING_FILE as JSON lines; empty records nothing. TRACING_SAMPLE_RATE of the traces
+# is recorded: keep it low under full load, every recorded query is a span.
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "0.01"))
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHE_URL = os.getenv("CACHE_URL")
+
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10_000},
+        },
+    }
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
@@ -164,6 +205,97 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 PAYOUT_PROCESSING_TIMEOUT = 10
+# Time from creation by which a payout must reach the gateway, by priority. A payout past
+# its deadline fails without a gateway call, and a gateway wait is cut at the deadline.
+PAYOUT_DEADLINES = {
+    "urgent": 15 * 60,
+    "normal": 60 * 60,
+    "bulk": 24 * 60 * 60,
+}
 PAYOUT_GATEWAY_DELAY = 5
 PAYOUT_TASK_MAX_RETRIES = 3
 PAYOUT_TASK_RETRY_DELAY = 60
+PAYOUT_GATEWAY_CONCURRENCY = 200
+
+# Adaptive limit on concurrent gateway calls, see payouts.limiter. Shared through Redis
+# by all workers; without a URL every process limits its own calls.
+PAYOUT_GATEWAY_LIMITER_URL = os.getenv("GATEWAY_LIMITER_URL", "")
+PAYOUT_GATEWAY_LIMIT_INITIAL = 50
+PAYOUT_GATEWAY_LIMIT_MIN = 1
+PAYOUT_GATEWAY_LIMIT_MAX = 1_000
+PAYOUT_GATEWAY_LATENCY_TARGET = PAYOUT_PROCESSING_TIMEOUT * 0.8
+PAYOUT_GATEWAY_SLOW_BACKOFF = 0.9
+PAYOUT_GATEWAY_TIMEOUT_BACKOFF = 0.5
+PAYOUT_GATEWAY_BACKOFF_COOLDOWN = 1.0
+PAYOUT_GATEWAY_LEASE_TIMEOUT = PAYOUT_PROCESSING_TIMEOUT * 2
+PAYOUT_GATEWAY_LIMITER_WAIT = 30
+PAYOUT_GATEWAY_BUSY_RETRY_DELAY = 5
+
+# Circuit breaker on gateway calls, see payouts.breaker. Shared through Redis like the limiter.
+PAYOUT_GATEWAY_BREAKER_URL = os.getenv("GATEWAY_BREAKER_URL", PAYOUT_GATEWAY_LIMITER_URL)
+PAYOUT_GATEWAY_BREAKER_WINDOW = 10
+PAYOUT_GATEWAY_BREAKER_MIN_CALLS = 20
+PAYOUT_GATEWAY_BREAKER_FAILURE_RATE = 0.5
+PAYOUT_GATEWAY_BREAKER_OPEN_TIMEOUT = 15
+PAYOUT_GATEWAY_BREAKER_PROBE_TIMEOUT = PAYOUT_GATEWAY_LIMITER_WAIT + PAYOUT_GATEWAY_LEASE_TIMEOUT
+
+# Task retries by kind of error (payouts.retries): the delay doubles with every retry up
+# to max_delay and is randomized, so tasks failed together do not retry together.
+# Tasks out of retries go to the dead-letter table; max_retries None retries until done.
+PAYOUT_TASK_RETRY_POLICIES = {
+    "deferred": {"delay": PAYOUT_GATEWAY_BUSY_RETRY_DELAY, "max_delay": 2 * 60, "max_retries": None},
+    "database": {"delay": 2, "max_delay": 5 * 60, "max_retries": 10},
+    "unexpected": {"delay": PAYOUT_TASK_RETRY_DELAY, "max_delay": 30 * 60, "max_retries": PAYOUT_TASK_MAX_RETRIES},
+}
+
+# "task": every payout is sent to the broker as a Celery message.
+# "claim": workers periodically claim PENDING rows with SELECT ... FOR UPDATE SKIP LOCKED.
+PAYOUT_DISPATCH_MODE = os.getenv("PAYOUT_DISPATCH_MODE", "task")
+PAYOUT_CLAIM_INTERVAL = 2
+PAYOUT_CLAIM_BATCH_SIZE = 500
+PAYOUT_CLAIM_MAX_BATCHES = 20
+
+PAYOUT_OUTBOX_BATCH_SIZE = 1_000
+PAYOUT_OUTBOX_POLL_INTERVAL = 0.5
+PAYOUT_OUTBOX_RETENTION = 24 * 60 * 60
+
+# Finalized payouts are moved to the archive this long after creation.
+PAYOUT_ARCHIVE_AFTER = 90 * 24 * 60 * 60
+PAYOUT_ARCHIVE_INTERVAL = 60 * 60
+PAYOUT_ARCHIVE_BATCH_SIZE = 10_000
+# Archive partitions are detached this long after their month ends, None keeps them.
+# Must be longer than PAYOUT_ARCHIVE_AFTER.
+PAYOUT_ARCHIVE_RETENTION = None
+
+PAYOUT_IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+# A payout to the card of a payout created this long before, with the same amount and
+# currency, is rejected as a duplicate unless that payout failed or was canceled. Off (0)
+# by default: clients may rely on repeating payouts; e.g. 60 * 60 enables it for an hour.
+PAYOUT_DUPLICATE_WINDOW = int(os.getenv("PAYOUT_DUPLICATE_WINDOW", "0"))
+# Key of the recipient_key HMAC; changing it requires recomputing the keys of existing payouts.
+PAYOUT_RECIPIENT_KEY_SECRET = os.getenv("PAYOUT_RECIPIENT_KEY_SECRET")
+PAYOUT_CACHE_TIMEOUT = 10 * 60
+PAYOUT_METRICS_STATUS_COUNTS_TIMEOUT = 30
+
+PAYOUT_STATS_REFRESH_INTERVAL = 60
+# Payouts updated this long before the last stats refresh are looked at again.
+PAYOUT_STATS_REFRESH_OVERLAP = 5 * 60
+PAYOUT_STATS_DEFAULT_DAYS = 30
+
+PAYOUT_BULK_MAX_SIZE = 50_000
+PAYOUT_BULK_CREATE_BATCH_SIZE = 1_000
+PAYOUT_DISPATCH_BATCH_SIZE = 500
+
+# NORMAL payouts from this amount on go to the URGENT lane.
+PAYOUT_URGENT_AMOUNTS = {
+    "RUB": Decimal("1000000"),
+    "USD": Decimal("10000"),
+    "EUR": Decimal("10000"),
+}
+# Lanes and currencies whose queues a worker consumes, e.g. PAYOUT_WORKER_LANES=bulk
+# for a separate bulk pool. Empty means all of them.
+PAYOUT_WORKER_LANES = [lane for lane in os.getenv("PAYOUT_WORKER_LANES", "").split(",") if lane]
+PAYOUT_WORKER_CURRENCIES = [currency for currency in os.getenv("PAYOUT_WORKER_CURRENCIES", "").split(",") if currency]
+
+PAYOUT_EXPORT_CHUNK_SIZE = 2_000
+PAYOUT_IMPORT_BATCH_SIZE = 10_000
@@ -1,6 +1,18 @@
+import os
+
 from django.core.management.utils import get_random_secret_key
 
 from payout_service.settings.base import *
 
 DEBUG = True
 SECRET_KEY = get_random_secret_key()
+# Unlike SECRET_KEY stable across processes and restarts: stored keys depend on it.
+PAYOUT_RECIPIENT_KEY_SECRET = os.getenv("PAYOUT_RECIPIENT_KEY_SECRET", "dev-recipient-key-secret")
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": (
+        *REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"],
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+}
@@ -5,6 +5,7 @@ from payout_service.settings.base import *
 DEBUG = False
 
 SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+PAYOUT_RECIPIENT_KEY_SECRET = os.environ["PAYOUT_RECIPIENT_KEY_SECRET"]
 ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "").split(",")
 
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
@@ -0,0 +1,19 @@
+"""URLconf for the ASGI entrypoint: hot payout endpoints are served by async views."""
+
+from django.urls import path
+
+from payout_service.urls import urlpatterns as wsgi_urlpatterns
+from payouts.api.async_views import (
+    PayoutDetailAsyncView,
+    PayoutExportAsyncView,
+    PayoutListAsyncView,
+    PayoutStatusAsyncView,
+)
+
+urlpatterns = [
+    path("api/payouts/", PayoutListAsyncView.as_view(), name="payout-list"),
+    path("api/payouts/export/", PayoutExportAsyncView.as_view(), name="payout-export"),
+    path("api/payouts/<uuid:id>/", PayoutDetailAsyncView.as_view(), name="payout-detail"),
+    path("api/payouts/<uuid:id>/status/", PayoutStatusAsyncView.as_view(), name="payout-payout-status"),
+    *wsgi_urlpatterns,
+]
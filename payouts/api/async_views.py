@@ -0,0 +1,222 @@
+"""Async versions of the hot payout endpoints, routed by ``payout_service.urls_asgi``.
+
+Reads use the async cache and ORM APIs. Writes need a transaction (payout, idempotency key
+and outbox message together), which the async ORM does not support yet, so they run in a
+thread via ``sync_to_async``; the event loop stays free while they wait on the database.
+Methods that are not hot are delegated to PayoutViewSet.
+"""
+
+import logging
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+
+from core.api.exception_handler import format_error_detail
+from core.api.renderers import ORJSONRenderer
+from payouts.api.serializers import PayoutRowSerializer, PayoutSerializer, PayoutStatusSerializer
+from payouts.api.views import PayoutViewSet, create_payout, get_replayed_payout
+from payouts.cache import aadd_cached_payout, aget_cached_payout
+from payouts.constants import IDEMPOTENCY_KEY_HEADER, IDEMPOTENCY_KEY_MAX_LENGTH
+from payouts.exceptions import DuplicatePayoutError, IdempotencyKeyMismatchError
+from payouts.idempotency import get_request_hash
+from payouts.models import ArchivedPayout, Payout
+
+logger = logging.getLogger(__name__)
+
+# The message get_object_or_404 produces in PayoutViewSet.
+NOT_FOUND_MESSAGE = f"No {Payout._meta.object_name} matches the given query."
+
+payout_list_view = PayoutViewSet.as_view({"get": "list"})
+payout_detail_view = PayoutViewSet.as_view(
+    {"put": "update", "patch": "partial_update", "delete": "destroy"},
+)
+payout_export_view = PayoutViewSet.as_view({"get": "export"}, **PayoutViewSet.export.kwargs)
+
+
+def json_response(data: Any, status_code: int = status.HTTP_200_OK, **headers: str) -> HttpResponse:
+    return HttpResponse(
+        ORJSONRenderer().render(data),
+        status=status_code,
+        content_type=ORJSONRenderer.media_type,
+        headers=headers,
+    )
+
+
+def error_response(exc: exceptions.APIException, original_exc: Exception | None = None) -> HttpResponse:
+    """Renders ``exc`` the way core.api.exception_handler does for DRF views."""
+    detail = exc.detail if isinstance(exc.detail, list | dict) else {"detail": exc.detail}
+    errors = format_error_detail(detail, exc.status_code, original_exc or exc)
+    return json_response({"errors": errors}, exc.status_code)
+
+
+async def get_payout_data(payout_id: Any) -> dict[str, Any] | None:
+    data = await aget_cached_payout(payout_id)
+    if data is None:
+        row = await Payout.objects.filter(id=payout_id).values(*PayoutRowSerializer.fields).afirst()
+        if row is None:
+            row = await ArchivedPayout.objects.filter(id=payout_id).values(*PayoutRowSerializer.fields).afirst()
+        if row is None:
+            return None
+        data = PayoutRowSerializer().to_representation(row)
+        await aadd_cached_payout(payout_id, data)
+    return data
+
+
+async def iterate_in_thread(parts: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Yield the parts of a sync iterator, fetching each one in the request's sync thread.
+
+    ``sync_to_async`` is thread-sensitive, so the iterator always runs on the same thread
+    and keeps its database connection, transaction and cursor between parts.
+    """
+    while (part := await sync_to_async(next)(parts, None)) is not None:
+        yield part
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncPayoutView(View):
+    """Base view: Http404 and APIExceptions raised by handlers are rendered like in DRF views.
+
+    Requests served here are timed in PayoutViewSet.request_metrics under the viewset
+    action of their method; delegated methods are timed by the viewset itself.
+    """
+
+    actions: dict[str, str] = {}
+
+    async def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        action = self.actions.get(request.method.lower())
+        if action is None:
+            return await self.handle(request, *args, **kwargs)
+
+        started = time.perf_counter()
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        try:
+            response = await self.handle(request, *args, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            PayoutViewSet.request_metrics.observe(action, status_code, time.perf_counter() - started)
+
+    async def handle(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404 as exc:
+            return error_response(exceptions.NotFound(*exc.args), exc)
+        except exceptions.APIException as exc:
+            return error_response(exc)
+
+
+class PayoutListAsyncView(AsyncPayoutView):
+    """``/api/payouts/``: async create, list is delegated."""
+
+    actions = {"post": "create"}
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        return await sync_to_async(payout_list_view)(request, *args, **kwargs)
+
+    async def post(self, request: HttpRequest, *_args: Any, **_kwargs: Any) -> HttpResponse:
+        if request.content_type != ORJSONRenderer.media_type:
+            raise exceptions.UnsupportedMediaType(request.content_type)
+        try:
+            data = orjson.loads(request.body)
+        except orjson.JSONDecodeError as exc:
+            raise exceptions.ParseError(f"JSON parse error - {exc}")
+
+        idempotency_key: str | None = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        request_hash = ""
+        if idempotency_key is not None:
+            if not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+                msg = f"Длина ключа должна быть от 1 до {IDEMPOTENCY_KEY_MAX_LENGTH} символов."
+                raise exceptions.ValidationError({IDEMPOTENCY_KEY_HEADER: msg})
+            request_hash = get_request_hash(data)
+            response = await self.replay_create(idempotency_key, request_hash)
+            if response is not None:
+                return response
+
+        serializer = PayoutSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            payout = await sync_to_async(create_payout)(
+                serializer,
+                idempotency_key=idempotency_key,
+                request_hash=request_hash,
+            )
+        except (IntegrityError, DuplicatePayoutError) as exc:
+            response = await self.replay_create(idempotency_key, request_hash) if idempotency_key else None
+            if response is not None:
+                return response
+            if isinstance(exc, DuplicatePayoutError):
+                raise exceptions.ValidationError({"recipient_details": str(exc)})
+            raise
+
+        row = PayoutRowSerializer.get_row(payout)
+        return json_response(PayoutRowSerializer().to_representation(row), status.HTTP_201_CREATED)
+
+    @staticmethod
+    async def replay_create(idempotency_key: str, request_hash: str) -> HttpResponse | None:
+        try:
+            data = await sync_to_async(get_replayed_payout)(idempotency_key, request_hash)
+        except IdempotencyKeyMismatchError as exc:
+            raise exceptions.ValidationError({IDEMPOTENCY_KEY_HEADER: str(exc)})
+
+        if data is None:
+            return None
+        return json_response(data, status.HTTP_201_CREATED, **{"Idempotent-Replayed": "true"})
+
+
+class PayoutDetailAsyncView(AsyncPayoutView):
+    """``/api/payouts/<id>/``: async retrieve, changes are delegated."""
+
+    actions = {"get": "retrieve"}
+
+    async def get(self, request: HttpRequest, id: Any) -> HttpResponse:
+        data = await get_payout_data(id)
+        if data is None:
+            raise Http404(NOT_FOUND_MESSAGE)
+        return json_response(data)
+
+    async def put(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        return await sync_to_async(payout_detail_view)(request, *args, **kwargs)
+
+    async def patch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        return await sync_to_async(payout_detail_view)(request, *args, **kwargs)
+
+    async def delete(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        return await sync_to_async(payout_detail_view)(request, *args, **kwargs)
+
+
+class PayoutStatusAsyncView(AsyncPayoutView):
+    """``/api/payouts/<id>/status/``: status polling from the retrieve cache entry."""
+
+    actions = {"get": "payout_status"}
+
+    async def get(self, request: HttpRequest, id: Any) -> HttpResponse:
+        data = await get_payout_data(id)
+        if data is None:
+            raise Http404(NOT_FOUND_MESSAGE)
+        return json_response({name: data[name] for name in PayoutStatusSerializer.Meta.fields})
+
+
+class PayoutExportAsyncView(AsyncPayoutView):
+    """``/api/payouts/export/``: the delegated export, streamed part by part.
+
+    Django consumes a sync streaming response under ASGI with ``sync_to_async(list)``,
+    i.e. holds the whole export in memory before sending the first byte. The response
+    of PayoutViewSet.export gets an async iterator over the same parts instead.
+    """
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        response = await sync_to_async(payout_export_view)(request, *args, **kwargs)
+        if isinstance(response, StreamingHttpResponse) and not response.is_async:
+            # The generator itself is still closed by response.close(), also on disconnect.
+            response.streaming_content = iterate_in_thread(response.streaming_content)
+        return response
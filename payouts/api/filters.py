@@ -0,0 +1,55 @@
+from typing import Any
+
+from django.db.models import QuerySet
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from payouts.api.serializers import PayoutFilterSerializer
+from payouts.choices import CurrencyChoices, PayoutStatus
+
+FILTER_LOOKUPS = {
+    "status": "status",
+    "currency": "currency",
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lt",
+}
+
+
+class PayoutFilterBackend(BaseFilterBackend):
+    def filter_queryset(self, request: Request, queryset: QuerySet, view: APIView) -> QuerySet:
+        serializer = PayoutFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        lookups = {FILTER_LOOKUPS[name]: value for name, value in serializer.validated_data.items()}
+        return queryset.filter(**lookups)
+
+    def get_schema_operation_parameters(self, view: APIView) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": "status",
+                "in": "query",
+                "required": False,
+                "schema": {"type": "string", "enum": PayoutStatus.values},
+            },
+            {
+                "name": "currency",
+                "in": "query",
+                "required": False,
+                "schema": {"type": "string", "enum": CurrencyChoices.values},
+            },
+            {
+                "name": "created_after",
+                "in": "query",
+                "required": False,
+                "description": "created_at >= значения (ISO 8601)",
+                "schema": {"type": "string", "format": "date-time"},
+            },
+            {
+                "name": "created_before",
+                "in": "query",
+                "required": False,
+                "description": "created_at < значения (ISO 8601)",
+                "schema": {"type": "string", "format": "date-time"},
+            },
+        ]
@@ -0,0 +1,84 @@
+import abc
+import csv
+import io
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+import orjson
+from rest_framework.renderers import BaseRenderer
+
+from core.api.renderers import ORJSONRenderer
+from payouts.api.serializers import PayoutRowSerializer
+
+
+class PayoutExportRenderer(BaseRenderer, abc.ABC):
+    """Renderer for ``/api/payouts/export/``.
+
+    The payouts are written by ``stream`` chunk by chunk into a ``StreamingHttpResponse``;
+    ``render`` is only used for payloads DRF renders itself, i.e. errors.
+    """
+
+    filename = "payouts"
+
+    @abc.abstractmethod
+    def stream(self, chunks: Iterable[list[dict[str, Any]]]) -> Iterator[bytes]: ...
+
+
+class PayoutNDJSONRenderer(PayoutExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: str | None = None,
+        renderer_context: dict[str, Any] | None = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=ORJSONRenderer.default, option=orjson.OPT_APPEND_NEWLINE)
+
+    def stream(self, chunks: Iterable[list[dict[str, Any]]]) -> Iterator[bytes]:
+        for rows in chunks:
+            yield b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+class PayoutCSVRenderer(PayoutExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: str | None = None,
+        renderer_context: dict[str, Any] | None = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        errors = data.get("errors", []) if isinstance(data, dict) else []
+        rows = [(error["field"], error["detail"], error["code"]) for error in errors]
+        return self.write([("field", "detail", "code"), *rows]).encode()
+
+    def stream(self, chunks: Iterable[list[dict[str, Any]]]) -> Iterator[bytes]:
+        fields = PayoutRowSerializer.fields
+        yield self.write([fields]).encode()
+        for rows in chunks:
+            yield self.write([self.get_values(row, fields) for row in rows]).encode()
+
+    @staticmethod
+    def get_values(row: dict[str, Any], fields: Iterable[str]) -> list[Any]:
+        values = []
+        for name in fields:
+            value = row[name]
+            if isinstance(value, dict | list):
+                value = orjson.dumps(value).decode()
+            values.append(value)
+        return values
+
+    @staticmethod
+    def write(rows: Iterable[Iterable[Any]]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
@@ -1,12 +1,55 @@
-import re
+import decimal
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta
 from typing import Any
 
-from rest_framework import serializers
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 
-from payouts.choices import CurrencyChoices, PayoutStatus
-from payouts.constants import FINAL_PAYOUT_STATUSES, MIN_PAYOUT_AMOUNT
-from payouts.models import Payout
+from payouts.choices import CurrencyChoices, PayoutPriority, PayoutStatus
+from payouts.constants import MIN_PAYOUT_AMOUNT, PAYOUT_API_STATUS_TRANSITIONS
+from payouts.models import Payout, PayoutDailyStats
+from payouts.validators import get_recipient_details_error, get_recipient_key, normalize_card_number
+
+
+class PayoutListSerializer(serializers.ListSerializer):
+    """Validates every item on its own.
+
+    Invalid items do not fail the whole list: their errors are kept in ``item_errors``
+    (aligned with the input, ``{}`` for valid items) and only valid items reach ``create``.
+    """
+
+    def to_internal_value(self, data: Any) -> list[dict[str, Any]]:
+        self.item_errors: list[Any] = []
+        validated = super().to_internal_value(data)
+        return [attrs for attrs in validated if attrs is not None]
+
+    def run_child_validation(self, data: Any) -> dict[str, Any] | None:
+        try:
+            validated = super().run_child_validation(data)
+        except ValidationError as exc:
+            self.item_errors.append(exc.detail)
+            return None
+
+        self.item_errors.append({})
+        return validated
+
+    def create(self, validated_data: list[dict[str, Any]]) -> list[Payout]:
+        # Bulk loads go to the BULK lane unless an item asks for another priority.
+        # bulk_create skips Payout.save, which fills recipient_key.
+        return Payout.objects.bulk_create(
+            [
+                Payout(
+                    **{"priority": PayoutPriority.BULK, **attrs},
+                    recipient_key=get_recipient_key(attrs["recipient_details"]),
+                )
+                for attrs in validated_data
+            ],
+            batch_size=settings.PAYOUT_BULK_CREATE_BATCH_SIZE,
+        )
 
 
 class PayoutSerializer(serializers.ModelSerializer):
@@ -36,6 +79,12 @@ class PayoutSerializer(serializers.ModelSerializer):
 
     status = serializers.ChoiceField(choices=PayoutStatus.choices, read_only=True)
 
+    priority = serializers.ChoiceField(
+        choices=PayoutPriority.choices,
+        required=False,
+        help_text="По умолчанию normal, для массовой загрузки bulk",
+    )
+
     class Meta:
         model = Payout
         fields = (
@@ -45,27 +94,99 @@ class PayoutSerializer(serializers.ModelSerializer):
             "recipient_details",
             "status",
             "comment",
+            "priority",
             "created_at",
             "updated_at",
         )
         read_only_fields = ("id", "created_at", "updated_at")
+        list_serializer_class = PayoutListSerializer
 
     def validate_recipient_details(self, value: dict[str, Any]) -> dict[str, Any]:
-        if not isinstance(value, dict):
-            msg = "Реквизиты должны быть JSON-объектом."
-            raise serializers.ValidationError(msg)
+        error = get_recipient_details_error(value)
+        if error is not None:
+            raise serializers.ValidationError(error)
+        return value
 
-        card_number: Any = value.get("card_number")
-        if not card_number:
-            raise serializers.ValidationError({"card_number": "Номер карты обязателен."})
 
-        clean_card: str = str(card_number).replace(" ", "")
-        if not re.fullmatch(r"\d{16}", clean_card):
-            raise serializers.ValidationError(
-                {"card_number": "Номер карты должен состоять из 16 цифр."},
-            )
+class PayoutRowSerializer:
+    """Read-only counterpart of PayoutSerializer for ``QuerySet.values(*fields)`` rows.
 
-        return value
+    Produces exactly the same representation, but skips model instantiation and
+    per-field DRF dispatch: formatting rules are taken from PayoutSerializer fields
+    once and applied in a single pass over the rows.
+    """
+
+    fields = PayoutSerializer.Meta.fields
+
+    def __init__(self) -> None:
+        serializer_fields = PayoutSerializer().fields
+        amount_field: serializers.DecimalField = serializer_fields["amount"]
+
+        self.amount_exponent = decimal.Decimal(".1") ** amount_field.decimal_places
+        self.amount_context = decimal.getcontext().copy()
+        self.amount_context.prec = amount_field.max_digits
+        self.amount_rounding = amount_field.rounding
+        self.currency_choices = serializer_fields["currency"].choice_strings_to_values
+        self.status_choices = serializer_fields["status"].choice_strings_to_values
+        self.priority_choices = serializer_fields["priority"].choice_strings_to_values
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        return self.to_representation_many([row])[0]
+
+    def to_representation_many(self, rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        format_amount = self.format_amount
+        format_datetime = self.get_datetime_formatter()
+        currency_choices = self.currency_choices
+        status_choices = self.status_choices
+        priority_choices = self.priority_choices
+
+        return [
+            {
+                "id": str(row["id"]),
+                "amount": format_amount(row["amount"]),
+                "currency": currency_choices.get(row["currency"], row["currency"]),
+                "recipient_details": row["recipient_details"],
+                "status": status_choices.get(row["status"], row["status"]),
+                "comment": None if row["comment"] is None else str(row["comment"]),
+                "priority": priority_choices.get(row["priority"], row["priority"]),
+                "created_at": format_datetime(row["created_at"]),
+                "updated_at": format_datetime(row["updated_at"]),
+            }
+            for row in rows
+        ]
+
+    def format_amount(self, value: decimal.Decimal | None) -> str | None:
+        if value is None:
+            return None
+        return f"{value.quantize(self.amount_exponent, rounding=self.amount_rounding, context=self.amount_context):f}"
+
+    @staticmethod
+    def get_datetime_formatter() -> Callable[[datetime | None], str | None]:
+        output_format: str = api_settings.DATETIME_FORMAT
+        current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+
+        def format_datetime(value: datetime | None) -> str | None:
+            if not value:
+                return None
+            if current_timezone is not None:
+                value = value.astimezone(current_timezone)
+            if output_format.lower() == ISO_8601:
+                iso_value = value.isoformat()
+                return iso_value[:-6] + "Z" if iso_value.endswith("+00:00") else iso_value
+            return value.strftime(output_format)
+
+        return format_datetime
+
+    @classmethod
+    def get_row(cls, instance: Payout) -> dict[str, Any]:
+        return {name: getattr(instance, name) for name in cls.fields}
+
+
+class PayoutStatusSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payout
+        fields = ("id", "status", "updated_at")
+        read_only_fields = fields
 
 
 class PayoutStatusUpdateSerializer(serializers.ModelSerializer):
@@ -73,9 +194,66 @@ class PayoutStatusUpdateSerializer(serializers.ModelSerializer):
         model = Payout
         fields = ("status",)
 
+    def update(self, instance: Payout, validated_data: dict[str, Any]) -> Payout:
+        status: str | None = validated_data.get("status")
+        if status is None:
+            return instance
+
+        # Checked against the current status, then applied with the compare-and-swap of
+        # Payout.transition: a worker may take the payout in between.
+        allowed = PAYOUT_API_STATUS_TRANSITIONS.get(instance.status, ())
+        if status not in allowed or not instance.transition(status):
+            raise ValidationError(f"Cannot change status. Payout {instance.id} cannot move to '{status}'.")
+        return instance
+
+
+class PayoutFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=PayoutStatus.choices, required=False)
+    currency = serializers.ChoiceField(choices=CurrencyChoices.choices, required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
     def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
-        instance: Payout = self.instance
+        created_after = attrs.get("created_after")
+        created_before = attrs.get("created_before")
 
-        if instance.status in FINAL_PAYOUT_STATUSES:
-            raise ValidationError(f"Cannot change status. Payout {instance.id} is already '{instance.status}'.")
+        if created_after and created_before and created_after >= created_before:
+            raise ValidationError("created_after must be earlier than created_before.")
         return attrs
+
+
+class PayoutRecipientFilterSerializer(serializers.Serializer):
+    card_number = serializers.CharField(help_text="Номер карты получателя, пробелы допускаются")
+
+    def validate_card_number(self, value: str) -> str:
+        error = get_recipient_details_error({"card_number": value})
+        if error is not None:
+            raise serializers.ValidationError(error["card_number"])
+        return normalize_card_number(value)
+
+
+class PayoutStatsFilterSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False, help_text="По умолчанию PAYOUT_STATS_DEFAULT_DAYS дней назад")
+    date_to = serializers.DateField(required=False, help_text="Включительно, по умолчанию сегодня")
+    status = serializers.ChoiceField(choices=PayoutStatus.choices, required=False)
+    currency = serializers.ChoiceField(choices=CurrencyChoices.choices, required=False)
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        attrs.setdefault("date_to", timezone.localdate())
+        attrs.setdefault("date_from", attrs["date_to"] - timedelta(days=settings.PAYOUT_STATS_DEFAULT_DAYS - 1))
+
+        if attrs["date_from"] > attrs["date_to"]:
+            raise ValidationError("date_from must not be later than date_to.")
+        return attrs
+
+
+class PayoutDailyStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PayoutDailyStats
+        fields = ("day", "currency", "status", "count", "amount")
+        read_only_fields = fields
+
+
+class PayoutStatsSerializer(serializers.Serializer):
+    results = PayoutDailyStatsSerializer(many=True)
+    refreshed_at = serializers.DateTimeField(allow_null=True, help_text="Время последнего пересчёта статистики")
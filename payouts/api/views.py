@@ -1,18 +1,121 @@
 import logging
+from collections.abc import Iterator
+from itertools import islice
 from typing import Any
 
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
+from django.http import Http404, StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from payouts.api.serializers import PayoutSerializer, PayoutStatusUpdateSerializer
-from payouts.models import Payout
-from payouts.tasks import process_payout_task
+from core.api.exception_handler import format_error_detail
+from core.metrics import RequestMetrics, RequestMetricsMixin
+from core.tracing import tracer
+from payouts.api.filters import PayoutFilterBackend
+from payouts.api.renderers import PayoutCSVRenderer, PayoutExportRenderer, PayoutNDJSONRenderer
+from payouts.api.serializers import (
+    PayoutRowSerializer,
+    PayoutRecipientFilterSerializer,
+    PayoutSerializer,
+    PayoutStatsFilterSerializer,
+    PayoutStatsSerializer,
+    PayoutStatusSerializer,
+    PayoutStatusUpdateSerializer,
+)
+from payouts.cache import add_cached_payout, cache_payouts, get_cached_payout, invalidate_payouts
+from payouts.constants import IDEMPOTENCY_KEY_HEADER, IDEMPOTENCY_KEY_MAX_LENGTH
+from payouts.dispatch import dispatch_payout, dispatch_payouts
+from payouts.exceptions import DuplicatePayoutError, IdempotencyKeyMismatchError
+from payouts.idempotency import find_payout_id, forget_idempotency_key, get_request_hash, save_idempotency_key
+from payouts.models import ArchivedPayout, Payout, PayoutHistory
+from payouts.recipients import check_duplicate_payout
+from payouts.stats import get_payout_stats, get_stats_refreshed_at
+from payouts.validators import get_recipient_key
 
 logger = logging.getLogger(__name__)
 
 
-class PayoutViewSet(viewsets.ModelViewSet):
+def iter_export_chunks(queryset: QuerySet, chunk_size: int) -> Iterator[list[dict[str, Any]]]:
+    """Reads rows through a server-side cursor and serializes them ``chunk_size`` at a time.
+
+    The cursor is read inside a transaction: outside of one Django declares it WITH HOLD,
+    and PostgreSQL materializes the whole result before returning the first row.
+    """
+    serializer = PayoutRowSerializer()
+    with transaction.atomic():
+        rows = queryset.values(*PayoutRowSerializer.fields).iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            yield serializer.to_representation_many(chunk)
+
+
+def create_payout(
+    serializer: PayoutSerializer,
+    idempotency_key: str | None = None,
+    request_hash: str = "",
+) -> Payout:
+    """Saves a validated payout together with its idempotency key and outbox message.
+
+    Starts the trace that processing of the payout continues. Raises DuplicatePayoutError
+    if the payout repeats a recent one, see check_duplicate_payout.
+    """
+    attrs = serializer.validated_data
+    recipient_key = get_recipient_key(attrs["recipient_details"])
+    with tracer.start_as_current_span("payout create") as span, transaction.atomic():
+        check_duplicate_payout(recipient_key, attrs["amount"], attrs["currency"])
+        instance: Payout = serializer.save()
+        span.set_attribute("payout.id", str(instance.id))
+        if idempotency_key is not None:
+            save_idempotency_key(idempotency_key, instance, request_hash)
+        dispatch_payout(instance)
+    logger.info("Payout %s created. Status: %s", instance.id, instance.status)
+    return instance
+
+
+def get_replayed_payout(idempotency_key: str, request_hash: str) -> dict[str, Any] | None:
+    """Returns the payout created earlier with ``idempotency_key``, ``None`` if there is none.
+
+    Raises IdempotencyKeyMismatchError if the key was used with another request body.
+    """
+    payout_id = find_payout_id(idempotency_key, request_hash)
+    if payout_id is None:
+        return None
+
+    data = get_cached_payout(payout_id)
+    if data is None:
+        row = Payout.objects.filter(id=payout_id).values(*PayoutRowSerializer.fields).first()
+        if row is None:
+            forget_idempotency_key(idempotency_key)
+            return None
+        data = PayoutRowSerializer().to_representation(row)
+
+    logger.info("Payout %s returned for replayed %s %s", payout_id, IDEMPOTENCY_KEY_HEADER, idempotency_key)
+    return data
+
+
+PAYOUT_ACTIONS = (
+    "list",
+    "create",
+    "bulk",
+    "export",
+    "stats",
+    "recipient",
+    "retrieve",
+    "payout_status",
+    "update",
+    "partial_update",
+    "destroy",
+)
+
+
+class PayoutViewSet(RequestMetricsMixin, viewsets.ModelViewSet):
     queryset = Payout.objects.all()
     serializer_class = PayoutSerializer
     actions_serializers = {
@@ -20,21 +123,220 @@ class PayoutViewSet(viewsets.ModelViewSet):
         "update": PayoutStatusUpdateSerializer,
     }
     lookup_field = "id"
+    filter_backends = (PayoutFilterBackend,)
+    request_metrics = RequestMetrics("payouts", PAYOUT_ACTIONS)
 
     def get_serializer_class(self):
         return self.actions_serializers.get(self.action, self.serializer_class)
 
-    def perform_create(self, serializer: PayoutSerializer) -> None:
-        instance = serializer.save()
-        logger.info("Payout %s created. Status: %s", instance.id, instance.status)
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                IDEMPOTENCY_KEY_HEADER,
+                str,
+                OpenApiParameter.HEADER,
+                description="Повтор запроса с тем же ключом вернёт ранее созданную выплату",
+            ),
+        ],
+    )
+    def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        idempotency_key: str | None = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if idempotency_key is None:
+            try:
+                return super().create(request, *args, **kwargs)
+            except DuplicatePayoutError as exc:
+                raise ValidationError({"recipient_details": str(exc)})
+
+        if not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            msg = f"Длина ключа должна быть от 1 до {IDEMPOTENCY_KEY_MAX_LENGTH} символов."
+            raise ValidationError({IDEMPOTENCY_KEY_HEADER: msg})
+
+        request_hash = get_request_hash(request.data)
+        response = self.replay_create(idempotency_key, request_hash)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         try:
-            process_payout_task.delay(str(instance.id))
-            logger.info("Payout %s sent to Celery worker.", instance.id)
-        except Exception:
-            logger.exception("Could not queue Payout %s", instance.id)
+            self.perform_create(serializer, idempotency_key=idempotency_key, request_hash=request_hash)
+        except (IntegrityError, DuplicatePayoutError) as exc:
+            # A concurrent request with the same key may have created the payout first.
+            response = self.replay_create(idempotency_key, request_hash)
+            if response is not None:
+                return response
+            if isinstance(exc, DuplicatePayoutError):
+                raise ValidationError({"recipient_details": str(exc)})
+            raise
+
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def replay_create(self, idempotency_key: str, request_hash: str) -> Response | None:
+        try:
+            data = get_replayed_payout(idempotency_key, request_hash)
+        except IdempotencyKeyMismatchError as exc:
+            raise ValidationError({IDEMPOTENCY_KEY_HEADER: str(exc)})
+
+        if data is None:
+            return None
+        return Response(data, status=status.HTTP_201_CREATED, headers={"Idempotent-Replayed": "true"})
+
+    def perform_create(
+        self,
+        serializer: PayoutSerializer,
+        idempotency_key: str | None = None,
+        request_hash: str = "",
+    ) -> None:
+        create_payout(serializer, idempotency_key=idempotency_key, request_hash=request_hash)
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request: Request) -> Response:
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.PAYOUT_BULK_MAX_SIZE,
+        )
+        serializer.is_valid(raise_exception=True)
+
+        with tracer.start_as_current_span("payout bulk create") as span, transaction.atomic():
+            payouts: list[Payout] = serializer.save()
+            span.set_attribute("payout.count", len(payouts))
+            dispatch_payouts(payouts)
+
+        logger.info("Bulk created %s payouts, %s rejected.", len(payouts), len(serializer.item_errors) - len(payouts))
+
+        errors: list[dict[str, Any]] = []
+        for index, detail in enumerate(serializer.item_errors):
+            if detail:
+                errors.extend(
+                    format_error_detail(
+                        detail,
+                        status.HTTP_400_BAD_REQUEST,
+                        ValidationError(detail),
+                        pointer_prefix=f"/data/{index}",
+                    ),
+                )
+
+        return Response(
+            data={"results": serializer.data, "errors": errors},
+            status=status.HTTP_201_CREATED if payouts else status.HTTP_400_BAD_REQUEST,
+        )
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return self.list_rows(self.filter_queryset(self.get_history_queryset()))
+
+    @extend_schema(request=PayoutRecipientFilterSerializer, responses=PayoutSerializer(many=True))
+    @action(detail=False, methods=["post"], url_path="recipient")
+    def recipient(self, request: Request) -> Response:
+        """Payouts to a card, newest first, found by its recipient_key instead of scanning recipient details.
+
+        A POST with the card number in the body: query strings end up in access logs.
+        Filters and the page cursor stay in the query string, as in the list.
+        """
+        serializer = PayoutRecipientFilterSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipient_key = get_recipient_key(serializer.validated_data)
+        return self.list_rows(self.filter_queryset(self.get_history_queryset()).filter(recipient_key=recipient_key))
+
+    @staticmethod
+    def get_history_queryset() -> QuerySet:
+        """Payouts to list and export: live and archived ones (PayoutHistory)."""
+        return PayoutHistory.objects.all()
+
+    def list_rows(self, queryset: QuerySet) -> Response:
+        """Reads plain rows and formats them with PayoutRowSerializer, skipping model instances."""
+        queryset = queryset.values(*PayoutRowSerializer.fields)
+
+        page = self.paginate_queryset(queryset)
+        data = PayoutRowSerializer().to_representation_many(queryset if page is None else page)
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    @extend_schema(
+        responses={
+            (status.HTTP_200_OK, PayoutNDJSONRenderer.media_type): PayoutSerializer,
+            (status.HTTP_200_OK, PayoutCSVRenderer.media_type): OpenApiTypes.STR,
+        },
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=(PayoutNDJSONRenderer, PayoutCSVRenderer),
+        pagination_class=None,
+    )
+    def export(self, request: Request) -> StreamingHttpResponse:
+        """Streams every payout matching the filters as NDJSON (default) or CSV (``?format=csv``)."""
+        queryset = self.filter_queryset(self.get_history_queryset())
+        renderer: PayoutExportRenderer = request.accepted_renderer
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+
+        response = StreamingHttpResponse(
+            renderer.stream(iter_export_chunks(queryset, settings.PAYOUT_EXPORT_CHUNK_SIZE)),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="{renderer.filename}.{renderer.format}"'
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @extend_schema(parameters=[PayoutStatsFilterSerializer], responses=PayoutStatsSerializer)
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="stats",
+        serializer_class=PayoutStatsSerializer,
+        filter_backends=(),
+        pagination_class=None,
+    )
+    def stats(self, request: Request) -> Response:
+        """Payout counts and amounts per day, currency and status, read from the daily rollups.
+
+        Reads one row per day and combination instead of the payouts themselves; the
+        rollups lag behind the payouts by up to PAYOUT_STATS_REFRESH_INTERVAL.
+        """
+        filters = PayoutStatsFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        serializer = self.get_serializer(
+            {"results": get_payout_stats(**filters.validated_data), "refreshed_at": get_stats_refreshed_at()},
+        )
+        return Response(serializer.data)
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return Response(self.get_payout_data(kwargs[self.lookup_field]))
+
+    @action(detail=True, methods=["get"], url_path="status", serializer_class=PayoutStatusSerializer)
+    def payout_status(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Lightweight status polling, served from the same cache entry as retrieve."""
+        data = self.get_payout_data(kwargs[self.lookup_field])
+        return Response({name: data[name] for name in PayoutStatusSerializer.Meta.fields})
+
+    def get_payout_data(self, payout_id: Any) -> dict[str, Any]:
+        """Cached payout data; payouts moved to the archive (see payouts.archive) are found there."""
+        data = get_cached_payout(payout_id)
+        if data is None:
+            lookup = {self.lookup_field: payout_id}
+            queryset = self.filter_queryset(self.get_queryset()).values(*PayoutRowSerializer.fields)
+            archived = self.filter_queryset(ArchivedPayout.objects.all()).values(*PayoutRowSerializer.fields)
+            try:
+                row = get_object_or_404(queryset, **lookup)
+            except Http404 as exc:
+                try:
+                    row = get_object_or_404(archived, **lookup)
+                except Http404:
+                    raise exc from None
+            data = PayoutRowSerializer().to_representation(row)
+            add_cached_payout(row["id"], data)
+        return data
 
     def perform_update(self, serializer: PayoutStatusUpdateSerializer):
         instance = serializer.save()
+        cache_payouts([instance])
         logger.info("Payout %s status updated to: %s", instance.id, instance.status)
 
     def destroy(self, request: Request, *_args: Any, **_kwargs: Any) -> Response:
@@ -42,6 +344,7 @@ class PayoutViewSet(viewsets.ModelViewSet):
         payout_id = instance.id
         logger.info("User %s is deleting Payout %s", request.user, payout_id)
         self.perform_destroy(instance)
+        invalidate_payouts([payout_id])
         return Response(
             data={"message": f"Payout {payout_id} successfully deleted"},
             status=status.HTTP_204_NO_CONTENT,
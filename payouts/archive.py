@@ -0,0 +1,151 @@
+"""Archive of finalized payouts: ArchivedPayout, a table range-partitioned by month.
+
+Payouts in FINAL_PAYOUT_STATUSES never change again but make up most of the payout
+table, and every index used by PENDING/PROCESSING queries grows with them.
+``archive_payouts`` moves them out in batches once they are PAYOUT_ARCHIVE_AFTER old,
+each batch with one DELETE ... RETURNING feeding an INSERT. Monthly partitions of the
+archive are created as rows arrive; ``detach_archive_partitions`` detaches old ones,
+which keeps them as plain tables to back up or drop.
+"""
+
+import logging
+from datetime import UTC, date, datetime, time
+
+from django.db import connection, transaction
+from django.db.models import Min
+
+from payouts.constants import FINAL_PAYOUT_STATUSES
+from payouts.exceptions import ArchivePartitionError
+from payouts.models import ArchivedPayout, IdempotencyKey, Payout
+
+logger = logging.getLogger(__name__)
+
+# Columns copied from payouts to the archive; archived_at takes its default.
+ARCHIVE_FIELDS = (
+    "id",
+    "amount",
+    "currency",
+    "recipient_details",
+    "recipient_key",
+    "status",
+    "comment",
+    "priority",
+    "created_at",
+    "updated_at",
+)
+
+
+def get_month_start(day: date) -> datetime:
+    return datetime.combine(day.replace(day=1), time.min, tzinfo=UTC)
+
+
+def get_next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def get_partition_name(month: datetime) -> str:
+    return f"{ArchivedPayout._meta.db_table}_{month:%Y%m}"
+
+
+def create_archive_partitions(first: datetime, last: datetime) -> None:
+    """Create missing monthly partitions for ``created_at`` from ``first`` to ``last``.
+
+    Raises ArchivePartitionError if a month has no partition but a table of its name
+    exists, i.e. a detached partition: the month cannot be archived again until that
+    table is attached back or dropped.
+    """
+    quote_name = connection.ops.quote_name
+    attached = set(get_archive_partitions())
+    month = get_month_start(first.astimezone(UTC).date())
+    with connection.cursor() as cursor:
+        while month <= last:
+            next_month = get_next_month(month)
+            name = get_partition_name(month)
+            if name not in attached:
+                cursor.execute("SELECT to_regclass(%s)", [name])
+                if cursor.fetchone()[0] is not None:
+                    msg = f"Table {name} exists but is not a partition of the archive: it was detached"
+                    raise ArchivePartitionError(msg)
+                # Bounds are literals: DDL takes no query parameters.
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {quote_name(name)} "
+                    f"PARTITION OF {quote_name(ArchivedPayout._meta.db_table)} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')",
+                )
+            month = next_month
+
+
+def get_move_sql() -> str:
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(quote_name(Payout._meta.get_field(name).column) for name in ARCHIVE_FIELDS)
+    payout_table = quote_name(Payout._meta.db_table)
+    # The payout foreign key of idempotency keys is checked at commit: keys of moved
+    # payouts, normally purged long before, are deleted by the same statement.
+    return (
+        f"WITH moved AS ("
+        f"DELETE FROM {payout_table} WHERE id IN ("
+        f"SELECT id FROM {payout_table} WHERE status = ANY(%s) AND created_at < %s "
+        f"ORDER BY created_at LIMIT %s FOR UPDATE SKIP LOCKED"
+        f") RETURNING {columns}"
+        f"), keys AS ("
+        f"DELETE FROM {quote_name(IdempotencyKey._meta.db_table)} "
+        f"WHERE {quote_name(IdempotencyKey._meta.get_field('payout').column)} IN (SELECT id FROM moved)"
+        f") "
+        f"INSERT INTO {quote_name(ArchivedPayout._meta.db_table)} ({columns}) SELECT {columns} FROM moved"
+    )
+
+
+def archive_payouts(created_before: datetime, batch_size: int) -> int:
+    """Move finalized payouts created before ``created_before`` to the archive.
+
+    Every batch is a transaction of its own, so locks are held briefly and an interrupted
+    run keeps the batches already moved. Returns the number of moved payouts.
+    """
+    oldest = Payout.objects.filter(status__in=FINAL_PAYOUT_STATUSES, created_at__lt=created_before).aggregate(
+        Min("created_at"),
+    )["created_at__min"]
+    if oldest is None:
+        return 0
+
+    create_archive_partitions(oldest, created_before)
+    sql = get_move_sql()
+    moved = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [list(FINAL_PAYOUT_STATUSES), created_before, batch_size])
+            batch = cursor.rowcount
+        moved += batch
+        if batch < batch_size:
+            break
+
+    logger.info("%s payouts created before %s archived", moved, created_before)
+    return moved
+
+
+def get_archive_partitions() -> list[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass ORDER BY child.relname",
+            [ArchivedPayout._meta.db_table],
+        )
+        return [name for (name,) in cursor.fetchall()]
+
+
+def detach_archive_partitions(created_before: datetime) -> list[str]:
+    """Detach partitions of months that end by ``created_before``; returns their names."""
+    detached: list[str] = []
+    quote_name = connection.ops.quote_name
+    for name in get_archive_partitions():
+        month = get_month_start(datetime.strptime(name.rpartition("_")[2], "%Y%m").date())
+        if get_next_month(month) > created_before:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {quote_name(ArchivedPayout._meta.db_table)} DETACH PARTITION {quote_name(name)}",
+            )
+        detached.append(name)
+
+    logger.info("Archive partitions detached: %s", ", ".join(detached) or "none")
+    return detached
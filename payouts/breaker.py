@@ -0,0 +1,237 @@
+"""Circuit breaker on gateway calls shared by all workers.
+
+Closed: calls go through and gateway timeouts are counted in a window of
+PAYOUT_GATEWAY_BREAKER_WINDOW seconds. Once at least PAYOUT_GATEWAY_BREAKER_MIN_CALLS
+calls were made in the window and PAYOUT_GATEWAY_BREAKER_FAILURE_RATE of them timed
+out, the circuit opens.
+
+Open: calls fail fast with GatewayUnavailableError for PAYOUT_GATEWAY_BREAKER_OPEN_TIMEOUT
+seconds, instead of waiting for the gateway to time out.
+
+Half-open: then a single call is let through as a probe. Its success closes the circuit,
+its timeout opens it again. A probe that does not report back within
+PAYOUT_GATEWAY_BREAKER_PROBE_TIMEOUT is given up and another call probes.
+
+With PAYOUT_GATEWAY_BREAKER_URL the state lives in Redis and is shared by the whole
+cluster; without it every process has its own in-memory breaker.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from typing import Protocol
+
+import redis
+from django.conf import settings
+
+from payouts.exceptions import GatewayTimeoutError, GatewayUnavailableError
+from payouts.metrics import REJECTED_CIRCUIT_OPEN, count_gateway_rejection
+
+logger = logging.getLogger(__name__)
+
+OPEN_KEY = "payouts:breaker:open"
+TRIPPED_KEY = "payouts:breaker:tripped"
+PROBE_KEY = "payouts:breaker:probe"
+WINDOW_KEY = "payouts:breaker:window"
+
+# KEYS: open, tripped, probe. ARGV: token, probe timeout (ms).
+ALLOW_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return 1
+end
+if redis.call('SET', KEYS[3], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+# KEYS: open, tripped, probe, window. ARGV: "1" if the call timed out, window (s),
+# min calls, failure rate, open timeout (ms). Returns 1 if the circuit is open afterwards.
+RECORD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 1
+end
+local failed = ARGV[1] == '1'
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('DEL', KEYS[3])
+    if failed then
+        redis.call('SET', KEYS[1], '1', 'PX', ARGV[5])
+        return 1
+    end
+    redis.call('DEL', KEYS[2], KEYS[4])
+    return 0
+end
+local calls = redis.call('HINCRBY', KEYS[4], 'calls', 1)
+if calls == 1 then
+    redis.call('EXPIRE', KEYS[4], ARGV[2])
+end
+local failures = redis.call('HINCRBY', KEYS[4], 'failures', failed and 1 or 0)
+if calls >= tonumber(ARGV[3]) and failures / calls >= tonumber(ARGV[4]) then
+    redis.call('SET', KEYS[1], '1', 'PX', ARGV[5])
+    redis.call('SET', KEYS[2], '1')
+    redis.call('DEL', KEYS[4])
+    return 1
+end
+return 0
+"""
+
+# KEYS: probe. ARGV: token.
+DISCARD_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class CircuitBreaker(Protocol):
+    def allow(self) -> str | None:
+        """Returns a token if a call may go to the gateway, ``None`` while the circuit is open."""
+
+    def record(self, token: str, failed: bool) -> bool:
+        """Count the outcome of an allowed call; returns whether the circuit is open now."""
+
+    def discard(self, token: str) -> None:
+        """Forget an allowed call that did not reach the gateway."""
+
+
+class LocalCircuitBreaker:
+    """In-memory breaker: shared by the threads and event loops of one process only."""
+
+    def __init__(self) -> None:
+        self.open_until = float("-inf")
+        self.tripped = False
+        self.probe: str | None = None
+        self.probe_until = float("-inf")
+        self.window_until = float("-inf")
+        self.calls = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def allow(self) -> str | None:
+        now = time.monotonic()
+        token = uuid.uuid4().hex
+        with self.lock:
+            if now < self.open_until:
+                return None
+            if not self.tripped:
+                return token
+            if self.probe is not None and now < self.probe_until:
+                return None
+
+            self.probe = token
+            self.probe_until = now + settings.PAYOUT_GATEWAY_BREAKER_PROBE_TIMEOUT
+            return token
+
+    def record(self, token: str, failed: bool) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            if now < self.open_until:
+                return True
+
+            if self.tripped:
+                self.probe = None
+                if failed:
+                    self.open_until = now + settings.PAYOUT_GATEWAY_BREAKER_OPEN_TIMEOUT
+                    return True
+                self.tripped = False
+                self.calls = self.failures = 0
+                return False
+
+            if now >= self.window_until:
+                self.window_until = now + settings.PAYOUT_GATEWAY_BREAKER_WINDOW
+                self.calls = self.failures = 0
+            self.calls += 1
+            self.failures += failed
+            if (
+                self.calls >= settings.PAYOUT_GATEWAY_BREAKER_MIN_CALLS
+                and self.failures / self.calls >= settings.PAYOUT_GATEWAY_BREAKER_FAILURE_RATE
+            ):
+                self.open_until = now + settings.PAYOUT_GATEWAY_BREAKER_OPEN_TIMEOUT
+                self.tripped = True
+                self.window_until = float("-inf")
+                return True
+            return False
+
+    def discard(self, token: str) -> None:
+        with self.lock:
+            if self.probe == token:
+                self.probe = None
+
+
+class RedisCircuitBreaker:
+    """Cluster-wide breaker: the state is a few keys changed by Lua scripts.
+
+    The open state is a key expiring after the open timeout, the half-open probe a key
+    expiring after the probe timeout, so no worker has to switch states on schedule.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.client = redis.Redis.from_url(url)
+        self.allow_script = self.client.register_script(ALLOW_SCRIPT)
+        self.record_script = self.client.register_script(RECORD_SCRIPT)
+        self.discard_script = self.client.register_script(DISCARD_SCRIPT)
+
+    def allow(self) -> str | None:
+        token = uuid.uuid4().hex
+        allowed = self.allow_script(
+            keys=[OPEN_KEY, TRIPPED_KEY, PROBE_KEY],
+            args=[token, int(settings.PAYOUT_GATEWAY_BREAKER_PROBE_TIMEOUT * 1000)],
+        )
+        return token if allowed else None
+
+    def record(self, token: str, failed: bool) -> bool:
+        is_open = self.record_script(
+            keys=[OPEN_KEY, TRIPPED_KEY, PROBE_KEY, WINDOW_KEY],
+            args=[
+                int(failed),
+                settings.PAYOUT_GATEWAY_BREAKER_WINDOW,
+                settings.PAYOUT_GATEWAY_BREAKER_MIN_CALLS,
+                settings.PAYOUT_GATEWAY_BREAKER_FAILURE_RATE,
+                int(settings.PAYOUT_GATEWAY_BREAKER_OPEN_TIMEOUT * 1000),
+            ],
+        )
+        return bool(is_open)
+
+    def discard(self, token: str) -> None:
+        self.discard_script(keys=[PROBE_KEY], args=[token])
+
+
+@cache
+def get_circuit_breaker() -> CircuitBreaker:
+    if settings.PAYOUT_GATEWAY_BREAKER_URL:
+        return RedisCircuitBreaker(settings.PAYOUT_GATEWAY_BREAKER_URL)
+    return LocalCircuitBreaker()
+
+
+@contextmanager
+def gateway_circuit() -> Iterator[None]:
+    """Let the block call the gateway only while the circuit is not open.
+
+    Raises GatewayUnavailableError right away if it is. Makes no I/O besides one short
+    script run, so it is used as is in async code too.
+    """
+    breaker = get_circuit_breaker()
+    token = breaker.allow()
+    if token is None:
+        count_gateway_rejection(REJECTED_CIRCUIT_OPEN)
+        msg = "Gateway unavailable: circuit breaker is open"
+        raise GatewayUnavailableError(msg)
+
+    try:
+        yield
+    except GatewayTimeoutError:
+        if breaker.record(token, failed=True):
+            logger.warning("Gateway circuit breaker is open")
+        raise
+    except BaseException:
+        breaker.discard(token)
+        raise
+    breaker.record(token, failed=False)
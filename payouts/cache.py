@@ -0,0 +1,48 @@
+from collections.abc import Iterable
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from payouts.api.serializers import PayoutRowSerializer
+from payouts.models import Payout
+
+
+def get_cached_payout(payout_id: Any) -> dict[str, Any] | None:
+    return cache.get(_cache_key(payout_id))
+
+
+def add_cached_payout(payout_id: Any, data: dict[str, Any]) -> None:
+    """Populate the cache after a read.
+
+    ``add`` never overwrites: if a writer stored a newer state in the meantime,
+    the data read before that write is dropped.
+    """
+    cache.add(_cache_key(payout_id), dict(data), timeout=settings.PAYOUT_CACHE_TIMEOUT)
+
+
+async def aget_cached_payout(payout_id: Any) -> dict[str, Any] | None:
+    return await cache.aget(_cache_key(payout_id))
+
+
+async def aadd_cached_payout(payout_id: Any, data: dict[str, Any]) -> None:
+    await cache.aadd(_cache_key(payout_id), dict(data), timeout=settings.PAYOUT_CACHE_TIMEOUT)
+
+
+def cache_payouts(payouts: Iterable[Payout]) -> None:
+    """Store the current state of changed payouts once the transaction commits."""
+    rows = [PayoutRowSerializer.get_row(payout) for payout in payouts]
+    entries = {_cache_key(row["id"]): row for row in PayoutRowSerializer().to_representation_many(rows)}
+    if entries:
+        transaction.on_commit(lambda: cache.set_many(entries, timeout=settings.PAYOUT_CACHE_TIMEOUT))
+
+
+def invalidate_payouts(payout_ids: Iterable[Any]) -> None:
+    keys = [_cache_key(payout_id) for payout_id in payout_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _cache_key(payout_id: Any) -> str:
+    return f"payouts:payout:{payout_id}"
@@ -14,3 +14,9 @@ class CurrencyChoices(models.TextChoices):
     RUB = "RUB", _("Российский рубль")
     USD = "USD", _("Доллар США")
     EUR = "EUR", _("Евро")
+
+
+class PayoutPriority(models.TextChoices):
+    URGENT = "urgent", _("Срочная")
+    NORMAL = "normal", _("Обычная")
+    BULK = "bulk", _("Массовая")
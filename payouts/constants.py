@@ -1,15 +1,74 @@
 from decimal import Decimal
 
-from payouts.choices import PayoutStatus
+from payouts.choices import CurrencyChoices, PayoutPriority, PayoutStatus
 
 MIN_PAYOUT_AMOUNT = Decimal("0.01")
 
+ACTIVE_PAYOUT_STATUSES = (
+    PayoutStatus.PENDING,
+    PayoutStatus.PROCESSING,
+)
+
 FINAL_PAYOUT_STATUSES = (
     PayoutStatus.SUCCESS,
     PayoutStatus.FAILED,
     PayoutStatus.CANCELED,
 )
 
+# Allowed status changes: current status -> statuses it may move to. A PROCESSING payout
+# may already be paid by the gateway: only the worker that claimed it decides its outcome.
+PAYOUT_STATUS_TRANSITIONS: dict[str, tuple[str, ...]] = {
+    PayoutStatus.PENDING: (PayoutStatus.PROCESSING, PayoutStatus.CANCELED),
+    PayoutStatus.PROCESSING: (
+        PayoutStatus.PENDING,
+        PayoutStatus.SUCCESS,
+        PayoutStatus.FAILED,
+    ),
+    PayoutStatus.SUCCESS: (),
+    PayoutStatus.FAILED: (),
+    PayoutStatus.CANCELED: (),
+}
+
+# The same table by target status: status -> statuses it may be reached from.
+PAYOUT_STATUS_SOURCES: dict[str, tuple[str, ...]] = {
+    target: tuple(source for source, targets in PAYOUT_STATUS_TRANSITIONS.items() if target in targets)
+    for target in PayoutStatus
+}
+
+# Status changes clients may request through the API: canceling a payout no worker has taken.
+# The other transitions belong to the workers.
+PAYOUT_API_STATUS_TRANSITIONS: dict[str, tuple[str, ...]] = {
+    PayoutStatus.PENDING: (PayoutStatus.CANCELED,),
+}
+
 TASK_RESULT_SUCCESS = "SUCCESS"
 TASK_RESULT_NOT_FOUND = "ERROR_NOT_FOUND"
 TASK_RESULT_TIMEOUT = "ERROR_TIMEOUT"
+TASK_RESULT_EXPIRED = "ERROR_EXPIRED"
+TASK_RESULT_SKIPPED = "SKIPPED"
+TASK_RESULT_DEFERRED = "DEFERRED"
+TASK_RESULT_DEAD_LETTER = "DEAD_LETTER"
+
+# Kinds of task errors with their own retry policy, see PAYOUT_TASK_RETRY_POLICIES.
+RETRY_DEFERRED = "deferred"
+RETRY_DATABASE = "database"
+RETRY_UNEXPECTED = "unexpected"
+
+# Celery queues: one per priority lane and currency, e.g. "payouts.urgent.rub".
+# Lanes are listed from the most to the least urgent.
+PAYOUT_LANES = (PayoutPriority.URGENT, PayoutPriority.NORMAL, PayoutPriority.BULK)
+PAYOUT_QUEUE_PREFIX = "payouts"
+DEFAULT_QUEUE = "celery"
+
+
+def get_payout_queue_name(lane: str, currency: str) -> str:
+    return f"{PAYOUT_QUEUE_PREFIX}.{lane}.{currency.lower()}"
+
+
+PAYOUT_QUEUES = tuple(get_payout_queue_name(lane, currency) for lane in PAYOUT_LANES for currency in CurrencyChoices)
+
+DISPATCH_MODE_TASK = "task"
+DISPATCH_MODE_CLAIM = "claim"
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
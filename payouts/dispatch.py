@@ -0,0 +1,74 @@
+import logging
+from collections import defaultdict
+from collections.abc import Sequence
+
+from django.conf import settings
+
+from core.tracing import inject_context
+from payouts.choices import PayoutPriority
+from payouts.constants import DISPATCH_MODE_CLAIM, get_payout_queue_name
+from payouts.models import OutboxMessage, Payout
+from payouts.tasks import process_payout_batch_task, process_payout_task
+
+logger = logging.getLogger(__name__)
+
+
+def get_payout_lane(payout: Payout) -> str:
+    """Priority lane of a payout: its explicit priority, large NORMAL payouts are URGENT."""
+    if payout.priority == PayoutPriority.NORMAL:
+        urgent_amount = settings.PAYOUT_URGENT_AMOUNTS.get(payout.currency)
+        if urgent_amount is not None and payout.amount >= urgent_amount:
+            return PayoutPriority.URGENT
+    return payout.priority
+
+
+def get_payout_queue(payout: Payout) -> str:
+    return get_payout_queue_name(get_payout_lane(payout), payout.currency)
+
+
+def dispatch_payout(payout: Payout) -> None:
+    """Schedule processing of a payout in its lane queue.
+
+    Must be called in the transaction that creates the payout: the message is written
+    to the outbox and reaches the broker only after the commit. It carries the current
+    trace context, so processing continues the trace of the request.
+    """
+    if settings.PAYOUT_DISPATCH_MODE == DISPATCH_MODE_CLAIM:
+        return
+
+    queue = get_payout_queue(payout)
+    OutboxMessage.objects.create(
+        task_name=process_payout_task.name,
+        args=[str(payout.id)],
+        queue=queue,
+        headers=inject_context(),
+    )
+    logger.info("Payout %s added to outbox for queue %s.", payout.id, queue)
+
+
+def dispatch_payouts(payouts: Sequence[Payout]) -> None:
+    """Schedule processing of many payouts, one message per batch and queue.
+
+    Each batch is processed by ``process_payout_batch_task``, which keeps the gateway
+    calls of the whole batch in flight at once.
+    """
+    if settings.PAYOUT_DISPATCH_MODE == DISPATCH_MODE_CLAIM:
+        return
+
+    payout_ids_by_queue: dict[str, list[str]] = defaultdict(list)
+    for payout in payouts:
+        payout_ids_by_queue[get_payout_queue(payout)].append(str(payout.id))
+
+    batch_size: int = settings.PAYOUT_DISPATCH_BATCH_SIZE
+    headers = inject_context()
+    OutboxMessage.objects.bulk_create(
+        OutboxMessage(
+            task_name=process_payout_batch_task.name,
+            args=[payout_ids[start : start + batch_size]],
+            queue=queue,
+            headers=headers,
+        )
+        for queue, payout_ids in payout_ids_by_queue.items()
+        for start in range(0, len(payout_ids), batch_size)
+    )
+    logger.info("%s payouts added to outbox.", len(payouts))
@@ -5,3 +5,21 @@ class PayoutNotFoundError(PayoutError): ...
 
 
 class GatewayTimeoutError(PayoutError): ...
+
+
+class PayoutExpiredError(PayoutError): ...
+
+
+class GatewayBusyError(PayoutError): ...
+
+
+class GatewayUnavailableError(PayoutError): ...
+
+
+class IdempotencyKeyMismatchError(PayoutError): ...
+
+
+class DuplicatePayoutError(PayoutError): ...
+
+
+class ArchivePartitionError(PayoutError): ...
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from opentelemetry.trace import SpanKind
+
+from core.tracing import tracer
+from payouts.exceptions import GatewayTimeoutError, PayoutExpiredError
+from payouts.models import Payout
+
+logger = logging.getLogger(__name__)
+
+
+def send_payout(payout: Payout) -> int:
+    """Send the payout to the gateway and block until it answers.
+
+    The wait is cut at the gateway timeout or at the payout deadline, whichever comes first.
+    Returns the gateway response time in seconds.
+    """
+    delay: int = settings.PAYOUT_GATEWAY_DELAY
+    timeout = get_call_timeout(payout)
+
+    logger.info("Waiting for gateway response for %s (%ss)...", payout.id, delay)
+    with tracer.start_as_current_span("gateway call", kind=SpanKind.CLIENT):
+        time.sleep(min(delay, timeout))
+
+        if delay > timeout:
+            raise_timeout(payout, delay, timeout)
+    return delay
+
+
+async def asend_payout(payout: Payout) -> int:
+    """Non-blocking variant of :func:`send_payout` for processing many payouts in one event loop."""
+    delay: int = settings.PAYOUT_GATEWAY_DELAY
+    timeout = get_call_timeout(payout)
+
+    logger.info("Waiting for gateway response for %s (%ss)...", payout.id, delay)
+    with tracer.start_as_current_span("gateway call", kind=SpanKind.CLIENT):
+        try:
+            await asyncio.wait_for(asyncio.sleep(delay), timeout)
+        except TimeoutError:
+            raise_timeout(payout, delay, timeout)
+    return delay
+
+
+def check_deadline(payout: Payout) -> None:
+    """Raise PayoutExpiredError if the payout deadline has passed, e.g. while it waited in the queue."""
+    if payout.deadline <= timezone.now():
+        msg = f"Deadline exceeded: not processed by {payout.deadline.isoformat()}"
+        raise PayoutExpiredError(msg)
+
+
+def get_call_timeout(payout: Payout) -> float:
+    """Seconds to wait for the gateway: its timeout, shortened to the time left until the payout deadline."""
+    check_deadline(payout)
+    time_left = (payout.deadline - timezone.now()).total_seconds()
+    return min(settings.PAYOUT_PROCESSING_TIMEOUT, time_left)
+
+
+def raise_timeout(payout: Payout, delay: float, timeout: float) -> None:
+    if timeout < settings.PAYOUT_PROCESSING_TIMEOUT:
+        msg = f"Deadline exceeded while waiting for the gateway ({timeout:.1f}s left)"
+        raise PayoutExpiredError(msg)
+
+    msg = f"Gateway timeout: {delay}s > {settings.PAYOUT_PROCESSING_TIMEOUT}s"
+    raise GatewayTimeoutError(msg) from None
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from payouts.exceptions import IdempotencyKeyMismatchError
+from payouts.models import IdempotencyKey, Payout
+
+logger = logging.getLogger(__name__)
+
+
+def get_request_hash(data: Any) -> str:
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def find_payout_id(key: str, request_hash: str) -> str | None:
+    """Return the id of the payout created with ``key``, if it is still valid.
+
+    The cache answers replays without touching the database; ``IdempotencyKey`` rows
+    are the source of truth when the cache is cold. Keys older than
+    PAYOUT_IDEMPOTENCY_KEY_TTL are treated as unused.
+    """
+    entry: dict[str, str] | None = cache.get(_cache_key(key))
+
+    if entry is None:
+        created_after = timezone.now() - timedelta(seconds=settings.PAYOUT_IDEMPOTENCY_KEY_TTL)
+        row = (
+            IdempotencyKey.objects.filter(key=key, created_at__gte=created_after)
+            .values("payout_id", "request_hash", "created_at")
+            .first()
+        )
+        if row is None:
+            return None
+
+        entry = {"payout_id": str(row["payout_id"]), "request_hash": row["request_hash"]}
+        _cache_entry(key, entry, row["created_at"])
+
+    if entry["request_hash"] != request_hash:
+        msg = f"Idempotency-Key {key} was already used with a different request."
+        raise IdempotencyKeyMismatchError(msg)
+
+    return entry["payout_id"]
+
+
+def save_idempotency_key(key: str, payout: Payout, request_hash: str) -> None:
+    """Bind ``key`` to ``payout``; must run in the transaction that creates the payout.
+
+    Raises IntegrityError if a concurrent request already used the key.
+    """
+    IdempotencyKey.objects.filter(
+        key=key,
+        created_at__lt=timezone.now() - timedelta(seconds=settings.PAYOUT_IDEMPOTENCY_KEY_TTL),
+    ).delete()
+    instance = IdempotencyKey.objects.create(key=key, payout=payout, request_hash=request_hash)
+    entry = {"payout_id": str(payout.id), "request_hash": request_hash}
+    transaction.on_commit(lambda: _cache_entry(key, entry, instance.created_at))
+
+
+def forget_idempotency_key(key: str) -> None:
+    cache.delete(_cache_key(key))
+
+
+def purge_idempotency_keys() -> int:
+    created_before = timezone.now() - timedelta(seconds=settings.PAYOUT_IDEMPOTENCY_KEY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=created_before).delete()
+    logger.info("%s expired idempotency keys deleted", deleted)
+    return deleted
+
+
+def _cache_entry(key: str, entry: dict[str, str], created_at: Any) -> None:
+    expires_in = settings.PAYOUT_IDEMPOTENCY_KEY_TTL - (timezone.now() - created_at).total_seconds()
+    if expires_in > 0:
+        cache.set(_cache_key(key), entry, timeout=expires_in)
+
+
+def _cache_key(key: str) -> str:
+    return f"payouts:idempotency:{hashlib.sha256(key.encode()).hexdigest()}"
@@ -0,0 +1,258 @@
+import contextlib
+import csv
+import re
+import uuid
+from collections.abc import Callable, Iterator
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+import orjson
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
+
+from payouts.api.serializers import PayoutSerializer
+from payouts.choices import CurrencyChoices, PayoutPriority, PayoutStatus
+from payouts.constants import MIN_PAYOUT_AMOUNT
+from payouts.dispatch import dispatch_payouts
+from payouts.models import Payout
+from payouts.stats import recompute_day
+from payouts.validators import get_recipient_details_error, get_recipient_key
+
+IMPORT_FIELDS = (
+    "id",
+    "amount",
+    "currency",
+    "recipient_details",
+    "status",
+    "comment",
+    "priority",
+    "created_at",
+    "updated_at",
+)
+# Columns written by COPY: the imported fields and the ones computed from them.
+COPY_FIELDS = (*IMPORT_FIELDS, "recipient_key", "deadline_at")
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Plain amounts that PayoutSerializer.amount accepts as is (max_digits=12, decimal_places=2).
+AMOUNT_RE = re.compile(r"\d{1,10}(?:\.\d{1,2})?")
+
+STAGING_TABLE = "payouts_payout_import"
+
+ImportRow = tuple[int, Any]
+
+
+def read_payout_rows(path: Path, file_format: str) -> Iterator[ImportRow]:
+    """Yields ``(line number, row)`` pairs without loading the whole file.
+
+    In CSV ``recipient_details`` is a JSON string, the same as in the export.
+    NDJSON lines that are not valid JSON are yielded as strings and rejected later.
+    """
+    if file_format == "csv":
+        with path.open(newline="", encoding="utf-8") as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        return
+
+    with path.open("rb") as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield line_number, line.decode(errors="replace").rstrip("\n")
+
+
+def validate_payout_rows(rows: list[ImportRow]) -> tuple[list[tuple[ImportRow, tuple]], list[dict[str, Any]]]:
+    """Applies the PayoutSerializer rules to a batch of rows.
+
+    Typical values are checked with precompiled fast paths; only values that miss them
+    go through the serializer fields, which also produce the same error messages as the API.
+    Returns ``(valid rows with their COPY records, rejected rows with errors)``.
+    """
+    parsers = get_row_parser().parsers
+    now = timezone.now()
+    valid: list[tuple[ImportRow, tuple]] = []
+    rejected: list[dict[str, Any]] = []
+
+    for line_number, row in rows:
+        if not isinstance(row, dict):
+            errors: dict[str, Any] = {"non_field_errors": ["Строка должна быть JSON-объектом."]}
+            rejected.append({"line": line_number, "row": row, "errors": errors})
+            continue
+
+        values: dict[str, Any] = {}
+        errors = {}
+        for name, parse in parsers.items():
+            try:
+                values[name] = parse(row.get(name))
+            except ValidationError as exc:
+                errors[name] = exc.detail
+
+        if errors:
+            rejected.append({"line": line_number, "row": row, "errors": errors})
+            continue
+
+        values["created_at"] = values["created_at"] or now
+        values["updated_at"] = values["updated_at"] or values["created_at"]
+        values["recipient_key"] = get_recipient_key(orjson.loads(values["recipient_details"]))
+        values["deadline_at"] = get_import_deadline(values["status"], values["priority"], now)
+        valid.append(((line_number, row), tuple(values[name] for name in COPY_FIELDS)))
+
+    return valid, rejected
+
+
+def get_import_deadline(status: str, priority: str, imported_at: datetime) -> datetime | None:
+    """Deadline of an imported PENDING payout, counted from the import.
+
+    Legacy rows keep their ``created_at``: counted from it, the deadline of a payout
+    created days ago would have passed before it was ever dispatched.
+    """
+    if status != PayoutStatus.PENDING:
+        return None
+    return imported_at + timedelta(seconds=settings.PAYOUT_DEADLINES[priority])
+
+
+def copy_payouts(records: list[tuple], enqueue: bool = False) -> set[uuid.UUID]:
+    """Loads records through COPY and returns ids of the inserted payouts.
+
+    Rows go to a temporary table first and are moved with ``ON CONFLICT DO NOTHING``,
+    so payouts imported earlier are skipped instead of failing the whole batch.
+    With ``enqueue`` the inserted PENDING payouts are dispatched in the same transaction.
+
+    Imported rows keep their own ``updated_at``, usually older than the stats watermark,
+    so the rollups of their creation days are recomputed here as well.
+    """
+    quote_name = connection.ops.quote_name
+    table = quote_name(Payout._meta.db_table)
+    staging_table = quote_name(STAGING_TABLE)
+    columns = ", ".join(quote_name(Payout._meta.get_field(name).column) for name in COPY_FIELDS)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TEMPORARY TABLE {staging_table} (LIKE {table})")
+        with cursor.copy(f"COPY {staging_table} ({columns}) FROM STDIN") as copy:
+            for record in records:
+                copy.write_row(record)
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging_table} "
+            f"ON CONFLICT ({quote_name(Payout._meta.pk.column)}) DO NOTHING "
+            "RETURNING id, status, amount, currency, priority, created_at",
+        )
+        inserted = [
+            Payout(
+                id=payout_id,
+                status=status,
+                amount=amount,
+                currency=currency,
+                priority=priority,
+                created_at=created_at,
+            )
+            for payout_id, status, amount, currency, priority, created_at in cursor.fetchall()
+        ]
+        cursor.execute(f"DROP TABLE {staging_table}")
+
+        refreshed_at = timezone.now()
+        for day in sorted({timezone.localdate(payout.created_at) for payout in inserted}):
+            recompute_day(day, refreshed_at)
+
+        if enqueue:
+            dispatch_payouts([payout for payout in inserted if payout.status == PayoutStatus.PENDING])
+
+    return {payout.id for payout in inserted}
+
+
+def is_blank(value: Any) -> bool:
+    return value is None or value == ""
+
+
+class PayoutRowParser:
+    """Converts raw import values to COPY values following the PayoutSerializer fields."""
+
+    def __init__(self) -> None:
+        self.fields = PayoutSerializer().fields
+        self.id_field = serializers.UUIDField()
+        self.status_field = serializers.ChoiceField(choices=PayoutStatus.choices)
+        self.datetime_field = serializers.DateTimeField()
+        self.currencies = frozenset(CurrencyChoices.values)
+        self.statuses = frozenset(PayoutStatus.values)
+        self.priorities = frozenset(PayoutPriority.values)
+        self.comment_max_length: int = self.fields["comment"].max_length
+        self.parsers: dict[str, Callable[[Any], Any]] = {
+            "id": self.parse_id,
+            "amount": self.parse_amount,
+            "currency": self.parse_currency,
+            "recipient_details": self.parse_recipient_details,
+            "status": self.parse_status,
+            "comment": self.parse_comment,
+            "priority": self.parse_priority,
+            "created_at": self.parse_datetime,
+            "updated_at": self.parse_datetime,
+        }
+
+    def parse_id(self, value: Any) -> uuid.UUID:
+        if is_blank(value):
+            return uuid.uuid4()
+        return self.id_field.run_validation(value)
+
+    def parse_amount(self, value: Any) -> Decimal:
+        text = value.strip() if isinstance(value, str) else str(value)
+        if AMOUNT_RE.fullmatch(text) and (amount := Decimal(text)) >= MIN_PAYOUT_AMOUNT:
+            return amount
+        return self.fields["amount"].run_validation(empty if value is None else value)
+
+    def parse_currency(self, value: Any) -> str:
+        if is_blank(value):
+            return CurrencyChoices.RUB
+        if isinstance(value, str) and value in self.currencies:
+            return value
+        return self.fields["currency"].run_validation(value)
+
+    def parse_recipient_details(self, value: Any) -> str:
+        if value is None:
+            self.fields["recipient_details"].run_validation(empty)
+        if isinstance(value, str):
+            with contextlib.suppress(orjson.JSONDecodeError):
+                value = orjson.loads(value)
+        error = get_recipient_details_error(value)
+        if error is not None:
+            raise ValidationError(error)
+        return orjson.dumps(value).decode()
+
+    def parse_status(self, value: Any) -> str:
+        if is_blank(value):
+            return PayoutStatus.PENDING
+        if isinstance(value, str) and value in self.statuses:
+            return value
+        return self.status_field.run_validation(value)
+
+    def parse_priority(self, value: Any) -> str:
+        if is_blank(value):
+            return PayoutPriority.BULK
+        if isinstance(value, str) and value in self.priorities:
+            return value
+        return self.fields["priority"].run_validation(value)
+
+    def parse_comment(self, value: Any) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, str) and len(comment := value.strip()) <= self.comment_max_length:
+            return comment
+        return self.fields["comment"].run_validation(value)
+
+    def parse_datetime(self, value: Any) -> datetime | None:
+        if is_blank(value):
+            return None
+        return self.datetime_field.run_validation(value)
+
+
+@cache
+def get_row_parser() -> PayoutRowParser:
+    return PayoutRowParser()
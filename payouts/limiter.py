@@ -0,0 +1,268 @@
+"""Concurrency limit on gateway calls shared by all workers.
+
+Every call holds a slot while it waits for the gateway. The number of slots adapts
+to how the gateway copes (AIMD): it grows by ``1 / limit`` after every response
+within PAYOUT_GATEWAY_LATENCY_TARGET, so by about one per ``limit`` calls, and is
+cut by PAYOUT_GATEWAY_SLOW_BACKOFF after a slow response or PAYOUT_GATEWAY_TIMEOUT_BACKOFF
+after a timeout. Cuts happen at most once per PAYOUT_GATEWAY_BACKOFF_COOLDOWN, so a burst
+of timeouts from calls that were in flight together counts once.
+
+With PAYOUT_GATEWAY_LIMITER_URL the slots and the limit live in Redis and are shared
+by the whole cluster; without it every process has its own in-memory limiter.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from functools import cache
+from typing import Protocol
+
+import redis
+from django.conf import settings
+
+from payouts.exceptions import GatewayBusyError, GatewayTimeoutError, PayoutExpiredError
+from payouts.metrics import (
+    GATEWAY_ERROR,
+    GATEWAY_EXPIRED,
+    GATEWAY_LIMIT,
+    GATEWAY_SUCCESS,
+    GATEWAY_TIMEOUT,
+    REJECTED_BUSY,
+    count_gateway_rejection,
+    observe_gateway_call,
+)
+
+logger = logging.getLogger(__name__)
+
+LEASES_KEY = "payouts:gateway:leases"
+STATE_KEY = "payouts:gateway:state"
+
+POLL_INTERVAL_MIN = 0.01
+POLL_INTERVAL_MAX = 0.5
+
+# KEYS: leases, state. ARGV: token, lease timeout, initial limit.
+ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local limit = tonumber(redis.call('HGET', KEYS[2], 'limit') or ARGV[3])
+if redis.call('ZCARD', KEYS[1]) >= math.floor(limit) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], tostring(now + tonumber(ARGV[2])), ARGV[1])
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2])))
+return 1
+"""
+
+# KEYS: leases, state. ARGV: token, latency ("" after a timeout), latency target,
+# min limit, max limit, initial limit, slow backoff, timeout backoff, cooldown.
+# The same arithmetic as adjust_limit.
+RELEASE_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local limit = tonumber(redis.call('HGET', KEYS[2], 'limit') or ARGV[6])
+local latency = tonumber(ARGV[2])
+if latency and latency <= tonumber(ARGV[3]) then
+    limit = math.min(tonumber(ARGV[5]), limit + 1 / limit)
+else
+    local decreased_at = tonumber(redis.call('HGET', KEYS[2], 'decreased_at') or 0)
+    if now - decreased_at < tonumber(ARGV[9]) then
+        return tostring(limit)
+    end
+    local backoff = latency and tonumber(ARGV[7]) or tonumber(ARGV[8])
+    limit = math.max(tonumber(ARGV[4]), limit * backoff)
+    redis.call('HSET', KEYS[2], 'decreased_at', tostring(now))
+end
+redis.call('HSET', KEYS[2], 'limit', tostring(limit))
+return tostring(limit)
+"""
+
+
+class GatewayLimiter(Protocol):
+    def try_acquire(self) -> str | None:
+        """Take a slot if one is free; returns its token or ``None``."""
+
+    def release(self, token: str, latency: float | None) -> float:
+        """Free the slot and adapt the limit; ``latency`` is ``None`` after a timeout.
+
+        Returns the new limit.
+        """
+
+    def discard(self, token: str) -> None:
+        """Free the slot without adapting the limit."""
+
+
+def adjust_limit(limit: float, latency: float | None) -> float:
+    if latency is not None and latency <= settings.PAYOUT_GATEWAY_LATENCY_TARGET:
+        return min(settings.PAYOUT_GATEWAY_LIMIT_MAX, limit + 1 / limit)
+
+    backoff = settings.PAYOUT_GATEWAY_TIMEOUT_BACKOFF if latency is None else settings.PAYOUT_GATEWAY_SLOW_BACKOFF
+    return max(settings.PAYOUT_GATEWAY_LIMIT_MIN, limit * backoff)
+
+
+class LocalGatewayLimiter:
+    """In-memory limiter: shared by the threads and event loops of one process only."""
+
+    def __init__(self) -> None:
+        self.limit: float = settings.PAYOUT_GATEWAY_LIMIT_INITIAL
+        self.leases: dict[str, float] = {}
+        self.decreased_at = float("-inf")
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> str | None:
+        now = time.monotonic()
+        with self.lock:
+            self.leases = {token: expires_at for token, expires_at in self.leases.items() if expires_at > now}
+            if len(self.leases) >= int(self.limit):
+                return None
+
+            token = uuid.uuid4().hex
+            self.leases[token] = now + settings.PAYOUT_GATEWAY_LEASE_TIMEOUT
+            return token
+
+    def release(self, token: str, latency: float | None) -> float:
+        now = time.monotonic()
+        with self.lock:
+            self.leases.pop(token, None)
+            decrease = latency is None or latency > settings.PAYOUT_GATEWAY_LATENCY_TARGET
+            if decrease:
+                if now - self.decreased_at < settings.PAYOUT_GATEWAY_BACKOFF_COOLDOWN:
+                    return self.limit
+                self.decreased_at = now
+            self.limit = adjust_limit(self.limit, latency)
+            return self.limit
+
+    def discard(self, token: str) -> None:
+        with self.lock:
+            self.leases.pop(token, None)
+
+
+class RedisGatewayLimiter:
+    """Cluster-wide limiter: slots are a sorted set of leases scored by expiry time.
+
+    A lease expires after PAYOUT_GATEWAY_LEASE_TIMEOUT, so slots of a killed worker
+    come back on their own. Each call is one short script run, cheap enough to be
+    made from an event loop directly.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.client = redis.Redis.from_url(url)
+        self.acquire_script = self.client.register_script(ACQUIRE_SCRIPT)
+        self.release_script = self.client.register_script(RELEASE_SCRIPT)
+
+    def try_acquire(self) -> str | None:
+        token = uuid.uuid4().hex
+        acquired = self.acquire_script(
+            keys=[LEASES_KEY, STATE_KEY],
+            args=[token, settings.PAYOUT_GATEWAY_LEASE_TIMEOUT, settings.PAYOUT_GATEWAY_LIMIT_INITIAL],
+        )
+        return token if acquired else None
+
+    def release(self, token: str, latency: float | None) -> float:
+        limit = self.release_script(
+            keys=[LEASES_KEY, STATE_KEY],
+            args=[
+                token,
+                "" if latency is None else latency,
+                settings.PAYOUT_GATEWAY_LATENCY_TARGET,
+                settings.PAYOUT_GATEWAY_LIMIT_MIN,
+                settings.PAYOUT_GATEWAY_LIMIT_MAX,
+                settings.PAYOUT_GATEWAY_LIMIT_INITIAL,
+                settings.PAYOUT_GATEWAY_SLOW_BACKOFF,
+                settings.PAYOUT_GATEWAY_TIMEOUT_BACKOFF,
+                settings.PAYOUT_GATEWAY_BACKOFF_COOLDOWN,
+            ],
+        )
+        return float(limit)
+
+    def discard(self, token: str) -> None:
+        self.client.zrem(LEASES_KEY, token)
+
+
+@cache
+def get_gateway_limiter() -> GatewayLimiter:
+    if settings.PAYOUT_GATEWAY_LIMITER_URL:
+        return RedisGatewayLimiter(settings.PAYOUT_GATEWAY_LIMITER_URL)
+    return LocalGatewayLimiter()
+
+
+@contextmanager
+def gateway_slot() -> Iterator[None]:
+    """Hold a gateway slot around the block, waiting up to PAYOUT_GATEWAY_LIMITER_WAIT for one.
+
+    Raises GatewayBusyError if no slot frees up in time.
+    """
+    limiter = get_gateway_limiter()
+    deadline = time.monotonic() + settings.PAYOUT_GATEWAY_LIMITER_WAIT
+    interval = POLL_INTERVAL_MIN
+    while (token := limiter.try_acquire()) is None:
+        if time.monotonic() >= deadline:
+            raise_busy()
+        time.sleep(interval)
+        interval = next_poll_interval(interval)
+
+    with feedback(limiter, token):
+        yield
+
+
+@asynccontextmanager
+async def agateway_slot() -> AsyncIterator[None]:
+    """Async variant of :func:`gateway_slot`: waits for a slot without blocking the event loop."""
+    limiter = get_gateway_limiter()
+    deadline = time.monotonic() + settings.PAYOUT_GATEWAY_LIMITER_WAIT
+    interval = POLL_INTERVAL_MIN
+    while (token := limiter.try_acquire()) is None:
+        if time.monotonic() >= deadline:
+            raise_busy()
+        await asyncio.sleep(interval)
+        interval = next_poll_interval(interval)
+
+    with feedback(limiter, token):
+        yield
+
+
+@contextmanager
+def feedback(limiter: GatewayLimiter, token: str) -> Iterator[None]:
+    """Release the slot, reporting the latency of the block or a gateway timeout.
+
+    A call cut at the payout deadline says nothing about the gateway: its slot is freed
+    without adapting the limit and it is counted apart from gateway errors.
+    """
+    started = time.monotonic()
+    try:
+        yield
+    except GatewayTimeoutError:
+        observe_gateway_call(GATEWAY_TIMEOUT, time.monotonic() - started)
+        limit = limiter.release(token, None)
+        GATEWAY_LIMIT.set(limit)
+        logger.warning("Gateway timed out, concurrency limit lowered to %.1f", limit)
+        raise
+    except PayoutExpiredError:
+        observe_gateway_call(GATEWAY_EXPIRED, time.monotonic() - started)
+        limiter.discard(token)
+        raise
+    except BaseException:
+        observe_gateway_call(GATEWAY_ERROR, time.monotonic() - started)
+        # Not an answer of the gateway: free the slot without adapting the limit.
+        limiter.discard(token)
+        raise
+    latency = time.monotonic() - started
+    observe_gateway_call(GATEWAY_SUCCESS, latency)
+    GATEWAY_LIMIT.set(limiter.release(token, latency))
+
+
+def next_poll_interval(interval: float) -> float:
+    # Exponential with jitter, so waiting workers do not poll in lockstep.
+    return min(POLL_INTERVAL_MAX, interval * 2) * random.uniform(0.5, 1)
+
+
+def raise_busy() -> None:
+    count_gateway_rejection(REJECTED_BUSY)
+    msg = f"No free gateway slot within {settings.PAYOUT_GATEWAY_LIMITER_WAIT}s"
+    raise GatewayBusyError(msg)
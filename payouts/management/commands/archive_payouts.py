@@ -0,0 +1,42 @@
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from payouts.archive import archive_payouts, detach_archive_partitions
+
+
+class Command(BaseCommand):
+    help = "Переносит завершённые выплаты в архив, секционированный по месяцам"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=settings.PAYOUT_ARCHIVE_AFTER // (24 * 60 * 60),
+            help="Переносить выплаты, созданные раньше этого числа дней назад",
+        )
+        parser.add_argument("--batch-size", type=int, default=settings.PAYOUT_ARCHIVE_BATCH_SIZE)
+        parser.add_argument(
+            "--detach-older-than",
+            type=int,
+            help="Отсоединить секции архива за месяцы, закончившиеся раньше этого числа дней назад",
+        )
+
+    def handle(
+        self,
+        *_args: Any,
+        older_than: int,
+        batch_size: int,
+        detach_older_than: int | None,
+        **_options: Any,
+    ) -> None:
+        now = timezone.now()
+        archived = archive_payouts(now - timedelta(days=older_than), batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} payouts"))
+
+        if detach_older_than is not None:
+            detached = detach_archive_partitions(now - timedelta(days=detach_older_than))
+            self.stdout.write(self.style.SUCCESS(f"Detached partitions: {', '.join(detached) or 'none'}"))
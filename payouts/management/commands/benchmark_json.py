@@ -0,0 +1,87 @@
+import io
+import time
+import uuid
+from collections.abc import Callable
+from decimal import Decimal
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.api.parsers import ORJSONParser
+from core.api.renderers import ORJSONRenderer
+from payouts.api.serializers import PayoutRowSerializer
+from payouts.choices import CurrencyChoices, PayoutStatus
+from payouts.models import Payout
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость JSONRenderer/JSONParser и ORJSONRenderer/ORJSONParser на телах запросов выплат"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--rows", type=int, default=500, help="Размер страницы списка")
+        parser.add_argument("--number", type=int, default=200, help="Число кодирований в одном прогоне")
+        parser.add_argument("--repeat", type=int, default=5, help="Лучший результат из N прогонов")
+
+    def handle(self, *_args: Any, rows: int, number: int, repeat: int, **_options: Any) -> None:
+        create = {
+            "amount": "1000.50",
+            "currency": CurrencyChoices.RUB,
+            "recipient_details": {"card_number": "1234567812345678"},
+            "comment": "Выплата по договору",
+        }
+        now = timezone.now()
+        payouts = [
+            Payout(
+                id=uuid.uuid4(),
+                amount=Decimal(f"{1000 + index}.50"),
+                recipient_details={"card_number": "1234567812345678"},
+                status=PayoutStatus.PENDING,
+                comment="Выплата по договору",
+                created_at=now,
+                updated_at=now,
+            )
+            for index in range(rows)
+        ]
+        page = {
+            "next": "http://localhost/api/payouts/?cursor=cD0yMDI1LTAxLTAy",
+            "previous": None,
+            # The rows the list view reads with .values(*PayoutRowSerializer.fields).
+            "results": PayoutRowSerializer().to_representation_many(
+                PayoutRowSerializer.get_row(payout) for payout in payouts
+            ),
+        }
+
+        for name, data in (("create", create), ("list", page)):
+            encoded = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != encoded:
+                msg = f"ORJSONRenderer output differs from JSONRenderer on {name} payload"
+                raise CommandError(msg)
+
+            self.report(
+                f"encode {name}",
+                self.measure(lambda data=data: JSONRenderer().render(data), number, repeat),
+                self.measure(lambda data=data: ORJSONRenderer().render(data), number, repeat),
+            )
+            self.report(
+                f"decode {name}",
+                self.measure(lambda body=encoded: JSONParser().parse(io.BytesIO(body)), number, repeat),
+                self.measure(lambda body=encoded: ORJSONParser().parse(io.BytesIO(body)), number, repeat),
+            )
+
+    def report(self, name: str, baseline: float, fast: float) -> None:
+        self.stdout.write(
+            f"{name:<14} stdlib: {baseline:>10,.0f} ops/s  orjson: {fast:>10,.0f} ops/s ({fast / baseline:.1f}x)"
+        )
+
+    @staticmethod
+    def measure(call: Callable[[], Any], number: int, repeat: int) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                call()
+            best = min(best, time.perf_counter() - started)
+        return number / best
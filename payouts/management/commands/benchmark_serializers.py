@@ -0,0 +1,55 @@
+import time
+import uuid
+from collections.abc import Callable
+from decimal import Decimal
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from payouts.api.serializers import PayoutRowSerializer, PayoutSerializer
+from payouts.choices import PayoutStatus
+from payouts.models import Payout
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость PayoutSerializer и PayoutRowSerializer на выплатах в памяти"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5, help="Лучший результат из N прогонов")
+
+    def handle(self, *_args: Any, rows: int, repeat: int, **_options: Any) -> None:
+        now = timezone.now()
+        payouts = [
+            Payout(
+                id=uuid.uuid4(),
+                amount=Decimal(f"{1000 + index}.{index % 100:02d}"),
+                recipient_details={"card_number": "1234567812345678"},
+                status=PayoutStatus.PENDING,
+                comment="" if index % 2 else "Benchmark payout",
+                created_at=now,
+                updated_at=now,
+            )
+            for index in range(rows)
+        ]
+        values = [PayoutRowSerializer.get_row(payout) for payout in payouts]
+
+        if PayoutRowSerializer().to_representation_many(values) != PayoutSerializer(payouts, many=True).data:
+            msg = "PayoutRowSerializer output differs from PayoutSerializer"
+            raise CommandError(msg)
+
+        baseline = self.measure(lambda: PayoutSerializer(payouts, many=True).data, rows, repeat)
+        fast = self.measure(lambda: PayoutRowSerializer().to_representation_many(values), rows, repeat)
+
+        self.stdout.write(f"PayoutSerializer:    {baseline:>12,.0f} objects/s")
+        self.stdout.write(f"PayoutRowSerializer: {fast:>12,.0f} objects/s ({fast / baseline:.1f}x)")
+
+    @staticmethod
+    def measure(serialize: Callable[[], Any], rows: int, repeat: int) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            serialize()
+            best = min(best, time.perf_counter() - started)
+        return rows / best
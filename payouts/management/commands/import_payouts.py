@@ -0,0 +1,84 @@
+import time
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import Any
+
+import orjson
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from payouts.importer import IMPORT_FORMATS, copy_payouts, read_payout_rows, validate_payout_rows
+
+DUPLICATE_ERRORS = {"id": ["Выплата с таким id уже существует."]}
+
+
+class Command(BaseCommand):
+    help = "Загружает выплаты из CSV/NDJSON файла через COPY"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format", dest="file_format", choices=IMPORT_FORMATS, help="По умолчанию определяется по расширению файла"
+        )
+        parser.add_argument("--batch-size", type=int, default=settings.PAYOUT_IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            "--enqueue", action="store_true", help="Поставить импортированные PENDING выплаты в обработку"
+        )
+        parser.add_argument("--rejected", type=Path, help="Файл для отклонённых строк (NDJSON)")
+
+    def handle(
+        self,
+        *_args: Any,
+        path: Path,
+        file_format: str | None,
+        batch_size: int,
+        enqueue: bool,
+        rejected: Path | None,
+        **_options: Any,
+    ) -> None:
+        file_format = file_format or path.suffix.lstrip(".").lower()
+        if file_format not in IMPORT_FORMATS:
+            msg = f"Cannot detect the format of {path}, pass --format"
+            raise CommandError(msg)
+        if not path.is_file():
+            msg = f"File {path} does not exist"
+            raise CommandError(msg)
+
+        rejected_path = rejected or path.with_name(f"{path.name}.rejected.ndjson")
+        total = imported = rejected_count = 0
+        started = time.perf_counter()
+
+        rows = read_payout_rows(path, file_format)
+        with rejected_path.open("wb") as rejected_file:
+            while batch := list(islice(rows, batch_size)):
+                valid, invalid = validate_payout_rows(batch)
+                inserted = copy_payouts([record for _row, record in valid], enqueue=enqueue) if valid else set()
+                invalid.extend(
+                    {"line": line_number, "row": row, "errors": DUPLICATE_ERRORS}
+                    for (line_number, row), record in valid
+                    if record[0] not in inserted
+                )
+                invalid.sort(key=itemgetter("line"))
+                rejected_file.writelines(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE) for entry in invalid)
+
+                total += len(batch)
+                imported += len(inserted)
+                rejected_count += len(invalid)
+                self.stdout.write(f"{total:,} rows processed, {self.rate(total, started):,.0f} rows/s")
+
+        if not rejected_count:
+            rejected_path.unlink()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported:,} of {total:,} rows in {time.perf_counter() - started:.1f}s "
+                f"({self.rate(total, started):,.0f} rows/s), rejected {rejected_count:,}",
+            ),
+        )
+        if rejected_count:
+            self.stdout.write(f"Rejected rows are written to {rejected_path}")
+
+    @staticmethod
+    def rate(rows: int, started: float) -> float:
+        return rows / max(time.perf_counter() - started, 1e-9)
@@ -0,0 +1,20 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from payouts.stats import refresh_payout_stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает дневную статистику выплат за дни с изменёнными выплатами"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Пересчитать все дни и удалить статистику дней без выплат, например после удаления выплат",
+        )
+
+    def handle(self, *_args: Any, full: bool, **_options: Any) -> None:
+        days = refresh_payout_stats(full=full)
+        self.stdout.write(self.style.SUCCESS(f"Refreshed stats of {days} days"))
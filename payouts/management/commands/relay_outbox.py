@@ -0,0 +1,40 @@
+import logging
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+
+from payouts.outbox import purge_outbox, relay_outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Публикует сообщения outbox в брокер пачками"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=settings.PAYOUT_OUTBOX_BATCH_SIZE)
+        parser.add_argument("--interval", type=float, default=settings.PAYOUT_OUTBOX_POLL_INTERVAL)
+        parser.add_argument("--once", action="store_true", help="Опубликовать накопленные сообщения и выйти")
+
+    def handle(self, *_args: Any, batch_size: int, interval: float, once: bool, **_options: Any) -> None:
+        retention = timedelta(seconds=settings.PAYOUT_OUTBOX_RETENTION)
+
+        while True:
+            try:
+                sent = relay_outbox(batch_size)
+            except Exception:
+                logger.exception("Could not relay outbox messages")
+                sent = 0
+            if sent == batch_size:
+                continue
+
+            purge_outbox(retention, batch_size)
+            if once:
+                return
+            # Drops the connection once CONN_MAX_AGE has passed or it became unusable.
+            close_old_connections()
+            time.sleep(interval)
@@ -0,0 +1,44 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from payouts.models import DeadLetter
+from payouts.retries import replay_dead_letters
+
+
+class Command(BaseCommand):
+    help = "Повторно отправляет задачи, исчерпавшие повторы, через outbox"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("ids", nargs="*", type=int, help="По умолчанию все неотправленные повторно")
+        parser.add_argument("--task", help="Только задачи с этим именем")
+        parser.add_argument("--error-type", help="Только задачи с этим типом ошибки, например OperationalError")
+        parser.add_argument("--dry-run", action="store_true", help="Вывести задачи без отправки")
+
+    def handle(
+        self,
+        *_args: Any,
+        ids: list[int],
+        task: str | None,
+        error_type: str | None,
+        dry_run: bool,
+        **_options: Any,
+    ) -> None:
+        dead_letters = DeadLetter.objects.filter(replayed_at__isnull=True)
+        if ids:
+            dead_letters = dead_letters.filter(id__in=ids)
+        if task:
+            dead_letters = dead_letters.filter(task_name=task)
+        if error_type:
+            dead_letters = dead_letters.filter(error_type=error_type)
+
+        if dry_run:
+            for entry in dead_letters.order_by("id"):
+                self.stdout.write(
+                    f"{entry.id}\t{entry.created_at:%Y-%m-%d %H:%M:%S}\t{entry.task_name}\t"
+                    f"{entry.error_type}: {entry.error}\t{entry.args}",
+                )
+            return
+
+        replayed = replay_dead_letters(dead_letters)
+        self.stdout.write(self.style.SUCCESS(f"Replayed {replayed} tasks"))
@@ -0,0 +1,214 @@
+"""Payout metrics: task phases and results, retries, gateway calls and payout state.
+
+Recorded values follow core.metrics (pre-created children, multiprocess mode); the
+state of queues and tables is read by PayoutStateCollector when /metrics is scraped.
+"""
+
+import logging
+import time
+from collections import Counter as Tally
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+from celery import current_app
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from kombu.exceptions import ChannelError, OperationalError
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from payouts.choices import PayoutStatus
+from payouts.constants import (
+    DEFAULT_QUEUE,
+    PAYOUT_QUEUES,
+    RETRY_DATABASE,
+    RETRY_DEFERRED,
+    RETRY_UNEXPECTED,
+    TASK_RESULT_DEAD_LETTER,
+    TASK_RESULT_DEFERRED,
+    TASK_RESULT_EXPIRED,
+    TASK_RESULT_NOT_FOUND,
+    TASK_RESULT_SKIPPED,
+    TASK_RESULT_SUCCESS,
+    TASK_RESULT_TIMEOUT,
+)
+from payouts.models import OutboxMessage, Payout
+
+logger = logging.getLogger(__name__)
+
+TASKS = ("process_payout_task", "process_payout_batch_task", "claim_payouts_task")
+TASK_RESULTS = (
+    TASK_RESULT_SUCCESS,
+    TASK_RESULT_NOT_FOUND,
+    TASK_RESULT_TIMEOUT,
+    TASK_RESULT_EXPIRED,
+    TASK_RESULT_SKIPPED,
+    TASK_RESULT_DEFERRED,
+    TASK_RESULT_DEAD_LETTER,
+)
+RETRY_KINDS = (RETRY_DEFERRED, RETRY_DATABASE, RETRY_UNEXPECTED)
+
+PHASE_DB = "db"
+PHASE_GATEWAY = "gateway"
+
+GATEWAY_SUCCESS = "success"
+GATEWAY_TIMEOUT = "timeout"
+GATEWAY_EXPIRED = "expired"
+GATEWAY_ERROR = "error"
+
+REJECTED_CIRCUIT_OPEN = "circuit_open"
+REJECTED_BUSY = "busy"
+
+STATUS_COUNTS_CACHE_KEY = "payouts:metrics:status_counts"
+
+TASK_PHASE_DURATION = Histogram(
+    "payouts_task_phase_duration_seconds",
+    "Time a task run spent waiting on the gateway (slot and call) and on everything else, mostly the database.",
+    ["task", "phase"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+TASK_RESULT_TOTAL = Counter(
+    "payouts_task_results", "Payout results of tasks, by TASK_RESULT_* code.", ["task", "result"]
+)
+TASK_RETRY_TOTAL = Counter("payouts_task_retries", "Task retries, by kind of retry policy.", ["task", "kind"])
+
+GATEWAY_CALL_DURATION = Histogram(
+    "payouts_gateway_call_duration_seconds",
+    "Time gateway calls held a slot, by outcome.",
+    ["outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 6, 8, 10, 15, 30),
+)
+GATEWAY_REJECTED_TOTAL = Counter(
+    "payouts_gateway_rejected",
+    "Gateway calls not made: circuit open or no free slot in time.",
+    ["reason"],
+)
+GATEWAY_LIMIT = Gauge(
+    "payouts_gateway_limit",
+    "Concurrency limit on gateway calls after the last call.",
+    multiprocess_mode="mostrecent",
+)
+
+task_phases = {
+    (task, phase): TASK_PHASE_DURATION.labels(task, phase) for task in TASKS for phase in (PHASE_DB, PHASE_GATEWAY)
+}
+task_results = {(task, result): TASK_RESULT_TOTAL.labels(task, result) for task in TASKS for result in TASK_RESULTS}
+task_retries = {(task, kind): TASK_RETRY_TOTAL.labels(task, kind) for task in TASKS for kind in RETRY_KINDS}
+gateway_calls = {
+    outcome: GATEWAY_CALL_DURATION.labels(outcome)
+    for outcome in (GATEWAY_SUCCESS, GATEWAY_TIMEOUT, GATEWAY_EXPIRED, GATEWAY_ERROR)
+}
+gateway_rejections = {
+    reason: GATEWAY_REJECTED_TOTAL.labels(reason) for reason in (REJECTED_CIRCUIT_OPEN, REJECTED_BUSY)
+}
+
+
+class TaskMetrics:
+    """Timing of one task run: time in ``waiting_for_gateway`` blocks and the rest."""
+
+    def __init__(self, task: str) -> None:
+        self.task = task
+        self.started = time.perf_counter()
+        self.gateway_wait = 0.0
+
+    @contextmanager
+    def waiting_for_gateway(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.gateway_wait += time.perf_counter() - started
+
+    def finish(self) -> None:
+        duration = time.perf_counter() - self.started
+        task_phases[self.task, PHASE_GATEWAY].observe(self.gateway_wait)
+        task_phases[self.task, PHASE_DB].observe(duration - self.gateway_wait)
+
+
+@contextmanager
+def track_task(task: str) -> Iterator[TaskMetrics]:
+    """Record the phases of the task run in the block, also if it raises (e.g. to retry)."""
+    metrics = TaskMetrics(task)
+    try:
+        yield metrics
+    finally:
+        metrics.finish()
+
+
+def get_task_label(task_name: str) -> str:
+    return task_name.rpartition(".")[2]
+
+
+def count_results(task: str, results: Iterable[str]) -> None:
+    for result, count in Tally(results).items():
+        task_results[task, result].inc(count)
+
+
+def count_retry(task: str, kind: str) -> None:
+    task_retries[task, kind].inc()
+
+
+def observe_gateway_call(outcome: str, duration: float) -> None:
+    gateway_calls[outcome].observe(duration)
+
+
+def count_gateway_rejection(reason: str) -> None:
+    gateway_rejections[reason].inc()
+
+
+def get_status_counts() -> dict[str, int]:
+    """Payouts by status, cached for PAYOUT_METRICS_STATUS_COUNTS_TIMEOUT.
+
+    Counting goes over the whole table, so it runs at most once per timeout however
+    often and by however many replicas /metrics is scraped.
+    """
+    counts: dict[str, int] | None = cache.get(STATUS_COUNTS_CACHE_KEY)
+    if counts is None:
+        counts = dict.fromkeys(PayoutStatus.values, 0)
+        counts.update(Payout.objects.order_by().values_list("status").annotate(Count("id")))
+        cache.set(STATUS_COUNTS_CACHE_KEY, counts, settings.PAYOUT_METRICS_STATUS_COUNTS_TIMEOUT)
+    return counts
+
+
+def get_queue_depths(queues: Iterable[str]) -> dict[str, int]:
+    """Number of messages waiting in each broker queue."""
+    depths: dict[str, int] = {}
+    with current_app.connection_for_read() as connection:
+        connection.ensure_connection(max_retries=1)
+        channel = connection.default_channel
+        for queue in queues:
+            try:
+                depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+            except ChannelError:
+                # The Redis transport drops a queue once it is empty.
+                depths[queue] = 0
+    return depths
+
+
+class PayoutStateCollector(Collector):
+    """Payouts by status, unsent outbox messages and broker queue depths, read when scraped."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        statuses = GaugeMetricFamily("payouts", "Payouts by status.", labels=["status"])
+        for status, count in get_status_counts().items():
+            statuses.add_metric([status], count)
+        yield statuses
+
+        yield GaugeMetricFamily(
+            "payouts_outbox_unsent",
+            "Outbox messages not yet sent to the broker.",
+            value=OutboxMessage.objects.filter(sent_at__isnull=True).count(),
+        )
+
+        try:
+            depths = get_queue_depths((DEFAULT_QUEUE, *PAYOUT_QUEUES))
+        except (OSError, OperationalError):
+            logger.warning("Could not read queue depths from the broker", exc_info=True)
+            return
+
+        queues = GaugeMetricFamily("payouts_queue_depth", "Messages waiting in a broker queue.", labels=["queue"])
+        for queue, depth in depths.items():
+            queues.add_metric([queue], depth)
+        yield queues
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:09
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("payouts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="payout",
+            options={"ordering": ["-created_at", "-id"], "verbose_name": "Выплата", "verbose_name_plural": "Выплаты"},
+        ),
+        AddIndexConcurrently(
+            model_name="payout",
+            index=models.Index(fields=["created_at", "id"], name="payout_created_at_id_idx"),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:31
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("payouts", "0002_payout_created_at_id_idx"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="payout",
+            index=models.Index(fields=["status", "created_at", "id"], name="payout_status_created_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="payout",
+            index=models.Index(fields=["currency", "status", "created_at"], name="payout_currency_status_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="payout",
+            index=models.Index(
+                condition=models.Q(("status__in", ("pending", "processing"))),
+                fields=["status", "created_at", "id"],
+                name="payout_active_status_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payouts", "0003_payout_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("task_name", models.CharField(max_length=255, verbose_name="Задача")),
+                ("args", models.JSONField(default=list, verbose_name="Аргументы")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                ("sent_at", models.DateTimeField(blank=True, null=True, verbose_name="Дата отправки")),
+            ],
+            options={
+                "verbose_name": "Исходящее сообщение",
+                "verbose_name_plural": "Исходящие сообщения",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("sent_at__isnull", True)),
+                        fields=["id"],
+                        name="outbox_unsent_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("sent_at__isnull", False)),
+                        fields=["sent_at"],
+                        name="outbox_sent_at_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payouts", "0005_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payout",
+            name="priority",
+            field=models.CharField(
+                choices=[("urgent", "Срочная"), ("normal", "Обычная"), ("bulk", "Массовая")],
+                default="normal",
+                help_text="Очередь обработки: срочные выплаты не ждут массовых загрузок",
+                max_length=10,
+                verbose_name="Приоритет",
+            ),
+        ),
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="queue",
+            field=models.CharField(blank=True, max_length=100, verbose_name="Очередь"),
+        ),
+    ]
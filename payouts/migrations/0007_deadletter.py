@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payouts", "0006_payout_priority_outboxmessage_queue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeadLetter",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("task_name", models.CharField(max_length=255, verbose_name="Задача")),
+                ("args", models.JSONField(default=list, verbose_name="Аргументы")),
+                ("queue", models.CharField(blank=True, max_length=100, verbose_name="Очередь")),
+                ("error_type", models.CharField(max_length=255, verbose_name="Тип ошибки")),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                ("retries", models.PositiveIntegerField(default=0, verbose_name="Число повторов")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                (
+                    "replayed_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Дата повторной отправки"),
+                ),
+            ],
+            options={
+                "verbose_name": "Необработанная задача",
+                "verbose_name_plural": "Необработанные задачи",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("replayed_at__isnull", True)),
+                        fields=["error_type", "id"],
+                        name="dead_letter_pending_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
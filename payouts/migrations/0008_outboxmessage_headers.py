@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payouts", "0007_deadletter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="headers",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Заголовки сообщения Celery, например контекст трассировки",
+                verbose_name="Заголовки",
+            ),
+        ),
+    ]
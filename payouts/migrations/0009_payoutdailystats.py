@@ -0,0 +1,51 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payouts", "0008_outboxmessage_headers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayoutDailyStats",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("day", models.DateField(verbose_name="День")),
+                (
+                    "currency",
+                    models.CharField(
+                        choices=[("RUB", "Российский рубль"), ("USD", "Доллар США"), ("EUR", "Евро")],
+                        max_length=3,
+                        verbose_name="Валюта",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В ожидании"),
+                            ("processing", "В обработке"),
+                            ("success", "Выполнена"),
+                            ("failed", "Ошибка"),
+                            ("canceled", "Отменена"),
+                        ],
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(verbose_name="Количество выплат")),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=20, verbose_name="Сумма выплат")),
+                ("refreshed_at", models.DateTimeField(verbose_name="Дата пересчёта")),
+            ],
+            options={
+                "verbose_name": "Статистика выплат за день",
+                "verbose_name_plural": "Статистика выплат по дням",
+                "constraints": [
+                    models.UniqueConstraint(fields=("day", "currency", "status"), name="payout_stats_day_uniq"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("payouts", "0009_payoutdailystats"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="payout",
+            index=models.Index(fields=["updated_at"], name="payout_updated_at_idx"),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+from payouts.validators import get_recipient_key
+
+BATCH_SIZE = 5_000
+
+
+def fill_recipient_keys(apps, schema_editor):
+    """Keyset batches over id, each saved in its own transaction, so locks stay short on a large table."""
+    Payout = apps.get_model("payouts", "Payout")
+    last_id = None
+    while True:
+        payouts = Payout.objects.filter(recipient_key="").order_by("id").only("id", "recipient_details")
+        if last_id is not None:
+            payouts = payouts.filter(id__gt=last_id)
+        batch = list(payouts[:BATCH_SIZE])
+        if not batch:
+            return
+
+        for payout in batch:
+            payout.recipient_key = get_recipient_key(payout.recipient_details)
+        Payout.objects.bulk_update(batch, ["recipient_key"], batch_size=1_000)
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("payouts", "0010_payout_updated_at_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payout",
+            name="recipient_key",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="HMAC номера карты из реквизитов, для поиска выплат получателя",
+                max_length=64,
+                verbose_name="Ключ получателя",
+            ),
+        ),
+        migrations.RunPython(fill_recipient_keys, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("payouts", "0011_payout_recipient_key"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="payout",
+            index=models.Index(
+                condition=models.Q(("recipient_key", ""), _negated=True),
+                fields=["recipient_key", "created_at", "id"],
+                name="payout_recipient_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:10
+
+import uuid
+from decimal import Decimal
+
+import django.core.validators
+import django.utils.timezone
+from django.db import migrations, models
+
+# Django cannot create partitioned tables: the table is created by hand, the model state as usual.
+# A partitioned table's primary key must include the partition key. Nullability follows the
+# payout table (comment is nullable there since 0001): rows are copied as they are.
+CREATE_ARCHIVE_TABLE = """
+CREATE TABLE payouts_archivedpayout (
+    id uuid NOT NULL,
+    amount numeric(12, 2) NOT NULL,
+    currency varchar(3) NOT NULL,
+    recipient_details jsonb NOT NULL,
+    recipient_key varchar(64) NOT NULL,
+    status varchar(20) NOT NULL,
+    comment text,
+    priority varchar(10) NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL,
+    archived_at timestamp with time zone NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at)
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payouts", "0012_payout_recipient_created_idx"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(CREATE_ARCHIVE_TABLE, "DROP TABLE payouts_archivedpayout"),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name="ArchivedPayout",
+                    fields=[
+                        ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                        (
+                            "amount",
+                            models.DecimalField(
+                                decimal_places=2,
+                                max_digits=12,
+                                validators=[django.core.validators.MinValueValidator(Decimal("0.01"))],
+                                verbose_name="Сумма выплаты",
+                            ),
+                        ),
+                        (
+                            "currency",
+                            models.CharField(
+                                choices=[("RUB", "Российский рубль"), ("USD", "Доллар США"), ("EUR", "Евро")],
+                                default="RUB",
+                                max_length=3,
+                                verbose_name="Валюта",
+                            ),
+                        ),
+                        (
+                            "recipient_details",
+                            models.JSONField(
+                                help_text='Пример: {"card_number": "1234...", "account_id": "408..."}',
+                                verbose_name="Реквизиты получателя",
+                            ),
+                        ),
+                        (
+                            "recipient_key",
+                            models.CharField(
+                                blank=True,
+                                default="",
+                                editable=False,
+                                help_text="HMAC номера карты из реквизитов, для поиска выплат получателя",
+                                max_length=64,
+                                verbose_name="Ключ получателя",
+                            ),
+                        ),
+                        (
+                            "status",
+                            models.CharField(
+                                choices=[
+                                    ("pending", "В ожидании"),
+                                    ("processing", "В обработке"),
+                                    ("success", "Выполнена"),
+                                    ("failed", "Ошибка"),
+                                    ("canceled", "Отменена"),
+                                ],
+                                default="pending",
+                                max_length=20,
+                                verbose_name="Статус",
+                            ),
+                        ),
+                        ("comment", models.TextField(blank=True, max_length=255, null=True, verbose_name="Комментарий")),
+                        (
+                            "priority",
+                            models.CharField(
+                                choices=[("urgent", "Срочная"), ("normal", "Обычная"), ("bulk", "Массовая")],
+                                default="normal",
+                                help_text="Очередь обработки: срочные выплаты не ждут массовых загрузок",
+                                max_length=10,
+                                verbose_name="Приоритет",
+                            ),
+                        ),
+                        ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                        ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Дата обновления")),
+                        (
+                            "archived_at",
+                            models.DateTimeField(default=django.utils.timezone.now, verbose_name="Дата архивации"),
+                        ),
+                    ],
+                    options={
+                        "verbose_name": "Архивная выплата",
+                        "verbose_name_plural": "Архивные выплаты",
+                        "ordering": ["-created_at", "-id"],
+                    },
+                ),
+            ],
+        ),
+    ]
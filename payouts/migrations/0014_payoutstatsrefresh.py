@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payouts", "0013_archivedpayout"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayoutStatsRefresh",
+            fields=[
+                ("id", models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ("refreshed_at", models.DateTimeField(verbose_name="Дата пересчёта")),
+            ],
+            options={
+                "verbose_name": "Пересчёт статистики выплат",
+                "verbose_name_plural": "Пересчёты статистики выплат",
+            },
+        ),
+    ]
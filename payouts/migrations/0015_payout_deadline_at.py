@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payouts", "0014_payoutstatsrefresh"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payout",
+            name="deadline_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="Задаётся при импорте; без него срок считается от даты создания",
+                null=True,
+                verbose_name="Крайний срок",
+            ),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.0.14 on 2026-10-18 13:38
+
+import uuid
+from decimal import Decimal
+
+import django.core.validators
+from django.db import migrations, models
+
+PAYOUT_COLUMNS = (
+    "id, amount, currency, recipient_details, recipient_key, status, comment, priority, created_at, updated_at"
+)
+# A payout is moved to the archive by one statement (DELETE ... RETURNING feeding an INSERT),
+# so a snapshot sees it in exactly one of the tables.
+CREATE_HISTORY_VIEW = f"""
+CREATE VIEW payouts_payouthistory AS
+SELECT {PAYOUT_COLUMNS} FROM payouts_payout
+UNION ALL
+SELECT {PAYOUT_COLUMNS} FROM payouts_archivedpayout
+"""
+# The indexes the payout table has for the same queries; created on every partition.
+CREATE_ARCHIVE_INDEXES = """
+CREATE INDEX payout_archive_created_idx ON payouts_archivedpayout (created_at, id);
+CREATE INDEX payout_archive_recipient_idx ON payouts_archivedpayout (recipient_key, created_at, id)
+    WHERE recipient_key <> ''
+"""
+DROP_ARCHIVE_INDEXES = "DROP INDEX payout_archive_created_idx; DROP INDEX payout_archive_recipient_idx"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payouts", "0015_payout_deadline_at"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_ARCHIVE_INDEXES, DROP_ARCHIVE_INDEXES),
+        migrations.RunSQL(CREATE_HISTORY_VIEW, "DROP VIEW payouts_payouthistory"),
+        migrations.CreateModel(
+            name="PayoutHistory",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=12,
+                        validators=[django.core.validators.MinValueValidator(Decimal("0.01"))],
+                        verbose_name="Сумма выплаты",
+                    ),
+                ),
+                (
+                    "currency",
+                    models.CharField(
+                        choices=[("RUB", "Российский рубль"), ("USD", "Доллар США"), ("EUR", "Евро")],
+                        default="RUB",
+                        max_length=3,
+                        verbose_name="Валюта",
+                    ),
+                ),
+                (
+                    "recipient_details",
+                    models.JSONField(
+                        help_text='Пример: {"card_number": "1234...", "account_id": "408..."}',
+                        verbose_name="Реквизиты получателя",
+                    ),
+                ),
+                (
+                    "recipient_key",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        editable=False,
+                        help_text="HMAC номера карты из реквизитов, для поиска выплат получателя",
+                        max_length=64,
+                        verbose_name="Ключ получателя",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В ожидании"),
+                            ("processing", "В обработке"),
+                            ("success", "Выполнена"),
+                            ("failed", "Ошибка"),
+                            ("canceled", "Отменена"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("comment", models.TextField(blank=True, max_length=255, null=True, verbose_name="Комментарий")),
+                (
+                    "priority",
+                    models.CharField(
+                        choices=[("urgent", "Срочная"), ("normal", "Обычная"), ("bulk", "Массовая")],
+                        default="normal",
+                        help_text="Очередь обработки: срочные выплаты не ждут массовых загрузок",
+                        max_length=10,
+                        verbose_name="Приоритет",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Дата обновления")),
+            ],
+            options={
+                "verbose_name": "Выплата (с архивом)",
+                "verbose_name_plural": "Выплаты (с архивом)",
+                "db_table": "payouts_payouthistory",
+                "ordering": ["-created_at", "-id"],
+                "managed": False,
+            },
+        ),
+    ]
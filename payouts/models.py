@@ -1,14 +1,33 @@
 import uuid
+from datetime import datetime, timedelta
+from typing import Any
 
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from payouts.choices import CurrencyChoices, PayoutStatus
-from payouts.constants import MIN_PAYOUT_AMOUNT
+from payouts.choices import CurrencyChoices, PayoutPriority, PayoutStatus
+from payouts.constants import ACTIVE_PAYOUT_STATUSES, MIN_PAYOUT_AMOUNT, PAYOUT_STATUS_SOURCES
+from payouts.validators import get_recipient_key
 
 
-class Payout(models.Model):
+class PayoutQuerySet(models.QuerySet):
+    def transition(self, status: str, **fields: Any) -> int:
+        """Move payouts to ``status`` with one conditional UPDATE.
+
+        Only rows whose current status allows the move (see PAYOUT_STATUS_TRANSITIONS)
+        are changed, so concurrent writers cannot overwrite each other's transitions.
+        Returns the number of changed rows.
+        """
+        fields.setdefault("updated_at", timezone.now())
+        return self.filter(status__in=PAYOUT_STATUS_SOURCES[status]).update(status=status, **fields)
+
+
+class BasePayout(models.Model):
+    """Fields of a payout, shared by live and archived payouts."""
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     amount = models.DecimalField(
         max_digits=12,
@@ -26,20 +45,250 @@ class Payout(models.Model):
         verbose_name=_("Реквизиты получателя"),
         help_text=_('Пример: {"card_number": "1234...", "account_id": "408..."}'),
     )
+    recipient_key = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name=_("Ключ получателя"),
+        help_text=_("HMAC номера карты из реквизитов, для поиска выплат получателя"),
+    )
     status = models.CharField(
         max_length=20,
         choices=PayoutStatus.choices,
         default=PayoutStatus.PENDING,
         verbose_name=_("Статус"),
     )
-    comment = models.TextField(max_length=255, blank=True, verbose_name=_("Комментарий"))
+    comment = models.TextField(max_length=255, blank=True, null=True, verbose_name=_("Комментарий"))
+    priority = models.CharField(
+        max_length=10,
+        choices=PayoutPriority.choices,
+        default=PayoutPriority.NORMAL,
+        verbose_name=_("Приоритет"),
+        help_text=_("Очередь обработки: срочные выплаты не ждут массовых загрузок"),
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Дата создания"))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Дата обновления"))
 
+    class Meta:
+        abstract = True
+
+    def __str__(self) -> str:
+        return f"Payout {self.id} ({self.amount} {self.currency})"
+
+
+class Payout(BasePayout):
+    deadline_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_("Крайний срок"),
+        help_text=_("Задаётся при импорте; без него срок считается от даты создания"),
+    )
+
+    objects = PayoutQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Выплата")
         verbose_name_plural = _("Выплаты")
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=("created_at", "id"), name="payout_created_at_id_idx"),
+            models.Index(fields=("status", "created_at", "id"), name="payout_status_created_idx"),
+            models.Index(fields=("currency", "status", "created_at"), name="payout_currency_status_idx"),
+            models.Index(
+                fields=("status", "created_at", "id"),
+                condition=models.Q(status__in=ACTIVE_PAYOUT_STATUSES),
+                name="payout_active_status_idx",
+            ),
+            models.Index(fields=("updated_at",), name="payout_updated_at_idx"),
+            models.Index(
+                fields=("recipient_key", "created_at", "id"),
+                condition=~models.Q(recipient_key=""),
+                name="payout_recipient_created_idx",
+            ),
+        ]
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        self.recipient_key = get_recipient_key(self.recipient_details)
+        super().save(*args, **kwargs)
+
+    @property
+    def deadline(self) -> datetime:
+        """Time by which the payout must reach the gateway, see PAYOUT_DEADLINES.
+
+        Counted from creation, or stored in ``deadline_at`` for payouts imported with a
+        ``created_at`` of their own (see payouts.importer).
+        """
+        if self.deadline_at is not None:
+            return self.deadline_at
+        return self.created_at + timedelta(seconds=settings.PAYOUT_DEADLINES[self.priority])
+
+    def transition(self, status: str, **fields: Any) -> bool:
+        """Atomically move this payout to ``status`` and update the instance on success."""
+        fields.setdefault("updated_at", timezone.now())
+        if not Payout.objects.filter(pk=self.pk).transition(status, **fields):
+            return False
+
+        self.status = status
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
+
+
+class ArchivedPayout(BasePayout):
+    """A finalized payout moved out of the payout table by ``payouts.archive.archive_payouts``.
+
+    The table is range-partitioned by month of ``created_at`` (primary key ``(id, created_at)``),
+    see migration 0013; partitions are created as rows are moved and can be detached once
+    the archive no longer needs them.
+    """
+
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name=_("Дата архивации"))
+
+    class Meta:
+        verbose_name = _("Архивная выплата")
+        verbose_name_plural = _("Архивные выплаты")
+        ordering = ["-created_at", "-id"]
+
+
+class PayoutHistory(BasePayout):
+    """Live and archived payouts together: a read-only UNION ALL view over both tables.
+
+    Lists, the export and the recipient lookup read it, so payouts do not drop out of
+    them once archived. Filters and the keyset condition are pushed down into both
+    tables, each scanned by its ``(created_at, id)`` index; see migration 0016.
+    """
+
+    class Meta:
+        managed = False
+        db_table = "payouts_payouthistory"
+        verbose_name = _("Выплата (с архивом)")
+        verbose_name_plural = _("Выплаты (с архивом)")
+        ordering = ["-created_at", "-id"]
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255, primary_key=True, verbose_name=_("Ключ идемпотентности"))
+    payout = models.OneToOneField(
+        Payout,
+        on_delete=models.CASCADE,
+        related_name="idempotency_key",
+        verbose_name=_("Выплата"),
+    )
+    request_hash = models.CharField(max_length=64, verbose_name=_("Хэш запроса"))
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name=_("Дата создания"))
+
+    class Meta:
+        verbose_name = _("Ключ идемпотентности")
+        verbose_name_plural = _("Ключи идемпотентности")
 
     def __str__(self) -> str:
-        return f"Payout {self.id} ({self.amount} {self.currency})"
+        return f"IdempotencyKey {self.key} ({self.payout_id})"
+
+
+class OutboxMessage(models.Model):
+    """Celery message stored in the same transaction as the payouts it refers to.
+
+    Messages are published to the broker by the outbox relay (``manage.py relay_outbox``).
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    task_name = models.CharField(max_length=255, verbose_name=_("Задача"))
+    args = models.JSONField(default=list, verbose_name=_("Аргументы"))
+    queue = models.CharField(max_length=100, blank=True, verbose_name=_("Очередь"))
+    headers = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_("Заголовки"),
+        help_text=_("Заголовки сообщения Celery, например контекст трассировки"),
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Дата создания"))
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Дата отправки"))
+
+    class Meta:
+        verbose_name = _("Исходящее сообщение")
+        verbose_name_plural = _("Исходящие сообщения")
+        indexes = [
+            models.Index(fields=("id",), condition=models.Q(sent_at__isnull=True), name="outbox_unsent_idx"),
+            models.Index(fields=("sent_at",), condition=models.Q(sent_at__isnull=False), name="outbox_sent_at_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"OutboxMessage {self.id} ({self.task_name})"
+
+
+class DeadLetter(models.Model):
+    """Task that ran out of retries, kept for inspection and replay.
+
+    The payouts of the task are returned to PENDING; ``manage.py replay_dead_letters``
+    sends the task again through the outbox.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    task_name = models.CharField(max_length=255, verbose_name=_("Задача"))
+    args = models.JSONField(default=list, verbose_name=_("Аргументы"))
+    queue = models.CharField(max_length=100, blank=True, verbose_name=_("Очередь"))
+    error_type = models.CharField(max_length=255, verbose_name=_("Тип ошибки"))
+    error = models.TextField(blank=True, verbose_name=_("Ошибка"))
+    retries = models.PositiveIntegerField(default=0, verbose_name=_("Число повторов"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Дата создания"))
+    replayed_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Дата повторной отправки"))
+
+    class Meta:
+        verbose_name = _("Необработанная задача")
+        verbose_name_plural = _("Необработанные задачи")
+        indexes = [
+            models.Index(
+                fields=("error_type", "id"),
+                condition=models.Q(replayed_at__isnull=True),
+                name="dead_letter_pending_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"DeadLetter {self.id} ({self.task_name}, {self.error_type})"
+
+
+class PayoutDailyStats(models.Model):
+    """Number and total amount of payouts created on ``day``, by currency and current status.
+
+    A rollup of the payout table maintained by ``payouts.stats.refresh_payout_stats``:
+    reports read a few rows per day instead of scanning the payouts.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    day = models.DateField(verbose_name=_("День"))
+    currency = models.CharField(max_length=3, choices=CurrencyChoices.choices, verbose_name=_("Валюта"))
+    status = models.CharField(max_length=20, choices=PayoutStatus.choices, verbose_name=_("Статус"))
+    count = models.PositiveIntegerField(verbose_name=_("Количество выплат"))
+    amount = models.DecimalField(max_digits=20, decimal_places=2, verbose_name=_("Сумма выплат"))
+    refreshed_at = models.DateTimeField(verbose_name=_("Дата пересчёта"))
+
+    class Meta:
+        verbose_name = _("Статистика выплат за день")
+        verbose_name_plural = _("Статистика выплат по дням")
+        constraints = [
+            models.UniqueConstraint(fields=("day", "currency", "status"), name="payout_stats_day_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"PayoutDailyStats {self.day} {self.currency} {self.status}: {self.count}"
+
+
+class PayoutStatsRefresh(models.Model):
+    """Watermark of ``payouts.stats.refresh_payout_stats``, a single row.
+
+    Moved only after a refresh recomputed every changed day: a refresh interrupted
+    halfway leaves it, and the next one picks up the days it did not reach.
+    """
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    refreshed_at = models.DateTimeField(verbose_name=_("Дата пересчёта"))
+
+    class Meta:
+        verbose_name = _("Пересчёт статистики выплат")
+        verbose_name_plural = _("Пересчёты статистики выплат")
+
+    def __str__(self) -> str:
+        return f"PayoutStatsRefresh {self.refreshed_at}"
@@ -0,0 +1,55 @@
+import logging
+from datetime import timedelta
+
+from celery import current_app
+from django.db import transaction
+from django.utils import timezone
+from opentelemetry.trace import SpanKind
+
+from core.tracing import continue_trace, inject_context
+from payouts.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def relay_outbox(batch_size: int) -> int:
+    """Publish up to ``batch_size`` unsent messages and mark them sent.
+
+    Rows are locked with SKIP LOCKED, so several relays can run side by side. A message
+    is marked sent only after the broker accepted the whole batch: if publishing fails,
+    the batch is published again later (at-least-once delivery).
+
+    Publishing is a span of the trace the message was written in, so the time between
+    it and the task span is spent in the broker queue.
+    """
+    with transaction.atomic():
+        messages: list[OutboxMessage] = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(sent_at__isnull=True)
+            .order_by("id")[:batch_size],
+        )
+        if not messages:
+            return 0
+
+        with current_app.producer_or_acquire() as producer:
+            for message in messages:
+                with continue_trace(message.headers, "outbox publish", kind=SpanKind.PRODUCER):
+                    current_app.send_task(
+                        message.task_name,
+                        args=message.args,
+                        queue=message.queue or None,
+                        headers=inject_context(),
+                        producer=producer,
+                    )
+
+        OutboxMessage.objects.filter(id__in=[message.id for message in messages]).update(sent_at=timezone.now())
+
+    logger.info("%s outbox messages sent to Celery worker.", len(messages))
+    return len(messages)
+
+
+def purge_outbox(retention: timedelta, batch_size: int) -> int:
+    """Delete up to ``batch_size`` messages sent earlier than ``retention`` ago."""
+    expired_ids = OutboxMessage.objects.filter(sent_at__lt=timezone.now() - retention).values("id")[:batch_size]
+    deleted, _ = OutboxMessage.objects.filter(id__in=expired_ids).delete()
+    return deleted
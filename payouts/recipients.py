@@ -0,0 +1,59 @@
+"""Duplicate payout guard: the same amount to the same card twice within PAYOUT_DUPLICATE_WINDOW."""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from payouts.choices import PayoutStatus
+from payouts.exceptions import DuplicatePayoutError
+from payouts.models import Payout
+
+# Payouts that did not pay the recipient: the same payout may be created again.
+UNPAID_PAYOUT_STATUSES = (PayoutStatus.FAILED, PayoutStatus.CANCELED)
+
+
+def lock_recipient(recipient_key: str) -> None:
+    """Serialize creates for one recipient until the end of the current transaction."""
+    lock_id = int.from_bytes(bytes.fromhex(recipient_key[:16]), signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [lock_id])
+
+
+def find_duplicate_payout(recipient_key: str, amount: Decimal, currency: str) -> Payout | None:
+    """The latest payout of ``amount`` to the recipient within PAYOUT_DUPLICATE_WINDOW.
+
+    An index range scan over the recipient's payouts of the window
+    (payout_recipient_created_idx), however large the table is.
+    """
+    created_after = timezone.now() - timedelta(seconds=settings.PAYOUT_DUPLICATE_WINDOW)
+    return (
+        Payout.objects.filter(
+            recipient_key=recipient_key,
+            created_at__gte=created_after,
+            amount=amount,
+            currency=currency,
+        )
+        .exclude(status__in=UNPAID_PAYOUT_STATUSES)
+        .only("id")
+        .first()
+    )
+
+
+def check_duplicate_payout(recipient_key: str, amount: Decimal, currency: str) -> None:
+    """Raise DuplicatePayoutError if the payout repeats one created within PAYOUT_DUPLICATE_WINDOW.
+
+    Must run in the transaction that creates the payout: the recipient stays locked
+    until it ends, so concurrent identical requests cannot both pass the check.
+    """
+    if not settings.PAYOUT_DUPLICATE_WINDOW or not recipient_key:
+        return
+
+    lock_recipient(recipient_key)
+    duplicate = find_duplicate_payout(recipient_key, amount, currency)
+    if duplicate is not None:
+        minutes = settings.PAYOUT_DUPLICATE_WINDOW // 60
+        msg = f"Выплата {duplicate.id} на эту карту на ту же сумму уже создана за последние {minutes} мин."
+        raise DuplicatePayoutError(msg)
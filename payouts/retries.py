@@ -0,0 +1,94 @@
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any
+
+from celery import Task
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from payouts.cache import invalidate_payouts
+from payouts.choices import PayoutStatus
+from payouts.constants import RETRY_DATABASE, RETRY_DEFERRED, RETRY_UNEXPECTED
+from payouts.exceptions import GatewayBusyError, GatewayUnavailableError
+from payouts.models import DeadLetter, OutboxMessage, Payout
+
+logger = logging.getLogger(__name__)
+
+# Errors of payouts that never reached the gateway.
+DEFERRAL_ERRORS = (GatewayBusyError, GatewayUnavailableError)
+
+RETRY_KINDS: tuple[tuple[tuple[type[BaseException], ...], str], ...] = (
+    (DEFERRAL_ERRORS, RETRY_DEFERRED),
+    ((DatabaseError, InterfaceError), RETRY_DATABASE),
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    delay: float
+    max_delay: float
+    max_retries: int | None = None
+
+    def get_countdown(self, retries: int) -> float:
+        """Exponential backoff with full jitter: a random delay up to ``delay * 2 ** retries``.
+
+        Tasks that failed together spread over the whole interval instead of retrying
+        in the same second.
+        """
+        return random.uniform(0, min(self.max_delay, self.delay * 2**retries))
+
+    def exhausted(self, retries: int) -> bool:
+        return self.max_retries is not None and retries >= self.max_retries
+
+
+def get_retry_kind(exc: BaseException) -> str:
+    return next((kind for errors, kind in RETRY_KINDS if isinstance(exc, errors)), RETRY_UNEXPECTED)
+
+
+def get_retry_policy(exc: BaseException) -> RetryPolicy:
+    return RetryPolicy(**settings.PAYOUT_TASK_RETRY_POLICIES[get_retry_kind(exc)])
+
+
+def dead_letter(task: Task, args: list[Any], exc: BaseException, payout_ids: list[str]) -> None:
+    """Store a task that ran out of retries and return its payouts to PENDING."""
+    delivery_info: dict[str, Any] = task.request.delivery_info or {}
+    try:
+        with transaction.atomic():
+            DeadLetter.objects.create(
+                task_name=task.name,
+                args=args,
+                queue=delivery_info.get("routing_key") or "",
+                error_type=type(exc).__name__,
+                error=str(exc),
+                retries=task.request.retries,
+            )
+            released = Payout.objects.filter(id__in=payout_ids).transition(
+                PayoutStatus.PENDING,
+                comment=f"Processing stopped after {task.request.retries} retries: {type(exc).__name__}",
+            )
+            invalidate_payouts(payout_ids)
+    except DatabaseError:
+        # The database may be the reason the task gave up: the log is the last resort.
+        logger.critical("Could not dead-letter %s%r after %r", task.name, args, exc, exc_info=True)
+        return
+
+    logger.error("%s%r dead-lettered after %s retries: %r", task.name, args, task.request.retries, exc)
+    logger.info("%s payouts returned to PENDING", released)
+
+
+def replay_dead_letters(dead_letters: QuerySet[DeadLetter]) -> int:
+    """Send not yet replayed tasks of ``dead_letters`` again through the outbox."""
+    with transaction.atomic():
+        replayed: list[DeadLetter] = list(
+            dead_letters.select_for_update(skip_locked=True).filter(replayed_at__isnull=True).order_by("id"),
+        )
+        OutboxMessage.objects.bulk_create(
+            OutboxMessage(task_name=entry.task_name, args=entry.args, queue=entry.queue) for entry in replayed
+        )
+        DeadLetter.objects.filter(id__in=[entry.id for entry in replayed]).update(replayed_at=timezone.now())
+
+    logger.info("%s dead-lettered tasks replayed", len(replayed))
+    return len(replayed)
@@ -0,0 +1,128 @@
+"""Daily payout statistics (PayoutDailyStats), refreshed from the payout table in deltas.
+
+Every status change stamps ``updated_at``, so the days whose rollups are out of date
+are the creation days of payouts updated since the last refresh. Only those days are
+recomputed, each with a range scan of one day of payouts. Counters are not bumped on
+every create and transition: all payouts of a day would update the same few rollup
+rows and queue on their locks.
+
+Payouts moved to the archive (see payouts.archive) are counted on the days they were created.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from payouts.models import ArchivedPayout, Payout, PayoutDailyStats, PayoutStatsRefresh
+
+logger = logging.getLogger(__name__)
+
+
+def get_stats_refreshed_at() -> datetime | None:
+    """Start of the last completed refresh: the watermark of the next one."""
+    return PayoutStatsRefresh.objects.values_list("refreshed_at", flat=True).first()
+
+
+def set_stats_refreshed_at(refreshed_at: datetime) -> None:
+    """Move the watermark forward; a refresh that started earlier but ended later leaves it."""
+    if not PayoutStatsRefresh.objects.filter(refreshed_at__lt=refreshed_at).update(refreshed_at=refreshed_at):
+        PayoutStatsRefresh.objects.get_or_create(defaults={"refreshed_at": refreshed_at})
+
+
+def get_changed_days(since: datetime | None) -> list[date]:
+    """Creation days of the payouts updated from ``since`` on, of all payouts without it.
+
+    ``since`` is moved back by PAYOUT_STATS_REFRESH_OVERLAP: a transaction that commits
+    after a refresh started may have stamped its rows before that. Archived payouts are
+    final and never updated, so they only add days without ``since``.
+    """
+    if since is not None:
+        updated_after = since - timedelta(seconds=settings.PAYOUT_STATS_REFRESH_OVERLAP)
+        return list(Payout.objects.filter(updated_at__gte=updated_after).dates("created_at", "day"))
+
+    days = set(Payout.objects.dates("created_at", "day"))
+    days.update(ArchivedPayout.objects.dates("created_at", "day"))
+    return sorted(days)
+
+
+def refresh_payout_stats(full: bool = False) -> int:
+    """Recompute the rollups of days with payouts changed since the last refresh.
+
+    With ``full`` every day is recomputed and rollups of days without payouts are dropped.
+    Every day is committed on its own; the watermark moves once all of them are, so a
+    failed or interrupted refresh is resumed by the next one. Returns the number of
+    recomputed days.
+    """
+    refreshed_at = timezone.now()
+    days = get_changed_days(None if full else get_stats_refreshed_at())
+    for day in days:
+        recompute_day(day, refreshed_at)
+    if full:
+        PayoutDailyStats.objects.exclude(day__in=days).delete()
+    set_stats_refreshed_at(refreshed_at)
+
+    logger.info("Payout stats of %s days refreshed", len(days))
+    return len(days)
+
+
+def get_day_totals(day: date) -> dict[tuple[str, str], PayoutDailyStats]:
+    """Count and amount of payouts created on ``day``, live and archived, by currency and status."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    totals: dict[tuple[str, str], PayoutDailyStats] = {}
+    for model in (Payout, ArchivedPayout):
+        rows = (
+            model.objects.filter(created_at__gte=start, created_at__lt=start + timedelta(days=1))
+            .order_by()
+            .values_list("currency", "status")
+            .annotate(count=Count("id"), amount=Sum("amount"))
+        )
+        for currency, status, count, amount in rows:
+            entry = totals.setdefault(
+                (currency, status),
+                PayoutDailyStats(day=day, currency=currency, status=status, count=0, amount=Decimal(0)),
+            )
+            entry.count += count
+            entry.amount += amount
+    return totals
+
+
+def lock_day(day: date) -> None:
+    """Serialize refreshes of ``day`` until the end of the current transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s::regclass::oid::int, %s)",
+            [PayoutDailyStats._meta.db_table, day.toordinal()],
+        )
+
+
+def recompute_day(day: date, refreshed_at: datetime) -> None:
+    with transaction.atomic():
+        # Overlapping refreshes of the day take turns: otherwise one could delete the rows
+        # the other has just written, or overwrite them with totals read earlier.
+        lock_day(day)
+        stats = list(get_day_totals(day).values())
+        for entry in stats:
+            entry.refreshed_at = refreshed_at
+        PayoutDailyStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=("day", "currency", "status"),
+            update_fields=("count", "amount", "refreshed_at"),
+        )
+        # Combinations without payouts left, e.g. all PENDING payouts of the day were processed.
+        PayoutDailyStats.objects.filter(day=day).exclude(refreshed_at=refreshed_at).delete()
+
+
+def get_payout_stats(date_from: date, date_to: date, **filters: str) -> list[PayoutDailyStats]:
+    return list(
+        PayoutDailyStats.objects.filter(day__gte=date_from, day__lte=date_to, **filters).order_by(
+            "day",
+            "currency",
+            "status",
+        ),
+    )
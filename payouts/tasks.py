@@ -1,24 +1,129 @@
-import time
+import asyncio
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any
 
 from celery import Task, shared_task
+from celery.exceptions import Retry
 from celery.utils.log import get_task_logger
 from django.conf import settings
-from django.db import DatabaseError, InterfaceError
+from django.db import DatabaseError, InterfaceError, transaction
+from django.utils import timezone
+from opentelemetry.trace import SpanKind
 
+from core.tracing import continue_trace, tracer
+from payouts.archive import archive_payouts, detach_archive_partitions
+from payouts.breaker import gateway_circuit
+from payouts.cache import cache_payouts
 from payouts.choices import PayoutStatus
 from payouts.constants import (
+    TASK_RESULT_DEAD_LETTER,
+    TASK_RESULT_DEFERRED,
+    TASK_RESULT_EXPIRED,
     TASK_RESULT_NOT_FOUND,
+    TASK_RESULT_SKIPPED,
     TASK_RESULT_SUCCESS,
     TASK_RESULT_TIMEOUT,
 )
-from payouts.exceptions import GatewayTimeoutError, PayoutNotFoundError
+from payouts.exceptions import GatewayTimeoutError, PayoutExpiredError, PayoutNotFoundError
+from payouts.gateway import asend_payout, check_deadline, send_payout
+from payouts.idempotency import purge_idempotency_keys
+from payouts.limiter import agateway_slot, gateway_slot
+from payouts.metrics import TaskMetrics, count_results, count_retry, get_task_label, track_task
 from payouts.models import Payout
+from payouts.retries import DEFERRAL_ERRORS, dead_letter, get_retry_kind, get_retry_policy
+from payouts.stats import refresh_payout_stats
 
 logger = get_task_logger(__name__)
 
 
-@shared_task(bind=True)
+# Retries are limited by the retry policies of payouts.retries, not by Celery.
+@shared_task(bind=True, max_retries=None)
 def process_payout_task(self: Task, payout_id: str) -> str:
+    with (
+        continue_trace(self.request.headers, self.name, kind=SpanKind.CONSUMER),
+        track_task(get_task_label(self.name)) as metrics,
+    ):
+        result = process_payout(self, payout_id, metrics)
+    count_results(metrics.task, [result])
+    return result
+
+
+@shared_task(bind=True, max_retries=None)
+def process_payout_batch_task(self: Task, payout_ids: list[str]) -> dict[str, str]:
+    """Process many payouts in one worker process.
+
+    Gateway calls run concurrently in an event loop (up to PAYOUT_GATEWAY_CONCURRENCY
+    in flight and within the cluster-wide limit of payouts.limiter), so the process is
+    not blocked for the whole gateway delay of every payout. Status transitions and
+    results are the same as in ``process_payout_task``.
+    """
+    with (
+        continue_trace(self.request.headers, self.name, kind=SpanKind.CONSUMER),
+        track_task(get_task_label(self.name)) as metrics,
+    ):
+        results = process_payout_batch(self, payout_ids, metrics)
+    count_results(metrics.task, results.values())
+    return results
+
+
+@shared_task(bind=True)
+def claim_payouts_task(self: Task) -> int:
+    """Drain PENDING payouts straight from the table.
+
+    Every iteration claims a batch with ``claim_pending_payouts`` and processes it like
+    ``process_payout_batch_task``. Any number of workers can run this concurrently:
+    locked rows are skipped, so no payout is processed twice.
+    """
+    processed = 0
+
+    with tracer.start_as_current_span(self.name), track_task(get_task_label(self.name)) as metrics:
+        for _ in range(settings.PAYOUT_CLAIM_MAX_BATCHES):
+            payouts = claim_pending_payouts(settings.PAYOUT_CLAIM_BATCH_SIZE)
+            if not payouts:
+                break
+
+            with metrics.waiting_for_gateway(), tracer.start_as_current_span("gateway wait"):
+                responses = asyncio.run(send_payouts(payouts))
+            results, errors = finish_payouts(payouts, responses)
+            count_results(metrics.task, results.values())
+            # Deferred payouts are PENDING already.
+            failed = [payout for payout in payouts if str(payout.id) in errors and str(payout.id) not in results]
+            if failed:
+                released = transition_payouts(failed, PayoutStatus.PENDING)
+                logger.info("%s payouts returned to PENDING", len(released))
+
+            processed += len(payouts) - len(errors)
+            if len(errors) > len(failed) or len(failed) == len(payouts):
+                # The gateway is unavailable or saturated: leave the rest for the next run.
+                break
+
+    logger.info("Claimed and processed %s payouts", processed)
+    return processed
+
+
+@shared_task
+def purge_idempotency_keys_task() -> int:
+    return purge_idempotency_keys()
+
+
+@shared_task
+def archive_payouts_task() -> int:
+    now = timezone.now()
+    archived = archive_payouts(
+        now - timedelta(seconds=settings.PAYOUT_ARCHIVE_AFTER), settings.PAYOUT_ARCHIVE_BATCH_SIZE
+    )
+    if settings.PAYOUT_ARCHIVE_RETENTION is not None:
+        detach_archive_partitions(now - timedelta(seconds=settings.PAYOUT_ARCHIVE_RETENTION))
+    return archived
+
+
+@shared_task
+def refresh_payout_stats_task() -> int:
+    return refresh_payout_stats()
+
+
+def process_payout(task: Task, payout_id: str, metrics: TaskMetrics) -> str:
     logger.info("Starting processing payout: %s", payout_id)
 
     try:
@@ -28,51 +133,245 @@ def process_payout_task(self: Task, payout_id: str) -> str:
             msg = f"Payout {payout_id} not found"
             raise PayoutNotFoundError(msg) from err
 
-        payout.status = PayoutStatus.PROCESSING
-        payout.save(update_fields=("status", "updated_at"))
-        logger.info("Payout %s status: PROCESSING", payout_id)
-
-        delay: int = settings.PAYOUT_GATEWAY_DELAY
-        timeout: int = settings.PAYOUT_PROCESSING_TIMEOUT
+        if not claim_payout(payout, retrying=bool(task.request.retries)):
+            logger.info("Payout %s cannot be processed from status %s, skipping", payout_id, payout.status)
+            return TASK_RESULT_SKIPPED
 
-        logger.info("Waiting for gateway response (%ss)...", delay)
-        time.sleep(delay)
-
-        if delay > timeout:
-            msg = f"Gateway timeout: {delay}s > {timeout}s"
-            raise GatewayTimeoutError(msg) from None
+        cache_payouts([payout])
+        logger.info("Payout %s status: PROCESSING", payout_id)
 
-        payout.status = PayoutStatus.SUCCESS
-        payout.comment = f"Successfully processed in {delay}s"
-        payout.save(update_fields=("status", "comment", "updated_at"))
+        # A payout that outlived its deadline in the queue does not take a gateway slot.
+        check_deadline(payout)
+        with (
+            metrics.waiting_for_gateway(),
+            tracer.start_as_current_span("gateway wait"),
+            gateway_circuit(),
+            gateway_slot(),
+        ):
+            delay = send_payout(payout)
 
-        logger.info("Payout %s status: SUCCESS", payout_id)
-        return TASK_RESULT_SUCCESS
+        return save_payout_result(
+            payout, PayoutStatus.SUCCESS, f"Successfully processed in {delay}s", TASK_RESULT_SUCCESS
+        )
 
     except PayoutNotFoundError:
         logger.exception("Payout %s not found", payout_id)
         return TASK_RESULT_NOT_FOUND
 
-    except GatewayTimeoutError as exc:
-        payout.status = PayoutStatus.FAILED
-        payout.comment = str(exc)
-        payout.save(update_fields=("status", "comment", "updated_at"))
+    except (GatewayTimeoutError, PayoutExpiredError) as exc:
+        result = TASK_RESULT_EXPIRED if isinstance(exc, PayoutExpiredError) else TASK_RESULT_TIMEOUT
+        return save_payout_result(payout, PayoutStatus.FAILED, str(exc), result)
+
+    except DEFERRAL_ERRORS as exc:
+        return defer_payout(task, payout, exc)
+
+    except Exception as exc:
+        logger.exception("Error processing payout %s", payout_id)
+        return retry_payouts(task, exc, [payout_id])
+
 
-        logger.info("Payout %s status: FAILED (Timeout)", payout_id)
-        return TASK_RESULT_TIMEOUT
+def process_payout_batch(task: Task, payout_ids: list[str], metrics: TaskMetrics) -> dict[str, str]:
+    logger.info("Starting processing batch of %s payouts", len(payout_ids))
+
+    try:
+        payouts, results = claim_payouts(payout_ids, retrying=bool(task.request.retries))
+        with metrics.waiting_for_gateway(), tracer.start_as_current_span("gateway wait"):
+            responses = asyncio.run(send_payouts(payouts))
+        finished, errors = finish_payouts(payouts, responses)
+        results.update(finished)
 
     except (DatabaseError, InterfaceError) as exc:
-        logger.exception("Database error for %s", payout_id)
-        raise self.retry(
-            exc=exc,
-            max_retries=settings.PAYOUT_TASK_MAX_RETRIES,
-            countdown=settings.PAYOUT_TASK_RETRY_DELAY,
-        ) from exc
+        logger.exception("Database error for batch of %s payouts", len(payout_ids))
+        return dict.fromkeys(payout_ids, retry_payouts(task, exc, payout_ids))
 
-    except Exception as exc:
-        logger.exception("Unexpected error for %s", payout_id)
-        raise self.retry(
-            exc=exc,
-            max_retries=settings.PAYOUT_TASK_MAX_RETRIES,
-            countdown=settings.PAYOUT_TASK_RETRY_DELAY,
-        ) from exc
+    for payout_id in payout_ids:
+        if payout_id not in results and payout_id not in errors:
+            logger.error("Payout %s not found", payout_id)
+            results[payout_id] = TASK_RESULT_NOT_FOUND
+
+    if errors:
+        # One retry for the rest of the batch: an unexpected error decides the policy over a deferral.
+        exc = next((exc for exc in errors.values() if not isinstance(exc, DEFERRAL_ERRORS)), None)
+        try:
+            retried = retry_payouts(task, exc or next(iter(errors.values())), list(errors))
+        except Retry:
+            # The task returns nothing: count the payouts finished or deferred by this run now.
+            count_results(metrics.task, results.values())
+            raise
+        results.update(dict.fromkeys(errors, retried))
+    return results
+
+
+def retry_payouts(task: Task, exc: BaseException, payout_ids: list[str]) -> str:
+    """Retry ``task`` for ``payout_ids`` after a backoff by the retry policy of ``exc``.
+
+    Once the policy's retries are exhausted, the task goes to the dead-letter table and
+    its payouts back to PENDING; TASK_RESULT_DEAD_LETTER is returned then.
+    """
+    args = [payout_ids[0]] if task.name == process_payout_task.name else [payout_ids]
+    policy = get_retry_policy(exc)
+    if policy.exhausted(task.request.retries):
+        dead_letter(task, args, exc, payout_ids)
+        return TASK_RESULT_DEAD_LETTER
+
+    count_retry(get_task_label(task.name), get_retry_kind(exc))
+    raise task.retry(exc=exc, args=args, countdown=policy.get_countdown(task.request.retries))
+
+
+def defer_payout(task: Task, payout: Payout, exc: BaseException) -> str:
+    """The payout never reached the gateway: it waits as PENDING until the gateway takes calls again."""
+    logger.info("Payout %s postponed: %s", payout.id, exc)
+    if save_payout_result(payout, PayoutStatus.PENDING, str(exc), TASK_RESULT_DEFERRED) == TASK_RESULT_SKIPPED:
+        return TASK_RESULT_SKIPPED
+    try:
+        return retry_payouts(task, exc, [str(payout.id)])
+    except Retry:
+        count_results(get_task_label(task.name), [TASK_RESULT_DEFERRED])
+        raise
+
+
+def save_payout_result(payout: Payout, status: str, comment: str, result: str) -> str:
+    """Move a processed payout to ``status``.
+
+    Returns ``result``, or TASK_RESULT_SKIPPED if the payout was changed during processing.
+    """
+    if not payout.transition(status, comment=comment):
+        logger.warning("Payout %s was changed during processing, %s not saved", payout.id, status.upper())
+        return TASK_RESULT_SKIPPED
+
+    cache_payouts([payout])
+    logger.info("Payout %s status: %s", payout.id, status.upper())
+    return result
+
+
+def claim_payout(payout: Payout, retrying: bool) -> bool:
+    """Messages are delivered at least once: only PENDING payouts are taken for processing.
+
+    A PROCESSING payout is picked up again only by a retry of the task that claimed it.
+    """
+    if retrying and payout.status == PayoutStatus.PROCESSING:
+        return True
+    return payout.transition(PayoutStatus.PROCESSING)
+
+
+def claim_payouts(payout_ids: list[str], retrying: bool) -> tuple[list[Payout], dict[str, str]]:
+    """Batch version of ``claim_payout``.
+
+    Returns the claimed payouts and TASK_RESULT_SKIPPED for the ones that cannot be processed.
+    """
+    skipped: dict[str, str] = {}
+    pending: list[Payout] = []
+    resumed: list[Payout] = []
+
+    with transaction.atomic():
+        for payout in Payout.objects.select_for_update().filter(id__in=payout_ids):
+            if payout.status == PayoutStatus.PENDING:
+                pending.append(payout)
+            elif retrying and payout.status == PayoutStatus.PROCESSING:
+                resumed.append(payout)
+            else:
+                skipped[str(payout.id)] = TASK_RESULT_SKIPPED
+
+        claimed = transition_payouts(pending, PayoutStatus.PROCESSING)
+
+    logger.info("%s payouts status: PROCESSING", len(claimed))
+    return [*claimed, *resumed], skipped
+
+
+def claim_pending_payouts(limit: int) -> list[Payout]:
+    """Lock up to ``limit`` oldest PENDING payouts and move them to PROCESSING."""
+    with transaction.atomic():
+        payouts: list[Payout] = list(
+            Payout.objects.select_for_update(skip_locked=True)
+            .filter(status=PayoutStatus.PENDING)
+            .order_by("created_at")[:limit],
+        )
+        claimed = transition_payouts(payouts, PayoutStatus.PROCESSING)
+
+    logger.info("%s payouts status: PROCESSING", len(claimed))
+    return claimed
+
+
+def transition_payouts(payouts: list[Payout], status: str, **fields: Any) -> list[Payout]:
+    """Move payouts to ``status`` with one conditional UPDATE.
+
+    Returns the payouts that were actually moved; they are updated in memory and in the cache.
+    """
+    if not payouts:
+        return []
+
+    fields.setdefault("updated_at", timezone.now())
+    payout_ids = [payout.id for payout in payouts]
+
+    updated = Payout.objects.filter(id__in=payout_ids).transition(status, **fields)
+    if updated != len(payouts):
+        # Someone else changed some of the rows first: keep those stamped by this UPDATE.
+        moved_ids = set(
+            Payout.objects.filter(id__in=payout_ids, status=status, updated_at=fields["updated_at"]).values_list(
+                "id",
+                flat=True,
+            ),
+        )
+        payouts = [payout for payout in payouts if payout.id in moved_ids]
+
+    for payout in payouts:
+        payout.status = status
+        for name, value in fields.items():
+            setattr(payout, name, value)
+
+    cache_payouts(payouts)
+    return payouts
+
+
+async def send_payouts(payouts: list[Payout]) -> list[int | BaseException]:
+    semaphore = asyncio.Semaphore(settings.PAYOUT_GATEWAY_CONCURRENCY)
+
+    async def send(payout: Payout) -> int:
+        check_deadline(payout)
+        async with semaphore:
+            with gateway_circuit():
+                async with agateway_slot():
+                    return await asend_payout(payout)
+
+    return await asyncio.gather(*(send(payout) for payout in payouts), return_exceptions=True)
+
+
+def finish_payouts(
+    payouts: list[Payout],
+    responses: list[int | BaseException],
+) -> tuple[dict[str, str], dict[str, BaseException]]:
+    """Save gateway responses, one conditional UPDATE per resulting status and comment.
+
+    Returns task results by payout id and errors by id of the payouts to retry:
+    - payouts that did not reach the gateway (circuit open, no free slot) go back to
+      PENDING with TASK_RESULT_DEFERRED;
+    - payouts that failed with an unexpected error are left as they are, with no result.
+    """
+    results: dict[str, str] = {}
+    errors: dict[str, BaseException] = {}
+    outcomes: dict[tuple[str, str, str], list[Payout]] = defaultdict(list)
+
+    for payout, response in zip(payouts, responses, strict=True):
+        if isinstance(response, GatewayTimeoutError):
+            outcomes[PayoutStatus.FAILED, str(response), TASK_RESULT_TIMEOUT].append(payout)
+        elif isinstance(response, PayoutExpiredError):
+            outcomes[PayoutStatus.FAILED, str(response), TASK_RESULT_EXPIRED].append(payout)
+        elif isinstance(response, DEFERRAL_ERRORS):
+            outcomes[PayoutStatus.PENDING, str(response), TASK_RESULT_DEFERRED].append(payout)
+            errors[str(payout.id)] = response
+        elif isinstance(response, BaseException):
+            logger.error("Unexpected error for %s: %r", payout.id, response)
+            errors[str(payout.id)] = response
+        else:
+            outcomes[PayoutStatus.SUCCESS, f"Successfully processed in {response}s", TASK_RESULT_SUCCESS].append(payout)
+
+    for (status, comment, result), group in outcomes.items():
+        results.update(dict.fromkeys((str(payout.id) for payout in group), TASK_RESULT_SKIPPED))
+        results.update(
+            dict.fromkeys((str(payout.id) for payout in transition_payouts(group, status, comment=comment)), result),
+        )
+
+    # A deferred payout changed meanwhile is not retried.
+    errors = {payout_id: exc for payout_id, exc in errors.items() if results.get(payout_id) != TASK_RESULT_SKIPPED}
+    logger.info("Batch finished: %s payouts saved, %s to retry", len(results), len(errors))
+    return results, errors
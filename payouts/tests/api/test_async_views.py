@@ -0,0 +1,143 @@
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from payouts.choices import PayoutStatus
+from payouts.constants import IDEMPOTENCY_KEY_HEADER
+from payouts.models import OutboxMessage, Payout
+from payouts.tests.factories import PayoutFactory
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls("payout_service.urls_asgi")]
+
+PAYLOAD = {
+    "amount": "1500.50",
+    "currency": "RUB",
+    "recipient_details": {"card_number": "1234567812345678"},
+    "comment": "Async payout",
+}
+
+
+async def read_streaming_content(response: StreamingHttpResponse) -> bytes:
+    return b"".join([part async for part in response.streaming_content])
+
+
+def test_async_create_payout(api_client: APIClient, django_capture_on_commit_callbacks) -> None:
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(reverse("payout-list"), PAYLOAD, format="json")
+
+    payout = Payout.objects.get()
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["id"] == str(payout.id)
+    assert response.json()["amount"] == "1500.50"
+    assert response.json()["status"] == PayoutStatus.PENDING
+    assert OutboxMessage.objects.get().args == [str(payout.id)]
+
+
+def test_async_create_payout_idempotency_key(api_client: APIClient) -> None:
+    headers = {IDEMPOTENCY_KEY_HEADER: "async-key"}
+
+    first = api_client.post(reverse("payout-list"), PAYLOAD, format="json", headers=headers)
+    second = api_client.post(reverse("payout-list"), PAYLOAD, format="json", headers=headers)
+    mismatch = api_client.post(reverse("payout-list"), {**PAYLOAD, "amount": "1"}, format="json", headers=headers)
+
+    assert second.status_code == status.HTTP_201_CREATED
+    assert second.json() == first.json()
+    assert second["Idempotent-Replayed"] == "true"
+    assert mismatch.status_code == status.HTTP_400_BAD_REQUEST
+    assert mismatch.json()["errors"][0]["field"] == IDEMPOTENCY_KEY_HEADER
+    assert Payout.objects.count() == 1
+
+
+def test_async_create_payout_validation_errors(api_client: APIClient) -> None:
+    response = api_client.post(reverse("payout-list"), {**PAYLOAD, "amount": "0.00"}, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {
+        "errors": [
+            {
+                "field": "amount",
+                "detail": "Сумма выплаты должна быть не менее 0.01.",
+                "source": {"pointer": "/data/amount"},
+                "status": "400",
+                "code": "min_value",
+            },
+        ],
+    }
+
+
+def test_async_create_payout_invalid_body(api_client: APIClient) -> None:
+    parse_error = api_client.post(reverse("payout-list"), b"{", content_type="application/json")
+    form = api_client.post(reverse("payout-list"), {"amount": "100"})
+
+    assert parse_error.status_code == status.HTTP_400_BAD_REQUEST
+    assert parse_error.json()["errors"][0]["detail"].startswith("JSON parse error")
+    assert form.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+def test_async_retrieve_payout_is_cached(api_client: APIClient, django_assert_num_queries) -> None:
+    payout = PayoutFactory()
+    url = reverse("payout-detail", kwargs={"id": payout.id})
+
+    first = api_client.get(url)
+    with django_assert_num_queries(0):
+        second = api_client.get(url)
+
+    assert first.status_code == status.HTTP_200_OK
+    assert first.json()["id"] == str(payout.id)
+    assert second.json() == first.json()
+
+
+def test_async_payout_status(api_client: APIClient) -> None:
+    payout = PayoutFactory(status=PayoutStatus.PROCESSING)
+
+    response = api_client.get(reverse("payout-payout-status", kwargs={"id": payout.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert list(response.json()) == ["id", "status", "updated_at"]
+    assert response.json()["status"] == PayoutStatus.PROCESSING
+
+
+def test_async_retrieve_payout_not_found(api_client: APIClient, settings) -> None:
+    url = reverse("payout-detail", kwargs={"id": uuid.uuid4()})
+
+    response = api_client.get(url)
+    settings.ROOT_URLCONF = "payout_service.urls"
+    sync_response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == sync_response.json()
+
+
+def test_async_views_delegate_other_methods(api_client: APIClient) -> None:
+    payout = PayoutFactory(status=PayoutStatus.PENDING)
+
+    list_response = api_client.get(reverse("payout-list"))
+    patch_response = api_client.patch(
+        reverse("payout-detail", kwargs={"id": payout.id}),
+        {"status": PayoutStatus.CANCELED},
+        format="json",
+    )
+
+    assert list_response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in list_response.json()["results"]] == [str(payout.id)]
+    assert patch_response.status_code == status.HTTP_200_OK
+    assert patch_response.json()["status"] == PayoutStatus.CANCELED
+
+
+def test_async_export_payouts_is_streamed(api_client: APIClient, settings) -> None:
+    settings.PAYOUT_EXPORT_CHUNK_SIZE = 2
+    payouts = PayoutFactory.create_batch(3)
+
+    response = api_client.get(reverse("payout-export"))
+    invalid = api_client.get(reverse("payout-export"), {"status": "unknown"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.is_async
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert len(async_to_sync(read_streaming_content)(response).splitlines()) == len(payouts)
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,70 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from payouts.choices import PayoutStatus
+from payouts.tasks import process_payout_batch_task, process_payout_task
+from payouts.tests.factories import PayoutFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_retrieve_payout_is_cached(api_client: APIClient, django_assert_num_queries) -> None:
+    payout = PayoutFactory()
+    url = reverse("payout-detail", kwargs={"id": payout.id})
+
+    first = api_client.get(url)
+    with django_assert_num_queries(0):
+        second = api_client.get(url)
+
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_200_OK
+    assert second.data == first.data
+
+
+def test_retrieve_payout_after_update(api_client: APIClient, django_capture_on_commit_callbacks) -> None:
+    payout = PayoutFactory(status=PayoutStatus.PENDING)
+    url = reverse("payout-detail", kwargs={"id": payout.id})
+    api_client.get(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.patch(url, {"status": PayoutStatus.CANCELED}, format="json")
+    response = api_client.get(url)
+
+    assert response.data["status"] == PayoutStatus.CANCELED
+
+
+def test_retrieve_payout_after_processing(
+    api_client: APIClient,
+    settings,
+    django_capture_on_commit_callbacks,
+    django_assert_num_queries,
+) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    single, batched = PayoutFactory.create_batch(2)
+    api_client.get(reverse("payout-detail", kwargs={"id": single.id}))
+    api_client.get(reverse("payout-detail", kwargs={"id": batched.id}))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        process_payout_task(str(single.id))
+        process_payout_batch_task([str(batched.id)])
+
+    with django_assert_num_queries(0):
+        single_response = api_client.get(reverse("payout-detail", kwargs={"id": single.id}))
+        batched_response = api_client.get(reverse("payout-detail", kwargs={"id": batched.id}))
+
+    assert single_response.data["status"] == PayoutStatus.SUCCESS
+    assert batched_response.data["status"] == PayoutStatus.SUCCESS
+
+
+def test_retrieve_payout_after_destroy(api_client: APIClient, django_capture_on_commit_callbacks) -> None:
+    payout = PayoutFactory()
+    url = reverse("payout-detail", kwargs={"id": payout.id})
+    api_client.get(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.delete(url)
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from pytest_mock import MockerFixture
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from payouts import idempotency
+from payouts.constants import IDEMPOTENCY_KEY_HEADER
+from payouts.models import IdempotencyKey, OutboxMessage, Payout
+
+pytestmark = pytest.mark.django_db
+
+PAYLOAD = {
+    "amount": "100.00",
+    "currency": "USD",
+    "recipient_details": {"card_number": "1111222233334444"},
+}
+
+
+def post_payout(api_client: APIClient, key: str, payload: dict | None = None):
+    return api_client.post(
+        reverse("payout-list"),
+        payload or PAYLOAD,
+        format="json",
+        headers={IDEMPOTENCY_KEY_HEADER: key},
+    )
+
+
+def test_create_payout_replay_returns_original(api_client: APIClient) -> None:
+    first = post_payout(api_client, "key-1")
+    second = post_payout(api_client, "key-1")
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert second.status_code == status.HTTP_201_CREATED
+    assert second.data["id"] == first.data["id"]
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert Payout.objects.count() == 1
+    assert OutboxMessage.objects.count() == 1
+
+
+def test_create_payout_replay_with_cold_cache(api_client: APIClient) -> None:
+    first = post_payout(api_client, "key-1")
+    cache.clear()
+
+    second = post_payout(api_client, "key-1")
+
+    assert second.status_code == status.HTTP_201_CREATED
+    assert second.data["id"] == first.data["id"]
+    assert Payout.objects.count() == 1
+
+
+def test_create_payout_different_keys(api_client: APIClient) -> None:
+    first = post_payout(api_client, "key-1")
+    second = post_payout(api_client, "key-2")
+
+    assert first.data["id"] != second.data["id"]
+    assert IdempotencyKey.objects.count() == 2
+
+
+def test_create_payout_key_reused_with_other_payload(api_client: APIClient) -> None:
+    post_payout(api_client, "key-1")
+
+    response = post_payout(api_client, "key-1", {**PAYLOAD, "amount": "200.00"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["errors"][0]["field"] == IDEMPOTENCY_KEY_HEADER
+    assert Payout.objects.count() == 1
+
+
+def test_create_payout_expired_key_creates_new_payout(api_client: APIClient, settings) -> None:
+    first = post_payout(api_client, "key-1")
+    IdempotencyKey.objects.update(
+        created_at=timezone.now() - timedelta(seconds=settings.PAYOUT_IDEMPOTENCY_KEY_TTL + 1)
+    )
+    cache.clear()
+
+    second = post_payout(api_client, "key-1")
+
+    assert second.status_code == status.HTTP_201_CREATED
+    assert second.data["id"] != first.data["id"]
+    assert IdempotencyKey.objects.get().payout_id == Payout.objects.get(id=second.data["id"]).id
+
+
+def test_create_payout_concurrent_same_key(api_client: APIClient, mocker: MockerFixture) -> None:
+    first = post_payout(api_client, "key-1")
+    cache.clear()
+    mocker.patch(
+        "payouts.api.views.find_payout_id",
+        side_effect=[None, idempotency.find_payout_id("key-1", idempotency.get_request_hash(PAYLOAD))],
+    )
+
+    second = post_payout(api_client, "key-1")
+
+    assert second.status_code == status.HTTP_201_CREATED
+    assert second.data["id"] == first.data["id"]
+    assert Payout.objects.count() == 1
+
+
+def test_create_payout_invalid_key(api_client: APIClient) -> None:
+    response = post_payout(api_client, "k" * 256)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Payout.objects.exists()
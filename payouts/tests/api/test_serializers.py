@@ -0,0 +1,59 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from payouts.api.serializers import PayoutRowSerializer, PayoutSerializer
+from payouts.choices import CurrencyChoices, PayoutStatus
+from payouts.models import Payout
+from payouts.tests.factories import PayoutFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_row_serializer_matches_payout_serializer() -> None:
+    PayoutFactory(amount=Decimal("1000.50"), comment="")
+    PayoutFactory(currency=CurrencyChoices.USD, status=PayoutStatus.FAILED, recipient_details={"iban": "DE89"})
+    payouts = list(Payout.objects.all())
+    rows = list(Payout.objects.values(*PayoutRowSerializer.fields))
+
+    expected = JSONRenderer().render(PayoutSerializer(payouts, many=True).data)
+
+    assert JSONRenderer().render(PayoutRowSerializer().to_representation_many(rows)) == expected
+
+
+@pytest.mark.parametrize("amount", [Decimal("150.005"), Decimal("150.015"), Decimal("99999999.999")])
+def test_row_serializer_formats_unsaved_payout(amount: Decimal) -> None:
+    payout = PayoutFactory.build(amount=amount, created_at=timezone.now(), updated_at=timezone.now())
+
+    data = PayoutRowSerializer().to_representation(PayoutRowSerializer.get_row(payout))
+
+    assert data == PayoutSerializer(payout).data
+
+
+@pytest.mark.parametrize("datetime_format", ["iso-8601", "%d.%m.%Y %H:%M"])
+def test_row_serializer_follows_datetime_format(settings, datetime_format: str) -> None:
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "DATETIME_FORMAT": datetime_format}
+    payout = PayoutFactory()
+
+    data = PayoutRowSerializer().to_representation(PayoutRowSerializer.get_row(payout))
+
+    assert data["created_at"] == PayoutSerializer(payout).data["created_at"]
+
+
+@pytest.mark.parametrize(
+    ("command", "options", "unit"),
+    [
+        ("benchmark_serializers", {}, "objects/s"),
+        ("benchmark_json", {"number": 1}, "ops/s"),
+    ],
+)
+def test_benchmark_commands(command: str, options: dict, unit: str) -> None:
+    stdout = StringIO()
+
+    call_command(command, rows=3, repeat=1, stdout=stdout, **options)
+
+    assert unit in stdout.getvalue()
@@ -1,11 +1,21 @@
+import base64
+import csv
+import io
+from datetime import timedelta
+
+import orjson
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from pytest_mock import MockerFixture
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from payouts.choices import CurrencyChoices, PayoutStatus
-from payouts.models import Payout
+from payouts.api.views import iter_export_chunks
+from payouts.choices import CurrencyChoices, PayoutPriority, PayoutStatus
+from payouts.models import OutboxMessage, Payout, PayoutDailyStats, PayoutStatsRefresh
+from payouts.tasks import process_payout_batch_task, process_payout_task
 from payouts.tests.factories import PayoutFactory
 
 pytestmark = pytest.mark.django_db
@@ -16,17 +26,163 @@ def test_get_payout_list_count(api_client: APIClient) -> None:
     url = reverse("payout-list")
 
     response = api_client.get(url)
-    response_ids = [item["id"] for item in response.data]
+    response_ids = [item["id"] for item in response.data["results"]]
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 3
+    assert len(response.data["results"]) == 3
     assert str(p_1.id) in response_ids
     assert str(p_2.id) in response_ids
     assert str(p_3.id) in response_ids
 
 
-def test_create_payout_success(api_client: APIClient, mocker: MockerFixture) -> None:
-    mock_task = mocker.patch("payouts.tasks.process_payout_task.delay")
+def test_get_payout_list_cursor_pagination(api_client: APIClient) -> None:
+    payouts = PayoutFactory.create_batch(5)
+    url = reverse("payout-list")
+
+    response_ids = []
+    next_url = f"{url}?page_size=2"
+    while next_url:
+        response = api_client.get(next_url)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) <= 2
+        response_ids.extend(item["id"] for item in response.data["results"])
+        next_url = response.data["next"]
+
+    expected = sorted(payouts, key=lambda p: (p.created_at, p.id), reverse=True)
+    assert response_ids == [str(p.id) for p in expected]
+
+
+def test_get_payout_list_cursor_pagination_same_created_at(api_client: APIClient) -> None:
+    """Pages are keyset ranges over (created_at, id), also in runs longer than the stock offset cutoff."""
+    Payout.objects.bulk_create(PayoutFactory.build() for _ in range(1_205))
+    Payout.objects.update(created_at=timezone.now())
+    expected = [str(payout_id) for payout_id in Payout.objects.order_by("-id").values_list("id", flat=True)]
+
+    response_ids = []
+    next_url = f"{reverse('payout-list')}?page_size=500"
+    with CaptureQueriesContext(connection) as queries:
+        while next_url:
+            response = api_client.get(next_url)
+            response_ids.extend(item["id"] for item in response.data["results"])
+            previous_url, next_url = response.data["previous"], response.data["next"]
+
+    assert response_ids == expected
+    assert not any("OFFSET" in query["sql"] for query in queries.captured_queries)
+
+    response = api_client.get(previous_url)
+    assert [item["id"] for item in response.data["results"]] == expected[500:1_000]
+
+
+def test_get_payout_list_invalid_cursor(api_client: APIClient) -> None:
+    cursor = base64.b64encode(b"p=not-a-date%7Cnot-an-id").decode()
+
+    response = api_client.get(reverse("payout-list"), {"cursor": cursor})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_get_payout_list_filters(api_client: APIClient) -> None:
+    now = timezone.now()
+    stale = PayoutFactory(status=PayoutStatus.PROCESSING)
+    Payout.objects.filter(id=stale.id).update(created_at=now - timedelta(minutes=15))
+    PayoutFactory(status=PayoutStatus.PROCESSING)
+    PayoutFactory(status=PayoutStatus.FAILED, currency=CurrencyChoices.USD)
+    url = reverse("payout-list")
+
+    response = api_client.get(
+        url,
+        {"status": PayoutStatus.PROCESSING, "created_before": (now - timedelta(minutes=10)).isoformat()},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.data["results"]] == [str(stale.id)]
+
+    response = api_client.get(url, {"status": PayoutStatus.FAILED, "currency": CurrencyChoices.USD})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["results"]) == 1
+    assert response.data["results"][0]["currency"] == CurrencyChoices.USD
+
+
+@pytest.mark.parametrize(
+    ("params", "expected_field"),
+    [
+        ({"status": "unknown"}, "status"),
+        ({"currency": "GBP"}, "currency"),
+        ({"created_after": "yesterday"}, "created_after"),
+    ],
+)
+def test_get_payout_list_invalid_filters(api_client: APIClient, params: dict[str, str], expected_field: str) -> None:
+    url = reverse("payout-list")
+
+    response = api_client.get(url, params)
+    error_fields = [e["field"] for e in response.data["errors"]]
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert expected_field in error_fields
+
+
+def test_export_payouts_ndjson(api_client: APIClient, settings) -> None:
+    settings.PAYOUT_EXPORT_CHUNK_SIZE = 2
+    PayoutFactory.create_batch(3)
+    PayoutFactory(currency=CurrencyChoices.USD)
+
+    list_response = api_client.get(reverse("payout-list"), {"currency": CurrencyChoices.RUB})
+    response = api_client.get(reverse("payout-export"), {"currency": CurrencyChoices.RUB})
+    lines = b"".join(response.streaming_content).splitlines()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert [orjson.loads(line) for line in lines] == list_response.json()["results"]
+
+
+def test_export_payouts_reads_rows_in_transaction() -> None:
+    PayoutFactory.create_batch(3)
+    atomic_blocks = len(connection.atomic_blocks)
+    chunks = iter_export_chunks(Payout.objects.all(), 2)
+
+    assert len(next(chunks)) == 2
+    assert len(connection.atomic_blocks) == atomic_blocks + 1
+    assert len(next(chunks)) == 1
+    chunks.close()
+    assert len(connection.atomic_blocks) == atomic_blocks
+
+
+def test_export_payouts_csv(api_client: APIClient) -> None:
+    payout = PayoutFactory(comment='Выплата, "срочно"')
+
+    response = api_client.get(reverse("payout-export"), {"format": "csv"})
+    header, row = csv.reader(io.StringIO(b"".join(response.streaming_content).decode()))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    assert response["Content-Disposition"] == 'attachment; filename="payouts.csv"'
+    assert header == [
+        "id",
+        "amount",
+        "currency",
+        "recipient_details",
+        "status",
+        "comment",
+        "priority",
+        "created_at",
+        "updated_at",
+    ]
+    assert row[0] == str(payout.id)
+    assert orjson.loads(row[3]) == payout.recipient_details
+    assert row[5] == payout.comment
+
+
+def test_export_payouts_invalid_filters(api_client: APIClient) -> None:
+    response = api_client.get(reverse("payout-export"), {"format": "csv", "status": "unknown"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    assert b"status" in response.content
+
+
+def test_create_payout_success(api_client: APIClient) -> None:
     url = reverse("payout-list")
     amount = 100.00
     payload = {
@@ -45,7 +201,37 @@ def test_create_payout_success(api_client: APIClient, mocker: MockerFixture) ->
     assert payout.recipient_details == payload["recipient_details"]
     assert payout.status == PayoutStatus.PENDING
 
-    mock_task.assert_called_once_with(str(payout.id))
+    message = OutboxMessage.objects.get()
+    assert message.task_name == process_payout_task.name
+    assert message.args == [str(payout.id)]
+    assert message.queue == "payouts.normal.usd"
+    assert message.sent_at is None
+
+
+@pytest.mark.parametrize(
+    ("amount", "priority", "expected_queue"),
+    [
+        ("100.00", None, "payouts.normal.rub"),
+        ("1000000.00", None, "payouts.urgent.rub"),
+        ("1000000.00", PayoutPriority.BULK, "payouts.bulk.rub"),
+        ("1.00", PayoutPriority.URGENT, "payouts.urgent.rub"),
+    ],
+)
+def test_create_payout_priority_lane(
+    api_client: APIClient,
+    amount: str,
+    priority: str | None,
+    expected_queue: str,
+) -> None:
+    payload = {"amount": amount, "recipient_details": {"card_number": "1111222233334444"}}
+    if priority is not None:
+        payload["priority"] = priority
+
+    response = api_client.post(reverse("payout-list"), payload, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["priority"] == (priority or PayoutPriority.NORMAL)
+    assert OutboxMessage.objects.get().queue == expected_queue
 
 
 @pytest.mark.parametrize(
@@ -58,14 +244,12 @@ def test_create_payout_success(api_client: APIClient, mocker: MockerFixture) ->
 )
 def test_create_payout_validation_errors(
     api_client: APIClient,
-    mocker: MockerFixture,
     amount: str,
     currency: str,
     expected_field: str,
     expected_code: str,
 ) -> None:
     url = reverse("payout-list")
-    mock_task = mocker.patch("payouts.tasks.process_payout_task.delay")
     payload = {
         "amount": amount,
         "currency": currency,
@@ -77,20 +261,86 @@ def test_create_payout_validation_errors(
 
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert (expected_field, expected_code) in error_tuples
+    assert not OutboxMessage.objects.exists()
+
 
-    mock_task.assert_not_called()
+def test_bulk_create_payouts_partial_success(api_client: APIClient) -> None:
+    url = reverse("payout-bulk")
+    payload = [
+        {"amount": "100.00", "currency": CurrencyChoices.USD, "recipient_details": {"card_number": "1111222233334444"}},
+        {"amount": "0.00", "currency": CurrencyChoices.RUB, "recipient_details": {"card_number": "1111222233334444"}},
+        {"amount": "250.50", "recipient_details": {"card_number": "5555 6666 7777 8888"}},
+    ]
+
+    response = api_client.post(url, payload, format="json")
+
+    payout_ids = {str(payout_id) for payout_id in Payout.objects.values_list("id", flat=True)}
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.data["results"]) == 2
+    assert {item["id"] for item in response.data["results"]} == payout_ids
+    assert [(e["field"], e["code"], e["source"]["pointer"]) for e in response.data["errors"]] == [
+        ("amount", "min_value", "/data/1/amount"),
+    ]
+
+    messages = OutboxMessage.objects.order_by("queue")
+    assert {message.task_name for message in messages} == {process_payout_batch_task.name}
+    assert [message.queue for message in messages] == ["payouts.bulk.rub", "payouts.bulk.usd"]
+    assert {payout_id for message in messages for payout_id in message.args[0]} == payout_ids
+
+
+def test_bulk_create_payouts_all_invalid(api_client: APIClient) -> None:
+    url = reverse("payout-bulk")
+    payload = [{"amount": "-1.00", "recipient_details": {"card_number": "1111222233334444"}}]
+
+    response = api_client.post(url, payload, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["results"] == []
+    assert len(response.data["errors"]) == 1
+    assert not Payout.objects.exists()
+    assert not OutboxMessage.objects.exists()
+
+
+@pytest.mark.parametrize("payload", [{"amount": "100.00"}, []])
+def test_bulk_create_payouts_invalid_payload(api_client: APIClient, payload: object) -> None:
+    url = reverse("payout-bulk")
+
+    response = api_client.post(url, payload, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "errors" in response.data
 
 
 def test_patch_payout_status_success(api_client: APIClient) -> None:
-    payout = PayoutFactory(status=PayoutStatus.PROCESSING)
+    payout = PayoutFactory(status=PayoutStatus.PENDING)
     url = reverse("payout-detail", kwargs={"id": payout.id})
-    payload = {"status": PayoutStatus.PENDING}
+    payload = {"status": PayoutStatus.CANCELED}
 
     response = api_client.patch(url, payload, format="json")
 
     payout.refresh_from_db()
     assert response.status_code == status.HTTP_200_OK
-    assert payout.status == PayoutStatus.PENDING
+    assert payout.status == PayoutStatus.CANCELED
+
+
+@pytest.mark.parametrize(
+    ("current", "target"),
+    [
+        (PayoutStatus.PENDING, PayoutStatus.PROCESSING),
+        (PayoutStatus.PROCESSING, PayoutStatus.PENDING),
+        (PayoutStatus.PROCESSING, PayoutStatus.CANCELED),
+        (PayoutStatus.PROCESSING, PayoutStatus.SUCCESS),
+    ],
+)
+def test_patch_payout_status_worker_transitions(api_client: APIClient, current: str, target: str) -> None:
+    payout = PayoutFactory(status=current)
+    url = reverse("payout-detail", kwargs={"id": payout.id})
+
+    response = api_client.patch(url, {"status": target}, format="json")
+
+    payout.refresh_from_db()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert payout.status == current
 
 
 def test_patch_payout_status_cannot_change(api_client: APIClient) -> None:
@@ -104,14 +354,124 @@ def test_patch_payout_status_cannot_change(api_client: APIClient) -> None:
     assert "Cannot change status" in str(response.data)
 
 
+def test_patch_payout_status_not_allowed_transition(api_client: APIClient) -> None:
+    payout = PayoutFactory(status=PayoutStatus.PENDING)
+    url = reverse("payout-detail", kwargs={"id": payout.id})
+    payload = {"status": PayoutStatus.SUCCESS}
+
+    response = api_client.patch(url, payload, format="json")
+
+    payout.refresh_from_db()
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert payout.status == PayoutStatus.PENDING
+
+
 def test_patch_payout_other_fields(api_client: APIClient) -> None:
-    payout = PayoutFactory(currency=CurrencyChoices.USD, status=PayoutStatus.PROCESSING)
+    payout = PayoutFactory(currency=CurrencyChoices.USD, status=PayoutStatus.PENDING)
     url = reverse("payout-detail", kwargs={"id": payout.id})
-    payload = {"status": PayoutStatus.PENDING, "currency": CurrencyChoices.RUB}
+    payload = {"status": PayoutStatus.CANCELED, "currency": CurrencyChoices.RUB}
 
     response = api_client.patch(url, payload, format="json")
 
     payout.refresh_from_db()
     assert response.status_code == status.HTTP_200_OK
-    assert payout.status == PayoutStatus.PENDING
+    assert payout.status == PayoutStatus.CANCELED
     assert payout.currency == CurrencyChoices.USD
+
+
+def test_get_payout_status(api_client: APIClient) -> None:
+    payout = PayoutFactory(status=PayoutStatus.PROCESSING)
+
+    response = api_client.get(reverse("payout-payout-status", kwargs={"id": payout.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {
+        "id": str(payout.id),
+        "status": PayoutStatus.PROCESSING,
+        "updated_at": payout.updated_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+def test_get_payout_stats(api_client: APIClient) -> None:
+    today = timezone.localdate()
+    refreshed_at = timezone.now()
+    for day, currency, count in (
+        (today, CurrencyChoices.RUB, 2),
+        (today, CurrencyChoices.USD, 1),
+        (today - timedelta(days=40), CurrencyChoices.RUB, 5),
+    ):
+        PayoutDailyStats.objects.create(
+            day=day,
+            currency=currency,
+            status=PayoutStatus.SUCCESS,
+            count=count,
+            amount=count * 100,
+            refreshed_at=refreshed_at,
+        )
+    PayoutStatsRefresh.objects.create(refreshed_at=refreshed_at)
+    url = reverse("payout-stats")
+
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["refreshed_at"] == refreshed_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+    assert [(row["currency"], row["count"], row["amount"]) for row in response.data["results"]] == [
+        (CurrencyChoices.RUB, 2, "200.00"),
+        (CurrencyChoices.USD, 1, "100.00"),
+    ]
+
+    response = api_client.get(url, {"date_from": (today - timedelta(days=40)).isoformat(), "currency": "RUB"})
+    assert [row["count"] for row in response.data["results"]] == [5, 2]
+
+    response = api_client.get(url, {"date_from": today.isoformat(), "date_to": (today - timedelta(days=1)).isoformat()})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_create_payout_rejects_duplicate(api_client: APIClient, settings) -> None:
+    settings.PAYOUT_DUPLICATE_WINDOW = 60 * 60
+    url = reverse("payout-list")
+    payload = {"amount": "100.00", "recipient_details": {"card_number": "1111222233334444"}}
+    api_client.post(url, payload, format="json")
+
+    response = api_client.post(
+        url,
+        {**payload, "recipient_details": {"card_number": "1111 2222 3333 4444"}},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["errors"][0]["field"] == "recipient_details"
+    assert Payout.objects.count() == 1
+    assert OutboxMessage.objects.count() == 1
+
+
+def test_find_payouts_by_recipient(api_client: APIClient) -> None:
+    first, second = PayoutFactory.create_batch(2, recipient_details={"card_number": "1111222233334444"})
+    PayoutFactory(recipient_details={"card_number": "5555666677778888"})
+    bulk = api_client.post(
+        reverse("payout-bulk"),
+        [{"amount": "100.00", "recipient_details": {"card_number": "1111 2222 3333 4444"}}],
+        format="json",
+    )
+    url = reverse("payout-recipient")
+
+    response = api_client.post(url, {"card_number": "1111 2222 3333 4444"}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.data["results"]] == [
+        bulk.data["results"][0]["id"],
+        str(second.id),
+        str(first.id),
+    ]
+
+    response = api_client.post(
+        f"{url}?status={PayoutStatus.SUCCESS}", {"card_number": "1111222233334444"}, format="json"
+    )
+    assert response.data["results"] == []
+
+    response = api_client.post(url, {"card_number": "1234"}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["errors"][0]["field"] == "card_number"
+
+    response = api_client.get(url, {"card_number": "1111222233334444"})
+    assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
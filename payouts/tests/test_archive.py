@@ -0,0 +1,153 @@
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import orjson
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from payouts.archive import archive_payouts, detach_archive_partitions, get_archive_partitions
+from payouts.choices import PayoutStatus
+from payouts.exceptions import ArchivePartitionError
+from payouts.models import ArchivedPayout, IdempotencyKey, Payout, PayoutDailyStats
+from payouts.stats import refresh_payout_stats
+from payouts.tests.factories import PayoutFactory
+
+pytestmark = pytest.mark.django_db
+
+CUTOFF = datetime(2026, 4, 1, tzinfo=UTC)
+
+
+def create_payout(created_at: datetime, **fields: object) -> Payout:
+    payout = PayoutFactory(**fields)
+    Payout.objects.filter(id=payout.id).update(created_at=created_at)
+    payout.refresh_from_db()
+    return payout
+
+
+def test_archive_payouts_without_comment(api_client: APIClient) -> None:
+    payout = create_payout(datetime(2026, 1, 10, tzinfo=UTC), status=PayoutStatus.SUCCESS, comment=None)
+
+    assert archive_payouts(CUTOFF, batch_size=10) == 1
+
+    assert ArchivedPayout.objects.get(id=payout.id).comment is None
+    response = api_client.get(reverse("payout-detail", kwargs={"id": payout.id}))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["comment"] is None
+
+
+def test_archive_payouts_moves_old_finalized_payouts() -> None:
+    old = [
+        create_payout(datetime(2026, 1, 31, 23, tzinfo=UTC), status=PayoutStatus.SUCCESS),
+        create_payout(datetime(2026, 2, 1, tzinfo=UTC), status=PayoutStatus.FAILED),
+        create_payout(datetime(2026, 3, 15, tzinfo=UTC), status=PayoutStatus.CANCELED),
+    ]
+    active = create_payout(datetime(2026, 1, 10, tzinfo=UTC), status=PayoutStatus.PROCESSING)
+    recent = create_payout(CUTOFF, status=PayoutStatus.SUCCESS)
+    IdempotencyKey.objects.create(key="old", payout=old[0], request_hash="hash")
+
+    assert archive_payouts(CUTOFF, batch_size=2) == 3
+
+    assert set(Payout.objects.values_list("id", flat=True)) == {active.id, recent.id}
+    archived = ArchivedPayout.objects.get(id=old[0].id)
+    assert (archived.amount, archived.status, archived.created_at, archived.recipient_key) == (
+        old[0].amount,
+        old[0].status,
+        old[0].created_at,
+        old[0].recipient_key,
+    )
+    assert ArchivedPayout.objects.count() == 3
+    assert not IdempotencyKey.objects.exists()
+    assert get_archive_partitions() == [
+        "payouts_archivedpayout_202601",
+        "payouts_archivedpayout_202602",
+        "payouts_archivedpayout_202603",
+        "payouts_archivedpayout_202604",
+    ]
+
+    assert archive_payouts(CUTOFF, batch_size=2) == 0
+
+
+def test_detach_archive_partitions() -> None:
+    create_payout(datetime(2026, 1, 10, tzinfo=UTC), status=PayoutStatus.SUCCESS)
+    create_payout(datetime(2026, 2, 10, tzinfo=UTC), status=PayoutStatus.SUCCESS)
+    archive_payouts(datetime(2026, 3, 1, tzinfo=UTC), batch_size=10)
+
+    assert detach_archive_partitions(datetime(2026, 2, 28, tzinfo=UTC)) == ["payouts_archivedpayout_202601"]
+
+    assert get_archive_partitions() == ["payouts_archivedpayout_202602", "payouts_archivedpayout_202603"]
+    assert ArchivedPayout.objects.get().created_at == datetime(2026, 2, 10, tzinfo=UTC)
+
+
+def test_archive_payouts_refuses_detached_month() -> None:
+    create_payout(datetime(2026, 1, 10, tzinfo=UTC), status=PayoutStatus.SUCCESS)
+    archive_payouts(datetime(2026, 2, 1, tzinfo=UTC), batch_size=10)
+    detach_archive_partitions(datetime(2026, 2, 1, tzinfo=UTC))
+    late = create_payout(datetime(2026, 1, 20, tzinfo=UTC), status=PayoutStatus.SUCCESS)
+
+    with pytest.raises(ArchivePartitionError, match="payouts_archivedpayout_202601"):
+        archive_payouts(datetime(2026, 2, 1, tzinfo=UTC), batch_size=10)
+
+    assert Payout.objects.filter(id=late.id).exists()
+
+
+def test_archive_payouts_command() -> None:
+    create_payout(timezone.now() - timedelta(days=10), status=PayoutStatus.SUCCESS)
+    create_payout(timezone.now() - timedelta(days=2), status=PayoutStatus.SUCCESS)
+    stdout = StringIO()
+
+    call_command("archive_payouts", "--older-than=5", stdout=stdout)
+
+    assert "Archived 1 payouts" in stdout.getvalue()
+    assert Payout.objects.count() == ArchivedPayout.objects.count() == 1
+
+
+@pytest.mark.parametrize("urlconf", ["payout_service.urls", "payout_service.urls_asgi"])
+def test_retrieve_archived_payout(api_client: APIClient, settings, urlconf: str) -> None:
+    settings.ROOT_URLCONF = urlconf
+    payout = create_payout(datetime(2026, 1, 10, tzinfo=UTC), status=PayoutStatus.SUCCESS, amount=Decimal("10.00"))
+    archive_payouts(CUTOFF, batch_size=10)
+
+    response = api_client.get(reverse("payout-detail", kwargs={"id": payout.id}))
+    status_response = api_client.get(reverse("payout-payout-status", kwargs={"id": payout.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert (response.json()["id"], response.json()["amount"]) == (str(payout.id), "10.00")
+    assert status_response.json()["status"] == PayoutStatus.SUCCESS
+
+
+def test_list_export_and_recipient_include_archived_payouts(api_client: APIClient) -> None:
+    card = {"card_number": "1111222233334444"}
+    archived = create_payout(datetime(2026, 1, 10, tzinfo=UTC), status=PayoutStatus.SUCCESS, recipient_details=card)
+    active = create_payout(datetime(2026, 1, 9, tzinfo=UTC), status=PayoutStatus.PROCESSING, recipient_details=card)
+    recent = create_payout(CUTOFF, status=PayoutStatus.SUCCESS)
+    archive_payouts(CUTOFF, batch_size=10)
+    expected = [str(recent.id), str(archived.id), str(active.id)]
+
+    first = api_client.get(reverse("payout-list"), {"page_size": 2})
+    second = api_client.get(first.json()["next"])
+    export = api_client.get(reverse("payout-export"), {"created_before": CUTOFF.isoformat()})
+    recipient = api_client.post(reverse("payout-recipient"), card, format="json")
+
+    assert [item["id"] for item in first.json()["results"] + second.json()["results"]] == expected
+    assert [orjson.loads(line)["id"] for line in b"".join(export.streaming_content).splitlines()] == expected[1:]
+    assert [item["id"] for item in recipient.json()["results"]] == expected[1:]
+
+
+def test_payout_stats_count_archived_payouts() -> None:
+    create_payout(datetime(2026, 1, 10, 1, tzinfo=UTC), status=PayoutStatus.SUCCESS, amount=Decimal("10.00"))
+    create_payout(datetime(2026, 1, 10, 2, tzinfo=UTC), status=PayoutStatus.SUCCESS, amount=Decimal("5.00"))
+    create_payout(datetime(2026, 1, 10, 3, tzinfo=UTC), status=PayoutStatus.PROCESSING, amount=Decimal("1.00"))
+    archive_payouts(CUTOFF, batch_size=10)
+    assert ArchivedPayout.objects.count() == 2
+
+    refresh_payout_stats(full=True)
+
+    assert set(PayoutDailyStats.objects.values_list("status", "count", "amount")) == {
+        (PayoutStatus.SUCCESS, 2, Decimal("15.00")),
+        (PayoutStatus.PROCESSING, 1, Decimal("1.00")),
+    }
@@ -0,0 +1,81 @@
+import pytest
+
+from payouts.breaker import LocalCircuitBreaker, gateway_circuit, get_circuit_breaker
+from payouts.exceptions import GatewayTimeoutError, GatewayUnavailableError
+
+
+@pytest.fixture
+def breaker(settings) -> LocalCircuitBreaker:
+    settings.PAYOUT_GATEWAY_BREAKER_URL = ""
+    settings.PAYOUT_GATEWAY_BREAKER_WINDOW = 60
+    settings.PAYOUT_GATEWAY_BREAKER_MIN_CALLS = 4
+    settings.PAYOUT_GATEWAY_BREAKER_FAILURE_RATE = 0.5
+    settings.PAYOUT_GATEWAY_BREAKER_OPEN_TIMEOUT = 60
+    settings.PAYOUT_GATEWAY_BREAKER_PROBE_TIMEOUT = 60
+    return get_circuit_breaker()
+
+
+def call(failed: bool = False) -> None:
+    with gateway_circuit():
+        if failed:
+            raise GatewayTimeoutError
+
+
+def test_breaker_opens_on_failure_rate(breaker: LocalCircuitBreaker) -> None:
+    call()
+    call()
+    with pytest.raises(GatewayTimeoutError):
+        call(failed=True)
+    assert breaker.allow() is not None
+
+    with pytest.raises(GatewayTimeoutError):
+        call(failed=True)
+
+    with pytest.raises(GatewayUnavailableError):
+        call()
+
+
+def test_breaker_needs_min_calls(breaker: LocalCircuitBreaker) -> None:
+    for _ in range(3):
+        with pytest.raises(GatewayTimeoutError):
+            call(failed=True)
+
+    assert breaker.allow() is not None
+
+
+def test_breaker_half_open_probe(breaker: LocalCircuitBreaker, settings) -> None:
+    for _ in range(4):
+        with pytest.raises(GatewayTimeoutError):
+            call(failed=True)
+    breaker.open_until = float("-inf")
+
+    probe = breaker.allow()
+    assert probe is not None
+    assert breaker.allow() is None
+
+    assert breaker.record(probe, failed=True)
+    assert breaker.allow() is None
+
+    breaker.open_until = float("-inf")
+    call()
+    assert not breaker.tripped
+    assert breaker.allow() is not None
+    assert breaker.allow() is not None
+
+
+def test_breaker_lost_probe_is_replaced(breaker: LocalCircuitBreaker, settings) -> None:
+    settings.PAYOUT_GATEWAY_BREAKER_PROBE_TIMEOUT = 0
+    breaker.tripped = True
+
+    assert breaker.allow() is not None
+    assert breaker.allow() is not None
+
+
+def test_breaker_other_errors_free_probe(breaker: LocalCircuitBreaker) -> None:
+    breaker.tripped = True
+
+    with pytest.raises(RuntimeError), gateway_circuit():
+        raise RuntimeError
+
+    assert breaker.tripped
+    assert breaker.allow() is not None
@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from pytest_mock import MockerFixture
+
+from payouts.choices import CurrencyChoices, PayoutPriority
+from payouts.constants import DISPATCH_MODE_CLAIM
+from payouts.dispatch import dispatch_payout, dispatch_payouts, get_payout_lane
+from payouts.models import OutboxMessage
+from payouts.outbox import relay_outbox
+from payouts.tasks import process_payout_batch_task, process_payout_task
+from payouts.tests.factories import PayoutFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    ("amount", "currency", "priority", "expected_lane"),
+    [
+        ("999999.99", CurrencyChoices.RUB, PayoutPriority.NORMAL, PayoutPriority.NORMAL),
+        ("1000000.00", CurrencyChoices.RUB, PayoutPriority.NORMAL, PayoutPriority.URGENT),
+        ("10000.00", CurrencyChoices.USD, PayoutPriority.NORMAL, PayoutPriority.URGENT),
+        ("10000.00", CurrencyChoices.USD, PayoutPriority.BULK, PayoutPriority.BULK),
+        ("1.00", CurrencyChoices.EUR, PayoutPriority.URGENT, PayoutPriority.URGENT),
+    ],
+)
+def test_get_payout_lane(amount: str, currency: str, priority: str, expected_lane: str) -> None:
+    payout = PayoutFactory.build(amount=Decimal(amount), currency=currency, priority=priority)
+
+    assert get_payout_lane(payout) == expected_lane
+
+
+def test_dispatch_payout() -> None:
+    payout = PayoutFactory(currency=CurrencyChoices.EUR, amount=Decimal("100.00"))
+
+    dispatch_payout(payout)
+
+    message = OutboxMessage.objects.get()
+    assert message.task_name == process_payout_task.name
+    assert message.args == [str(payout.id)]
+    assert message.queue == "payouts.normal.eur"
+
+
+def test_dispatch_payouts_in_batches_per_queue(settings) -> None:
+    settings.PAYOUT_DISPATCH_BATCH_SIZE = 2
+    rub = PayoutFactory.create_batch(3, currency=CurrencyChoices.RUB, amount=Decimal("100.00"))
+    usd = PayoutFactory.create_batch(
+        2, currency=CurrencyChoices.USD, amount=Decimal("100.00"), priority=PayoutPriority.BULK
+    )
+
+    dispatch_payouts([rub[0], usd[0], rub[1], usd[1], rub[2]])
+
+    messages = OutboxMessage.objects.order_by("id")
+    assert {message.task_name for message in messages} == {process_payout_batch_task.name}
+    assert [(message.queue, message.args) for message in messages] == [
+        ("payouts.normal.rub", [[str(rub[0].id), str(rub[1].id)]]),
+        ("payouts.normal.rub", [[str(rub[2].id)]]),
+        ("payouts.bulk.usd", [[str(usd[0].id), str(usd[1].id)]]),
+    ]
+
+
+def test_dispatch_skipped_in_claim_mode(settings) -> None:
+    settings.PAYOUT_DISPATCH_MODE = DISPATCH_MODE_CLAIM
+    payouts = PayoutFactory.create_batch(2)
+
+    dispatch_payout(payouts[0])
+    dispatch_payouts(payouts)
+
+    assert not OutboxMessage.objects.exists()
+
+
+def test_relay_outbox(mocker: MockerFixture) -> None:
+    mock_app = mocker.patch("payouts.outbox.current_app")
+    payouts = PayoutFactory.create_batch(3, currency=CurrencyChoices.RUB, amount=Decimal("100.00"))
+    for payout in payouts:
+        dispatch_payout(payout)
+
+    sent = relay_outbox(batch_size=2)
+
+    assert sent == 2
+    assert [c.args for c in mock_app.send_task.call_args_list] == [
+        (process_payout_task.name,),
+        (process_payout_task.name,),
+    ]
+    assert [c.kwargs["args"] for c in mock_app.send_task.call_args_list] == [
+        [str(payouts[0].id)],
+        [str(payouts[1].id)],
+    ]
+    assert {c.kwargs["queue"] for c in mock_app.send_task.call_args_list} == {"payouts.normal.rub"}
+    assert OutboxMessage.objects.filter(sent_at__isnull=True).count() == 1
+
+
+def test_relay_outbox_broker_error_keeps_messages_unsent(mocker: MockerFixture) -> None:
+    mock_app = mocker.patch("payouts.outbox.current_app")
+    mock_app.send_task.side_effect = ConnectionError
+    dispatch_payout(PayoutFactory())
+
+    with pytest.raises(ConnectionError):
+        relay_outbox(batch_size=10)
+
+    assert OutboxMessage.objects.get().sent_at is None
+
+
+def test_relay_outbox_command_once(mocker: MockerFixture, settings) -> None:
+    mock_app = mocker.patch("payouts.outbox.current_app")
+    settings.PAYOUT_DISPATCH_BATCH_SIZE = 1
+    dispatch_payouts(PayoutFactory.create_batch(3))
+
+    call_command("relay_outbox", "--once", "--batch-size=2")
+
+    assert mock_app.send_task.call_count == 3
+    assert not OutboxMessage.objects.filter(sent_at__isnull=True).exists()
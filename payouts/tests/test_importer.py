@@ -0,0 +1,162 @@
+import csv
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+import orjson
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from payouts.api.serializers import PayoutSerializer
+from payouts.choices import CurrencyChoices, PayoutPriority, PayoutStatus
+from payouts.constants import TASK_RESULT_SUCCESS
+from payouts.importer import validate_payout_rows
+from payouts.models import OutboxMessage, Payout, PayoutDailyStats
+from payouts.stats import refresh_payout_stats
+from payouts.tasks import process_payout_batch_task, process_payout_task
+from payouts.validators import get_recipient_key
+
+pytestmark = pytest.mark.django_db
+
+CARD = {"card_number": "1234567812345678"}
+
+
+def write_ndjson(path: Path, rows: list[Any]) -> Path:
+    path.write_bytes(b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows))
+    return path
+
+
+def read_rejected(path: Path) -> list[dict[str, Any]]:
+    return [orjson.loads(line) for line in path.read_bytes().splitlines()]
+
+
+@pytest.mark.parametrize(
+    "row",
+    [
+        {"amount": "100.50", "recipient_details": CARD},
+        {"amount": " 10.5 ", "currency": CurrencyChoices.USD, "recipient_details": CARD, "comment": " text "},
+        {"amount": "1e2", "recipient_details": CARD},
+        {"amount": 250.75, "recipient_details": {"card_number": "1234 5678 1234 5678"}},
+        {"amount": "0.00", "recipient_details": CARD},
+        {"amount": "100.005", "recipient_details": CARD},
+        {"amount": "12345678901", "recipient_details": CARD},
+        {"amount": "abc", "currency": "GBP", "recipient_details": CARD},
+        {"recipient_details": CARD},
+        {"amount": "100", "recipient_details": {"card_number": "1234"}},
+        {"amount": "100", "recipient_details": ["1234567812345678"]},
+        {"amount": "100", "recipient_details": {}},
+        {"amount": "100", "recipient_details": CARD, "comment": "x" * 256},
+    ],
+)
+def test_validate_payout_rows_matches_serializer(row: dict[str, Any]) -> None:
+    serializer = PayoutSerializer(data=row)
+    serializer.is_valid()
+
+    valid, rejected = validate_payout_rows([(1, row)])
+
+    if serializer.errors:
+        assert not valid
+        assert rejected[0]["errors"] == serializer.errors
+    else:
+        _id, amount, currency, recipient_details, _status, comment, priority, _created, _updated, recipient_key, _ = (
+            valid[0][1]
+        )
+        assert amount == serializer.validated_data["amount"]
+        assert currency == serializer.validated_data["currency"]
+        assert orjson.loads(recipient_details) == serializer.validated_data["recipient_details"]
+        assert comment == serializer.validated_data.get("comment", "")
+        assert priority == PayoutPriority.BULK
+        assert recipient_key == get_recipient_key(serializer.validated_data["recipient_details"])
+
+
+def test_import_payouts_csv(tmp_path: Path) -> None:
+    path = tmp_path / "payouts.csv"
+    with path.open("w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["amount", "currency", "recipient_details", "comment"])
+        writer.writerow(["100.50", "RUB", orjson.dumps(CARD).decode(), "Первая"])
+        writer.writerow(["200", "", orjson.dumps(CARD).decode(), ""])
+        writer.writerow(["0", "USD", orjson.dumps(CARD).decode(), ""])
+        writer.writerow(["300", "EUR", "not json", ""])
+
+    call_command("import_payouts", str(path), batch_size=2)
+
+    assert sorted(Payout.objects.values_list("amount", "currency", "status")) == [
+        (Decimal("100.50"), CurrencyChoices.RUB, PayoutStatus.PENDING),
+        (Decimal("200.00"), CurrencyChoices.RUB, PayoutStatus.PENDING),
+    ]
+    rejected = read_rejected(tmp_path / "payouts.csv.rejected.ndjson")
+    assert [entry["line"] for entry in rejected] == [4, 5]
+    assert list(rejected[0]["errors"]) == ["amount"]
+    assert rejected[1]["errors"] == {"recipient_details": ["Реквизиты должны быть JSON-объектом."]}
+    assert not OutboxMessage.objects.exists()
+
+
+def test_import_payouts_ndjson_skips_existing_and_enqueues_pending(tmp_path: Path) -> None:
+    existing_id = uuid.uuid4()
+    rows = [
+        {"id": str(existing_id), "amount": "100", "recipient_details": CARD},
+        {
+            "amount": "200",
+            "recipient_details": CARD,
+            "status": PayoutStatus.SUCCESS,
+            "created_at": "2024-01-31T10:00:00Z",
+        },
+        {"amount": "300", "recipient_details": CARD},
+    ]
+    path = write_ndjson(tmp_path / "payouts.ndjson", rows)
+    call_command("import_payouts", str(write_ndjson(tmp_path / "first.ndjson", rows[:1])))
+    path.write_bytes(path.read_bytes() + b"{broken\n")
+
+    call_command("import_payouts", str(path), enqueue=True, rejected=tmp_path / "rejected.ndjson")
+
+    assert Payout.objects.count() == 3
+    success = Payout.objects.get(status=PayoutStatus.SUCCESS)
+    assert success.created_at.isoformat() == "2024-01-31T10:00:00+00:00"
+    pending_id = Payout.objects.get(amount=Decimal(300)).id
+    message = OutboxMessage.objects.get()
+    assert message.task_name == process_payout_batch_task.name
+    assert message.args == [[str(pending_id)]]
+    assert message.queue == "payouts.bulk.rub"
+    rejected = read_rejected(tmp_path / "rejected.ndjson")
+    assert [(entry["line"], list(entry["errors"])) for entry in rejected] == [(1, ["id"]), (4, ["non_field_errors"])]
+
+
+def test_import_payouts_updates_stats(tmp_path: Path) -> None:
+    refresh_payout_stats()
+    created_at = timezone.now() - timedelta(days=40)
+    rows = [
+        {
+            "amount": "200",
+            "recipient_details": CARD,
+            "status": PayoutStatus.SUCCESS,
+            "created_at": created_at.isoformat(),
+        },
+    ]
+
+    call_command("import_payouts", str(write_ndjson(tmp_path / "payouts.ndjson", rows)))
+
+    assert refresh_payout_stats() == 0
+    assert list(PayoutDailyStats.objects.values_list("day", "status", "count", "amount")) == [
+        (timezone.localdate(created_at), PayoutStatus.SUCCESS, 1, Decimal("200.00")),
+    ]
+
+
+def test_import_payouts_deadline_counts_from_import(tmp_path: Path, settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    created_at = timezone.now() - timedelta(days=3)
+    rows = [
+        {"amount": "100", "recipient_details": CARD, "created_at": created_at.isoformat()},
+        {"amount": "200", "recipient_details": CARD, "status": PayoutStatus.SUCCESS},
+    ]
+
+    call_command("import_payouts", str(write_ndjson(tmp_path / "payouts.ndjson", rows)))
+
+    pending = Payout.objects.get(status=PayoutStatus.PENDING)
+    assert pending.created_at == created_at
+    assert pending.deadline > timezone.now()
+    assert Payout.objects.get(status=PayoutStatus.SUCCESS).deadline_at is None
+    assert process_payout_task(str(pending.id)) == TASK_RESULT_SUCCESS
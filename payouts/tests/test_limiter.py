@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+from pytest_mock import MockerFixture
+
+from payouts.exceptions import GatewayBusyError, GatewayTimeoutError, PayoutExpiredError
+from payouts.limiter import LocalGatewayLimiter, agateway_slot, gateway_slot, get_gateway_limiter
+
+
+@pytest.fixture
+def limiter(settings) -> LocalGatewayLimiter:
+    settings.PAYOUT_GATEWAY_LIMITER_URL = ""
+    settings.PAYOUT_GATEWAY_LIMIT_INITIAL = 4
+    settings.PAYOUT_GATEWAY_LIMIT_MIN = 1
+    settings.PAYOUT_GATEWAY_LIMIT_MAX = 5
+    settings.PAYOUT_GATEWAY_LATENCY_TARGET = 1
+    settings.PAYOUT_GATEWAY_BACKOFF_COOLDOWN = 0
+    return get_gateway_limiter()
+
+
+def test_limiter_grants_up_to_limit(limiter: LocalGatewayLimiter) -> None:
+    tokens = [limiter.try_acquire() for _ in range(5)]
+
+    assert None not in tokens[:4]
+    assert tokens[4] is None
+
+    limiter.discard(tokens[0])
+    assert limiter.try_acquire() is not None
+
+
+def test_limiter_expired_leases_are_freed(limiter: LocalGatewayLimiter, settings) -> None:
+    settings.PAYOUT_GATEWAY_LEASE_TIMEOUT = 0
+    for _ in range(4):
+        limiter.try_acquire()
+
+    assert limiter.try_acquire() is not None
+
+
+def test_limiter_adapts_to_latency(limiter: LocalGatewayLimiter, settings) -> None:
+    for _ in range(8):
+        limiter.release(limiter.try_acquire(), latency=0.1)
+    assert limiter.limit == 5
+
+    limiter.release(limiter.try_acquire(), latency=2)
+    assert limiter.limit == pytest.approx(5 * settings.PAYOUT_GATEWAY_SLOW_BACKOFF)
+
+    limiter.release(limiter.try_acquire(), latency=None)
+    assert limiter.limit == pytest.approx(5 * settings.PAYOUT_GATEWAY_SLOW_BACKOFF * 0.5)
+
+    for _ in range(3):
+        limiter.release(limiter.try_acquire(), latency=None)
+    assert limiter.limit == 1
+
+
+def test_limiter_timeouts_within_cooldown_count_once(limiter: LocalGatewayLimiter, settings) -> None:
+    settings.PAYOUT_GATEWAY_BACKOFF_COOLDOWN = 60
+    tokens = [limiter.try_acquire() for _ in range(4)]
+
+    for token in tokens:
+        limiter.release(token, latency=None)
+
+    assert limiter.limit == 2
+
+
+def test_gateway_slot_reports_timeout(limiter: LocalGatewayLimiter) -> None:
+    with pytest.raises(GatewayTimeoutError), gateway_slot():
+        raise GatewayTimeoutError
+
+    assert limiter.limit == 2
+    assert not limiter.leases
+
+
+def test_gateway_slot_other_errors_keep_limit(limiter: LocalGatewayLimiter) -> None:
+    with pytest.raises(RuntimeError), gateway_slot():
+        raise RuntimeError
+
+    assert limiter.limit == 4
+    assert not limiter.leases
+
+
+def test_gateway_slot_expired_payout_keeps_limit(limiter: LocalGatewayLimiter) -> None:
+    calls = REGISTRY.get_sample_value("payouts_gateway_call_duration_seconds_count", {"outcome": "expired"})
+    errors = REGISTRY.get_sample_value("payouts_gateway_call_duration_seconds_count", {"outcome": "error"})
+
+    with pytest.raises(PayoutExpiredError), gateway_slot():
+        raise PayoutExpiredError
+
+    assert limiter.limit == 4
+    assert not limiter.leases
+    assert REGISTRY.get_sample_value("payouts_gateway_call_duration_seconds_count", {"outcome": "expired"}) == calls + 1
+    assert REGISTRY.get_sample_value("payouts_gateway_call_duration_seconds_count", {"outcome": "error"}) == errors
+
+
+def test_gateway_slot_busy(limiter: LocalGatewayLimiter, settings, mocker: MockerFixture) -> None:
+    mocker.patch("time.sleep", return_value=None)
+    settings.PAYOUT_GATEWAY_LIMITER_WAIT = 0
+    for _ in range(4):
+        limiter.try_acquire()
+
+    with pytest.raises(GatewayBusyError), gateway_slot():
+        pass
+
+
+def test_agateway_slot_limits_concurrency(limiter: LocalGatewayLimiter) -> None:
+    in_flight = 0
+    peak = 0
+
+    async def call() -> None:
+        nonlocal in_flight, peak
+        async with agateway_slot():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def main() -> None:
+        await asyncio.gather(*(call() for _ in range(12)))
+
+    asyncio.run(main())
+
+    assert 4 <= peak <= 5
+    assert not limiter.leases
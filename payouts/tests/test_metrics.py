@@ -0,0 +1,129 @@
+import pytest
+from celery.exceptions import Retry
+from kombu.exceptions import OperationalError
+from prometheus_client import REGISTRY
+from pytest_mock import MockerFixture
+
+from payouts.choices import PayoutStatus
+from payouts.constants import (
+    TASK_RESULT_DEFERRED,
+    TASK_RESULT_NOT_FOUND,
+    TASK_RESULT_SKIPPED,
+    TASK_RESULT_SUCCESS,
+)
+from payouts.exceptions import GatewayBusyError
+from payouts.metrics import PayoutStateCollector, get_status_counts
+from payouts.models import OutboxMessage
+from payouts.tasks import process_payout_batch_task, process_payout_task
+from payouts.tests.factories import PayoutFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def get_sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def get_result_count(task: str, result: str) -> float:
+    return get_sample("payouts_task_results_total", task=task, result=result)
+
+
+def test_process_payout_task_metrics(settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    task = "process_payout_task"
+    successes = get_result_count(task, TASK_RESULT_SUCCESS)
+    gateway_waits = get_sample("payouts_task_phase_duration_seconds_count", task=task, phase="gateway")
+    db_phases = get_sample("payouts_task_phase_duration_seconds_count", task=task, phase="db")
+    calls = get_sample("payouts_gateway_call_duration_seconds_count", outcome="success")
+
+    process_payout_task(str(PayoutFactory().id))
+
+    assert get_result_count(task, TASK_RESULT_SUCCESS) == successes + 1
+    assert get_sample("payouts_task_phase_duration_seconds_count", task=task, phase="gateway") == gateway_waits + 1
+    assert get_sample("payouts_task_phase_duration_seconds_count", task=task, phase="db") == db_phases + 1
+    assert get_sample("payouts_gateway_call_duration_seconds_count", outcome="success") == calls + 1
+    assert get_sample("payouts_gateway_limit") > 0
+
+
+def test_process_payout_batch_task_counts_results(settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    payouts = PayoutFactory.create_batch(2)
+    processed = PayoutFactory(status=PayoutStatus.SUCCESS)
+    missing_id = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+    expected = {TASK_RESULT_SUCCESS: len(payouts), TASK_RESULT_SKIPPED: 1, TASK_RESULT_NOT_FOUND: 1}
+    before = {result: get_result_count("process_payout_batch_task", result) for result in expected}
+
+    process_payout_batch_task([*(str(payout.id) for payout in payouts), str(processed.id), missing_id])
+
+    for result, count in expected.items():
+        assert get_result_count("process_payout_batch_task", result) == before[result] + count
+
+
+def test_process_payout_batch_task_counts_results_before_retry(mocker: MockerFixture) -> None:
+    task = "process_payout_batch_task"
+    mocker.patch.object(process_payout_batch_task, "retry", side_effect=Retry)
+    mocker.patch("payouts.tasks.send_payouts", return_value=[0, GatewayBusyError("busy")])
+    payouts = PayoutFactory.create_batch(2)
+    successes = get_result_count(task, TASK_RESULT_SUCCESS)
+    deferrals = get_result_count(task, TASK_RESULT_DEFERRED)
+
+    with pytest.raises(Retry):
+        process_payout_batch_task([str(payout.id) for payout in payouts])
+
+    assert get_result_count(task, TASK_RESULT_SUCCESS) == successes + 1
+    assert get_result_count(task, TASK_RESULT_DEFERRED) == deferrals + 1
+
+
+def test_gateway_busy_counts_rejection_and_retry(mocker: MockerFixture, settings) -> None:
+    settings.PAYOUT_GATEWAY_LIMIT_INITIAL = 0
+    settings.PAYOUT_GATEWAY_LIMITER_WAIT = 0
+    mocker.patch.object(process_payout_task, "retry", side_effect=Retry)
+    task = "process_payout_task"
+    rejections = get_sample("payouts_gateway_rejected_total", reason="busy")
+    retries = get_sample("payouts_task_retries_total", task=task, kind="deferred")
+    phases = get_sample("payouts_task_phase_duration_seconds_count", task=task, phase="db")
+    deferrals = get_result_count(task, TASK_RESULT_DEFERRED)
+
+    with pytest.raises(Retry):
+        process_payout_task(str(PayoutFactory().id))
+
+    assert get_sample("payouts_gateway_rejected_total", reason="busy") == rejections + 1
+    assert get_result_count(task, TASK_RESULT_DEFERRED) == deferrals + 1
+    assert get_sample("payouts_task_retries_total", task=task, kind="deferred") == retries + 1
+    assert get_sample("payouts_task_phase_duration_seconds_count", task=task, phase="db") == phases + 1
+
+
+def test_get_status_counts_cached() -> None:
+    PayoutFactory.create_batch(2)
+    PayoutFactory(status=PayoutStatus.SUCCESS)
+
+    counts = get_status_counts()
+    PayoutFactory()
+
+    assert counts == {**dict.fromkeys(PayoutStatus.values, 0), PayoutStatus.PENDING: 2, PayoutStatus.SUCCESS: 1}
+    assert get_status_counts() == counts
+
+
+def test_payout_state_collector(mocker: MockerFixture) -> None:
+    mocker.patch("payouts.metrics.get_queue_depths", return_value={"payouts.urgent.rub": 4})
+    PayoutFactory(status=PayoutStatus.FAILED)
+    OutboxMessage.objects.create(task_name="payouts.tasks.process_payout_task", args=[])
+
+    samples = {
+        (sample.name, tuple(sample.labels.values())): sample.value
+        for metric in PayoutStateCollector().collect()
+        for sample in metric.samples
+    }
+
+    assert samples["payouts", (PayoutStatus.FAILED,)] == 1
+    assert samples["payouts", (PayoutStatus.PENDING,)] == 0
+    assert samples["payouts_outbox_unsent", ()] == 1
+    assert samples["payouts_queue_depth", ("payouts.urgent.rub",)] == 4
+
+
+def test_payout_state_collector_without_broker(mocker: MockerFixture) -> None:
+    mocker.patch("payouts.metrics.get_queue_depths", side_effect=OperationalError)
+
+    names = [metric.name for metric in PayoutStateCollector().collect()]
+
+    assert names == ["payouts", "payouts_outbox_unsent"]
@@ -0,0 +1,60 @@
+import pytest
+
+from payouts.choices import PayoutStatus
+from payouts.constants import FINAL_PAYOUT_STATUSES, PAYOUT_STATUS_TRANSITIONS
+from payouts.models import Payout
+from payouts.tests.factories import PayoutFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_final_statuses_have_no_transitions() -> None:
+    assert set(PAYOUT_STATUS_TRANSITIONS) == set(PayoutStatus)
+    for status in FINAL_PAYOUT_STATUSES:
+        assert PAYOUT_STATUS_TRANSITIONS[status] == ()
+
+
+@pytest.mark.parametrize(
+    ("current", "target", "expected"),
+    [
+        (PayoutStatus.PENDING, PayoutStatus.PROCESSING, True),
+        (PayoutStatus.PENDING, PayoutStatus.CANCELED, True),
+        (PayoutStatus.PENDING, PayoutStatus.SUCCESS, False),
+        (PayoutStatus.PROCESSING, PayoutStatus.SUCCESS, True),
+        (PayoutStatus.PROCESSING, PayoutStatus.PENDING, True),
+        (PayoutStatus.PROCESSING, PayoutStatus.CANCELED, False),
+        (PayoutStatus.PROCESSING, PayoutStatus.PROCESSING, False),
+        (PayoutStatus.SUCCESS, PayoutStatus.FAILED, False),
+        (PayoutStatus.CANCELED, PayoutStatus.PENDING, False),
+    ],
+)
+def test_payout_transition(current: PayoutStatus, target: PayoutStatus, expected: bool) -> None:
+    payout = PayoutFactory(status=current)
+
+    changed = payout.transition(target, comment="changed")
+
+    assert changed is expected
+    assert payout.status == (target if expected else current)
+    payout.refresh_from_db()
+    assert payout.status == (target if expected else current)
+    assert (payout.comment == "changed") is expected
+
+
+def test_payout_transition_uses_current_db_status() -> None:
+    payout = PayoutFactory(status=PayoutStatus.PROCESSING)
+    Payout.objects.filter(id=payout.id).update(status=PayoutStatus.CANCELED)
+
+    assert not payout.transition(PayoutStatus.SUCCESS)
+
+    payout.refresh_from_db()
+    assert payout.status == PayoutStatus.CANCELED
+
+
+def test_queryset_transition_counts_changed_rows() -> None:
+    PayoutFactory.create_batch(2, status=PayoutStatus.PENDING)
+    PayoutFactory(status=PayoutStatus.SUCCESS)
+
+    changed = Payout.objects.transition(PayoutStatus.CANCELED)
+
+    assert changed == 2
+    assert Payout.objects.filter(status=PayoutStatus.CANCELED).count() == 2
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from payouts.choices import CurrencyChoices, PayoutStatus
+from payouts.exceptions import DuplicatePayoutError
+from payouts.models import Payout
+from payouts.recipients import check_duplicate_payout
+from payouts.tests.factories import PayoutFactory
+from payouts.validators import get_recipient_key
+
+pytestmark = pytest.mark.django_db
+
+CARD = {"card_number": "1111222233334444"}
+
+
+@pytest.fixture
+def duplicate_window(settings) -> int:
+    settings.PAYOUT_DUPLICATE_WINDOW = 60 * 60
+    return settings.PAYOUT_DUPLICATE_WINDOW
+
+
+def test_get_recipient_key_normalizes_card_number(settings) -> None:
+    key = get_recipient_key(CARD)
+
+    assert key == get_recipient_key({"card_number": "1111 2222 3333 4444", "account_id": "408"})
+    assert key != get_recipient_key({"card_number": "1111222233334445"})
+    assert "1111222233334444" not in key
+    assert get_recipient_key({}) == get_recipient_key(["1111222233334444"]) == ""
+
+    settings.PAYOUT_RECIPIENT_KEY_SECRET = "other"
+    assert get_recipient_key(CARD) != key
+
+
+def test_payout_save_fills_recipient_key() -> None:
+    payout = PayoutFactory(recipient_details=CARD)
+
+    assert Payout.objects.get(id=payout.id).recipient_key == get_recipient_key(CARD)
+
+
+@pytest.mark.usefixtures("duplicate_window")
+def test_check_duplicate_payout() -> None:
+    key = get_recipient_key(CARD)
+    PayoutFactory(recipient_details=CARD, amount=Decimal("100.00"))
+
+    with pytest.raises(DuplicatePayoutError):
+        check_duplicate_payout(key, Decimal("100.00"), CurrencyChoices.RUB)
+    check_duplicate_payout(key, Decimal("100.01"), CurrencyChoices.RUB)
+    check_duplicate_payout(key, Decimal("100.00"), CurrencyChoices.USD)
+    check_duplicate_payout(get_recipient_key({"card_number": "5555666677778888"}), Decimal("100.00"), "RUB")
+
+
+@pytest.mark.usefixtures("duplicate_window")
+@pytest.mark.parametrize("status", [PayoutStatus.FAILED, PayoutStatus.CANCELED])
+def test_check_duplicate_payout_allows_repeating_unpaid_payouts(status: str) -> None:
+    PayoutFactory(recipient_details=CARD, amount=Decimal("100.00"), status=status)
+
+    check_duplicate_payout(get_recipient_key(CARD), Decimal("100.00"), CurrencyChoices.RUB)
+
+
+def test_check_duplicate_payout_window(settings, duplicate_window: int) -> None:
+    payout = PayoutFactory(recipient_details=CARD, amount=Decimal("100.00"))
+    Payout.objects.filter(id=payout.id).update(
+        created_at=timezone.now() - timedelta(seconds=duplicate_window + 1),
+    )
+    check_duplicate_payout(get_recipient_key(CARD), Decimal("100.00"), CurrencyChoices.RUB)
+
+    Payout.objects.filter(id=payout.id).update(created_at=timezone.now())
+    settings.PAYOUT_DUPLICATE_WINDOW = 0
+    check_duplicate_payout(get_recipient_key(CARD), Decimal("100.00"), CurrencyChoices.RUB)
@@ -0,0 +1,58 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError
+
+from payouts.exceptions import GatewayUnavailableError
+from payouts.models import DeadLetter, OutboxMessage
+from payouts.retries import get_retry_policy
+from payouts.tasks import process_payout_batch_task, process_payout_task
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    ("exc", "kind"),
+    [
+        (GatewayUnavailableError(), "deferred"),
+        (OperationalError(), "database"),
+        (RuntimeError(), "unexpected"),
+    ],
+)
+def test_get_retry_policy(settings, exc: BaseException, kind: str) -> None:
+    policy = get_retry_policy(exc)
+
+    assert policy.delay == settings.PAYOUT_TASK_RETRY_POLICIES[kind]["delay"]
+    assert policy.max_retries == settings.PAYOUT_TASK_RETRY_POLICIES[kind]["max_retries"]
+
+
+def test_retry_policy_countdown_is_capped_and_jittered(settings) -> None:
+    policy = get_retry_policy(OperationalError())
+
+    countdowns = [policy.get_countdown(50) for _ in range(100)]
+
+    assert all(0 <= countdown <= policy.max_delay for countdown in countdowns)
+    assert len(set(countdowns)) > 1
+
+
+def test_replay_dead_letters_command() -> None:
+    database = DeadLetter.objects.create(
+        task_name=process_payout_task.name,
+        args=["1"],
+        queue="payouts.normal.rub",
+        error_type="OperationalError",
+    )
+    DeadLetter.objects.create(task_name=process_payout_batch_task.name, args=[["2", "3"]], error_type="RuntimeError")
+    stdout = StringIO()
+
+    call_command("replay_dead_letters", "--dry-run", stdout=stdout)
+    assert len(stdout.getvalue().splitlines()) == 2
+    assert not OutboxMessage.objects.exists()
+
+    call_command("replay_dead_letters", "--error-type=OperationalError", stdout=StringIO())
+    call_command("replay_dead_letters", str(database.id), stdout=StringIO())
+
+    message = OutboxMessage.objects.get()
+    assert (message.task_name, message.args, message.queue) == (process_payout_task.name, ["1"], "payouts.normal.rub")
+    assert DeadLetter.objects.filter(replayed_at__isnull=True).count() == 1
@@ -0,0 +1,129 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from payouts.choices import CurrencyChoices, PayoutStatus
+from payouts.models import Payout, PayoutDailyStats
+from payouts.stats import get_stats_refreshed_at, recompute_day, refresh_payout_stats
+from payouts.tests.factories import PayoutFactory
+
+pytestmark = pytest.mark.django_db
+
+DAY = date(2026, 3, 1)
+
+
+def create_payout(day: date, amount: str, **fields: str) -> Payout:
+    payout = PayoutFactory(amount=Decimal(amount), **fields)
+    created_at = timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=12)
+    Payout.objects.filter(id=payout.id).update(created_at=created_at)
+    return payout
+
+
+def get_stats() -> set[tuple[date, str, str, int, Decimal]]:
+    return set(PayoutDailyStats.objects.values_list("day", "currency", "status", "count", "amount"))
+
+
+def test_refresh_payout_stats_groups_by_day_currency_and_status() -> None:
+    create_payout(DAY, "100.00")
+    create_payout(DAY, "50.50")
+    create_payout(DAY, "10.00", currency=CurrencyChoices.USD)
+    create_payout(DAY, "20.00", status=PayoutStatus.SUCCESS)
+    create_payout(DAY + timedelta(days=1), "30.00")
+
+    assert refresh_payout_stats() == 2
+
+    assert get_stats() == {
+        (DAY, CurrencyChoices.RUB, PayoutStatus.PENDING, 2, Decimal("150.50")),
+        (DAY, CurrencyChoices.USD, PayoutStatus.PENDING, 1, Decimal("10.00")),
+        (DAY, CurrencyChoices.RUB, PayoutStatus.SUCCESS, 1, Decimal("20.00")),
+        (DAY + timedelta(days=1), CurrencyChoices.RUB, PayoutStatus.PENDING, 1, Decimal("30.00")),
+    }
+
+
+def test_refresh_payout_stats_recomputes_only_changed_days(settings) -> None:
+    settings.PAYOUT_STATS_REFRESH_OVERLAP = 0
+    payout = create_payout(DAY, "100.00")
+    create_payout(DAY + timedelta(days=1), "30.00")
+    refresh_payout_stats()
+
+    assert refresh_payout_stats() == 0
+
+    Payout.objects.filter(id=payout.id).transition(PayoutStatus.PROCESSING)
+    assert refresh_payout_stats() == 1
+    assert get_stats() == {
+        (DAY, CurrencyChoices.RUB, PayoutStatus.PROCESSING, 1, Decimal("100.00")),
+        (DAY + timedelta(days=1), CurrencyChoices.RUB, PayoutStatus.PENDING, 1, Decimal("30.00")),
+    }
+
+
+def test_refresh_payout_stats_resumes_interrupted_refresh(mocker: MockerFixture) -> None:
+    create_payout(DAY, "100.00")
+    create_payout(DAY + timedelta(days=1), "30.00")
+    mocker.patch("payouts.stats.recompute_day", side_effect=[None, DatabaseError("connection lost")])
+
+    with pytest.raises(DatabaseError):
+        refresh_payout_stats()
+    mocker.stopall()
+
+    assert get_stats_refreshed_at() is None
+    assert refresh_payout_stats() == 2
+    assert get_stats() == {
+        (DAY, CurrencyChoices.RUB, PayoutStatus.PENDING, 1, Decimal("100.00")),
+        (DAY + timedelta(days=1), CurrencyChoices.RUB, PayoutStatus.PENDING, 1, Decimal("30.00")),
+    }
+
+
+def test_refresh_payout_stats_overlap_reads_late_commits(settings) -> None:
+    settings.PAYOUT_STATS_REFRESH_OVERLAP = 60
+    create_payout(DAY, "100.00")
+    refresh_payout_stats()
+
+    # Stamped before the refresh started, committed after it.
+    create_payout(DAY, "5.00")
+    Payout.objects.filter(amount=Decimal("5.00")).update(updated_at=timezone.now() - timedelta(seconds=30))
+
+    assert refresh_payout_stats() == 1
+    assert get_stats() == {(DAY, CurrencyChoices.RUB, PayoutStatus.PENDING, 2, Decimal("105.00"))}
+
+
+def test_refresh_payout_stats_command_full_drops_deleted_days() -> None:
+    create_payout(DAY, "100.00")
+    payout = create_payout(DAY + timedelta(days=1), "30.00")
+    refresh_payout_stats()
+    payout.delete()
+
+    call_command("refresh_payout_stats", stdout=StringIO())
+    assert PayoutDailyStats.objects.filter(day=DAY + timedelta(days=1)).exists()
+
+    stdout = StringIO()
+    call_command("refresh_payout_stats", "--full", stdout=stdout)
+
+    assert "Refreshed stats of 1 days" in stdout.getvalue()
+    assert get_stats() == {(DAY, CurrencyChoices.RUB, PayoutStatus.PENDING, 1, Decimal("100.00"))}
+
+
+def test_recompute_day_locks_the_day() -> None:
+    create_payout(DAY, "100.00")
+    recompute_day(DAY, timezone.now())
+
+    # The test transaction is still open: another connection cannot refresh the day.
+    other = connections.create_connection(DEFAULT_DB_ALIAS)
+    try:
+        with other.cursor() as cursor:
+            locked = []
+            for day in (DAY, DAY + timedelta(days=1)):
+                cursor.execute(
+                    "SELECT pg_try_advisory_xact_lock(%s::regclass::oid::int, %s)",
+                    [PayoutDailyStats._meta.db_table, day.toordinal()],
+                )
+                locked.append(cursor.fetchone()[0])
+    finally:
+        other.close()
+
+    assert locked == [False, True]
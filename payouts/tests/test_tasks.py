@@ -1,14 +1,33 @@
+import time
+from datetime import timedelta
+from collections.abc import Coroutine
+from typing import Any
+
 import pytest
+from celery.exceptions import Retry
 from django.conf import settings
+from django.db import OperationalError
+from django.utils import timezone
 from pytest_mock import MockerFixture
 
-from payouts.choices import PayoutStatus
+from payouts.breaker import get_circuit_breaker
+from payouts.choices import PayoutPriority, PayoutStatus
 from payouts.constants import (
+    TASK_RESULT_DEAD_LETTER,
+    TASK_RESULT_EXPIRED,
     TASK_RESULT_NOT_FOUND,
+    TASK_RESULT_SKIPPED,
     TASK_RESULT_SUCCESS,
     TASK_RESULT_TIMEOUT,
 )
-from payouts.tasks import process_payout_task
+from payouts.models import DeadLetter, Payout
+from payouts.tasks import (
+    claim_payouts_task,
+    claim_pending_payouts,
+    process_payout_batch_task,
+    process_payout_task,
+    send_payouts,
+)
 from payouts.tests.factories import PayoutFactory
 
 pytestmark = pytest.mark.django_db
@@ -50,3 +69,316 @@ def test_process_payout_task_not_found(mocker: MockerFixture) -> None:
     result = process_payout_task(random_uuid)
 
     assert result == TASK_RESULT_NOT_FOUND
+
+
+@pytest.mark.parametrize("payout_status", [PayoutStatus.PROCESSING, PayoutStatus.SUCCESS, PayoutStatus.CANCELED])
+def test_process_payout_task_skips_duplicate_delivery(mocker: MockerFixture, payout_status: PayoutStatus) -> None:
+    mock_sleep = mocker.patch("time.sleep", return_value=None)
+    payout = PayoutFactory(status=payout_status)
+
+    result = process_payout_task(str(payout.id))
+
+    payout.refresh_from_db()
+    assert result == TASK_RESULT_SKIPPED
+    assert payout.status == payout_status
+    mock_sleep.assert_not_called()
+
+
+def test_process_payout_batch_task(settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    payouts = PayoutFactory.create_batch(3)
+    missing_id = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+    payout_ids = [str(payout.id) for payout in payouts]
+
+    processed = PayoutFactory(status=PayoutStatus.SUCCESS)
+
+    result = process_payout_batch_task([*payout_ids, missing_id, str(processed.id)])
+
+    assert result == {
+        **dict.fromkeys(payout_ids, TASK_RESULT_SUCCESS),
+        missing_id: TASK_RESULT_NOT_FOUND,
+        str(processed.id): TASK_RESULT_SKIPPED,
+    }
+    for payout in payouts:
+        payout.refresh_from_db()
+        assert payout.status == PayoutStatus.SUCCESS
+        assert "Successfully processed" in payout.comment
+
+
+def test_process_payout_batch_task_timeout(settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0.01
+    settings.PAYOUT_PROCESSING_TIMEOUT = 0
+    payout = PayoutFactory()
+
+    result = process_payout_batch_task([str(payout.id)])
+
+    payout.refresh_from_db()
+    assert result == {str(payout.id): TASK_RESULT_TIMEOUT}
+    assert payout.status == PayoutStatus.FAILED
+    assert "Gateway timeout" in payout.comment
+
+
+def test_process_payout_batch_task_waits_concurrently(settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0.2
+    settings.PAYOUT_GATEWAY_CONCURRENCY = 10
+    payouts = PayoutFactory.create_batch(10)
+
+    started = time.monotonic()
+    result = process_payout_batch_task([str(payout.id) for payout in payouts])
+    elapsed = time.monotonic() - started
+
+    assert set(result.values()) == {TASK_RESULT_SUCCESS}
+    assert elapsed < 1
+
+
+def test_claim_pending_payouts() -> None:
+    oldest, newest = PayoutFactory.create_batch(2)
+    PayoutFactory(status=PayoutStatus.PROCESSING)
+    PayoutFactory(status=PayoutStatus.SUCCESS)
+
+    claimed = claim_pending_payouts(limit=1)
+
+    assert [payout.id for payout in claimed] == [oldest.id]
+    oldest.refresh_from_db()
+    newest.refresh_from_db()
+    assert oldest.status == PayoutStatus.PROCESSING
+    assert newest.status == PayoutStatus.PENDING
+
+
+def test_claim_payouts_task(settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    settings.PAYOUT_CLAIM_BATCH_SIZE = 2
+    pending = PayoutFactory.create_batch(5)
+    processing = PayoutFactory(status=PayoutStatus.PROCESSING)
+
+    result = claim_payouts_task()
+
+    assert result == 5
+    for payout in pending:
+        payout.refresh_from_db()
+        assert payout.status == PayoutStatus.SUCCESS
+    processing.refresh_from_db()
+    assert processing.status == PayoutStatus.PROCESSING
+
+
+def test_process_payout_task_cannot_be_canceled_during_processing(mocker: MockerFixture, settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    payout = PayoutFactory()
+    canceled = []
+
+    def cancel(*_args: object) -> int:
+        canceled.append(Payout.objects.filter(id=payout.id).transition(PayoutStatus.CANCELED))
+        return 0
+
+    mocker.patch("payouts.tasks.send_payout", side_effect=cancel)
+
+    result = process_payout_task(str(payout.id))
+
+    payout.refresh_from_db()
+    assert canceled == [0]
+    assert result == TASK_RESULT_SUCCESS
+    assert payout.status == PayoutStatus.SUCCESS
+
+
+def test_process_payout_batch_task_changed_during_processing(mocker: MockerFixture, settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    changed, processed = PayoutFactory.create_batch(2)
+
+    def change_and_send(payouts: list[Payout]) -> Coroutine[Any, Any, list[int]]:
+        # E.g. fixed by hand; the worker must not overwrite it.
+        Payout.objects.filter(id=changed.id).update(status=PayoutStatus.FAILED)
+        return send_payouts(payouts)
+
+    mocker.patch("payouts.tasks.send_payouts", new=change_and_send)
+
+    result = process_payout_batch_task([str(changed.id), str(processed.id)])
+
+    changed.refresh_from_db()
+    processed.refresh_from_db()
+    assert result == {str(changed.id): TASK_RESULT_SKIPPED, str(processed.id): TASK_RESULT_SUCCESS}
+    assert changed.status == PayoutStatus.FAILED
+    assert processed.status == PayoutStatus.SUCCESS
+
+
+def test_process_payout_task_gateway_busy_retries(mocker: MockerFixture, settings) -> None:
+    settings.PAYOUT_GATEWAY_LIMIT_INITIAL = 0
+    settings.PAYOUT_GATEWAY_LIMITER_WAIT = 0
+    mock_retry = mocker.patch.object(process_payout_task, "retry", side_effect=Retry)
+    payout = PayoutFactory()
+
+    with pytest.raises(Retry):
+        process_payout_task(str(payout.id))
+
+    payout.refresh_from_db()
+    assert payout.status == PayoutStatus.PENDING
+    assert 0 <= mock_retry.call_args.kwargs["countdown"] <= settings.PAYOUT_GATEWAY_BUSY_RETRY_DELAY
+
+
+def test_claim_payouts_task_gateway_busy_returns_payouts(settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    settings.PAYOUT_GATEWAY_LIMIT_INITIAL = 0
+    settings.PAYOUT_GATEWAY_LIMITER_WAIT = 0
+    payouts = PayoutFactory.create_batch(2)
+
+    result = claim_payouts_task()
+
+    assert result == 0
+    for payout in payouts:
+        payout.refresh_from_db()
+        assert payout.status == PayoutStatus.PENDING
+
+
+@pytest.fixture
+def open_circuit(settings) -> None:
+    settings.PAYOUT_GATEWAY_BREAKER_URL = ""
+    breaker = get_circuit_breaker()
+    breaker.tripped = True
+    breaker.open_until = float("inf")
+
+
+@pytest.mark.usefixtures("open_circuit")
+def test_process_payout_task_circuit_open_defers(mocker: MockerFixture) -> None:
+    mock_retry = mocker.patch.object(process_payout_task, "retry", side_effect=Retry)
+    mock_send = mocker.patch("payouts.tasks.send_payout")
+    payout = PayoutFactory()
+
+    with pytest.raises(Retry):
+        process_payout_task(str(payout.id))
+
+    payout.refresh_from_db()
+    assert payout.status == PayoutStatus.PENDING
+    assert mock_retry.call_args.kwargs["args"] == [str(payout.id)]
+    mock_send.assert_not_called()
+
+
+@pytest.mark.usefixtures("open_circuit")
+def test_process_payout_batch_task_circuit_open_defers(mocker: MockerFixture) -> None:
+    mock_retry = mocker.patch.object(process_payout_batch_task, "retry", side_effect=Retry)
+    payouts = PayoutFactory.create_batch(2)
+    payout_ids = [str(payout.id) for payout in payouts]
+
+    with pytest.raises(Retry):
+        process_payout_batch_task(payout_ids)
+
+    assert sorted(mock_retry.call_args.kwargs["args"][0]) == sorted(payout_ids)
+    assert set(Payout.objects.values_list("status", flat=True)) == {PayoutStatus.PENDING}
+
+
+@pytest.mark.usefixtures("open_circuit")
+def test_claim_payouts_task_circuit_open_stops() -> None:
+    PayoutFactory.create_batch(2)
+
+    assert claim_payouts_task() == 0
+    assert set(Payout.objects.values_list("status", flat=True)) == {PayoutStatus.PENDING}
+
+
+@pytest.mark.parametrize(
+    ("retries", "expected_delay"),
+    [(0, 2), (1, 4), (3, 16), (10, 300)],
+)
+def test_process_payout_task_database_error_backoff(
+    mocker: MockerFixture,
+    settings,
+    retries: int,
+    expected_delay: int,
+) -> None:
+    settings.PAYOUT_TASK_RETRY_POLICIES = {
+        **settings.PAYOUT_TASK_RETRY_POLICIES,
+        "database": {"delay": 2, "max_delay": 300, "max_retries": 20},
+    }
+    mocker.patch("payouts.tasks.Payout.objects.get", side_effect=OperationalError)
+    mock_uniform = mocker.patch("payouts.retries.random.uniform", return_value=1.5)
+    mock_retry = mocker.patch.object(process_payout_task, "retry", side_effect=Retry)
+
+    process_payout_task.push_request(retries=retries)
+    try:
+        with pytest.raises(Retry):
+            process_payout_task("3fa85f64-5717-4562-b3fc-2c963f66afa6")
+    finally:
+        process_payout_task.pop_request()
+
+    mock_uniform.assert_called_once_with(0, expected_delay)
+    assert mock_retry.call_args.kwargs["countdown"] == 1.5
+
+
+def test_process_payout_task_dead_letter(mocker: MockerFixture, settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    mocker.patch("payouts.tasks.send_payout", side_effect=RuntimeError("gateway exploded"))
+    payout = PayoutFactory(status=PayoutStatus.PROCESSING)
+
+    result = process_payout_task.apply(args=[str(payout.id)], retries=settings.PAYOUT_TASK_MAX_RETRIES)
+
+    assert result.get() == TASK_RESULT_DEAD_LETTER
+    payout.refresh_from_db()
+    assert payout.status == PayoutStatus.PENDING
+    entry = DeadLetter.objects.get()
+    assert entry.task_name == process_payout_task.name
+    assert entry.args == [str(payout.id)]
+    assert entry.error_type == "RuntimeError"
+    assert entry.error == "gateway exploded"
+    assert entry.retries == settings.PAYOUT_TASK_MAX_RETRIES
+
+
+def test_process_payout_batch_task_dead_letter(mocker: MockerFixture, settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    failed, processed = PayoutFactory.create_batch(2)
+
+    async def send(payout: Payout) -> int:
+        if payout.id == failed.id:
+            raise RuntimeError
+        return 0
+
+    mocker.patch("payouts.tasks.asend_payout", new=send)
+
+    result = process_payout_batch_task.apply(
+        args=[[str(failed.id), str(processed.id)]],
+        retries=settings.PAYOUT_TASK_MAX_RETRIES,
+    )
+
+    assert result.get() == {str(failed.id): TASK_RESULT_DEAD_LETTER, str(processed.id): TASK_RESULT_SUCCESS}
+    assert DeadLetter.objects.get().args == [[str(failed.id)]]
+    failed.refresh_from_db()
+    assert failed.status == PayoutStatus.PENDING
+
+
+def test_process_payout_task_expired_in_queue(mocker: MockerFixture) -> None:
+    mock_send = mocker.patch("payouts.tasks.send_payout")
+    payout = PayoutFactory()
+    Payout.objects.filter(id=payout.id).update(created_at=timezone.now() - timedelta(days=2))
+
+    result = process_payout_task(str(payout.id))
+
+    payout.refresh_from_db()
+    assert result == TASK_RESULT_EXPIRED
+    assert payout.status == PayoutStatus.FAILED
+    assert "Deadline exceeded" in payout.comment
+    mock_send.assert_not_called()
+
+
+def test_process_payout_task_gateway_wait_cut_at_deadline(settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 5
+    settings.PAYOUT_DEADLINES = {**settings.PAYOUT_DEADLINES, PayoutPriority.NORMAL: 0.3}
+    payout = PayoutFactory()
+
+    started = time.monotonic()
+    result = process_payout_task(str(payout.id))
+    elapsed = time.monotonic() - started
+
+    assert result == TASK_RESULT_EXPIRED
+    assert elapsed < 1
+
+
+def test_process_payout_batch_task_deadlines(settings) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 5
+    settings.PAYOUT_DEADLINES = {**settings.PAYOUT_DEADLINES, PayoutPriority.NORMAL: 0.3}
+    expired = PayoutFactory(priority=PayoutPriority.BULK)
+    Payout.objects.filter(id=expired.id).update(created_at=timezone.now() - timedelta(days=2))
+    cut = PayoutFactory()
+
+    started = time.monotonic()
+    result = process_payout_batch_task([str(expired.id), str(cut.id)])
+    elapsed = time.monotonic() - started
+
+    assert result == {str(expired.id): TASK_RESULT_EXPIRED, str(cut.id): TASK_RESULT_EXPIRED}
+    assert set(Payout.objects.values_list("status", flat=True)) == {PayoutStatus.FAILED}
+    assert elapsed < 1
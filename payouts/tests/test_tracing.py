@@ -0,0 +1,46 @@
+import pytest
+from django.urls import reverse
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from pytest_mock import MockerFixture
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from payouts.constants import TASK_RESULT_SUCCESS
+from payouts.models import OutboxMessage
+from payouts.outbox import relay_outbox
+from payouts.tasks import process_payout_task
+
+pytestmark = pytest.mark.django_db
+
+
+def test_payout_traced_from_create_to_processing(
+    api_client: APIClient,
+    mocker: MockerFixture,
+    spans: InMemorySpanExporter,
+    settings,
+) -> None:
+    settings.PAYOUT_GATEWAY_DELAY = 0
+    mock_app = mocker.patch("payouts.outbox.current_app")
+    response = api_client.post(
+        reverse("payout-list"),
+        {"amount": "100.00", "recipient_details": {"card_number": "1111222233334444"}},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    message = OutboxMessage.objects.get()
+    relay_outbox(batch_size=10)
+    headers = mock_app.send_task.call_args.kwargs["headers"]
+    result = process_payout_task.apply(args=[response.data["id"]], headers=headers)
+
+    assert result.get() == TASK_RESULT_SUCCESS
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    create = finished["payout create"]
+    assert create.attributes["payout.id"] == response.data["id"]
+    assert message.headers["traceparent"].split("-")[1] == f"{create.context.trace_id:032x}"
+    assert finished["outbox publish"].parent.span_id == create.context.span_id
+    assert finished[process_payout_task.name].parent.span_id == finished["outbox publish"].context.span_id
+    assert finished["gateway wait"].parent.span_id == finished[process_payout_task.name].context.span_id
+    assert finished["gateway call"].parent.span_id == finished["gateway wait"].context.span_id
+    assert {span.context.trace_id for span in finished.values()} == {create.context.trace_id}
+    assert any(name.startswith("db ") for name in finished)
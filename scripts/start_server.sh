@@ -3,6 +3,13 @@
 set -o errexit
 set -o nounset
 
+. ./scripts/utils/prepare_metrics_dir.sh
 . ./scripts/utils/start_gunicorn.sh
+. ./scripts/utils/start_uvicorn.sh
 
-start_gunicorn
+# SERVER_PROFILE=asgi serves the hot payout endpoints with async views.
+if [ "${SERVER_PROFILE:-wsgi}" = "asgi" ]; then
+    start_uvicorn
+else
+    start_gunicorn
+fi
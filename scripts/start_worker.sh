@@ -0,0 +1,9 @@
+#!/bin/bash
+
+set -o errexit
+set -o nounset
+
+. ./scripts/utils/prepare_metrics_dir.sh
+
+prepare_metrics_dir
+exec celery -A payout_service worker --loglevel=info "$@"
@@ -0,0 +1,10 @@
+#!/bin/bash
+
+# Processes of a multi-process server write their metrics to files in PROMETHEUS_MULTIPROC_DIR
+# (see core.metrics). The directory has to exist before the application is imported and be
+# empty, or the files of the previous run are added to the new values.
+prepare_metrics_dir() {
+    export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+}
@@ -2,7 +2,9 @@
 
 start_gunicorn() {
     echo "Starting Gunicorn via Python module..."
+    prepare_metrics_dir
     exec python -m gunicorn payout_service.wsgi:application \
+        --config python:payout_service.gunicorn \
         --workers="${WEB_CONCURRENCY:-2}" \
         --bind 0.0.0.0:8000 \
         --worker-tmp-dir /dev/shm \
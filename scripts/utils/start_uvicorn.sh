@@ -0,0 +1,21 @@
+#!/bin/bash
+
+start_uvicorn() {
+    echo "Starting Uvicorn (ASGI) via Python module..."
+    # Django 5.0 runs the sync code of every ASGI request in a thread of its own, and
+    # connections are per thread: with CONN_MAX_AGE > 0 each request would leave its
+    # connection open in a finished thread until the server runs out of connections.
+    # To avoid a connect per request, point DB_HOST/DB_PORT at a transaction pooler
+    # (PgBouncer) instead.
+    export DB_CONN_MAX_AGE=0
+    prepare_metrics_dir
+    exec python -m uvicorn payout_service.asgi:application \
+        --workers="${WEB_CONCURRENCY:-2}" \
+        --host 0.0.0.0 \
+        --port 8000 \
+        --proxy-headers \
+        --forwarded-allow-ips="*" \
+        --limit-concurrency="${ASGI_LIMIT_CONCURRENCY:-2000}" \
+        --timeout-keep-alive 5 \
+        --no-server-header
+}